@@ -8,11 +8,13 @@ from .configs import (
     ShardedFilesDatasetConfig,
     ShardsDatasetConfig,
 )
-from .connectors import Connector, LocalConnector, S3Connector
+from .connectors import CachingConnector, Connector, LocalConnector, S3Connector
 from .dataset_reader import DatasetReader
+from .filter_expression import FilterExpression
 from .processors import (
     DatasetProcessor,
     FilesDatasetProcessor,
     ShardedFilesDatasetProcessor,
     ShardsDatasetProcessor,
+    StreamingShardedDatasetProcessor,
 )
@@ -1,3 +1,4 @@
+from .caching_connector import CachingConnector
 from .connector import Connector
 from .local_connector import LocalConnector
 from .s3_connector import S3Connector
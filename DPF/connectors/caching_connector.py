@@ -0,0 +1,221 @@
+import fcntl
+import hashlib
+import io
+import os
+import tarfile
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import BinaryIO, Optional, Union
+
+from .connector import Connector
+from .local_connector import LocalConnector
+
+# files in cache directory with the total size of cached files and the lock for its updates
+CACHE_SIZE_FILENAME = '.cache_size'
+CACHE_LOCK_FILENAME = '.cache_lock'
+
+
+class CachingConnector(Connector):
+    """
+    Class that wraps any connector and caches files read from it on local disk.
+    Cached files are keyed by path and file fingerprint (size, ETag, etc.),
+    least recently used files are evicted when the cache exceeds its size.
+    Cache directory can be shared between processes: total size of the cache is stored in the directory
+    and is updated under a file lock, the directory is scanned only when files should be evicted.
+    """
+
+    def __init__(
+        self,
+        connector: Connector,
+        cache_dir: str,
+        max_cache_size: int = 100 * 1024**3,
+        validate: bool = True
+    ):
+        """
+        Parameters
+        ----------
+        connector: Connector
+            Connector to wrap (for example, S3Connector)
+        cache_dir: str
+            Local directory for cached files. Can be shared between processes on one machine
+        max_cache_size: int = 100 * 1024**3
+            Maximum size of the cache in bytes
+        validate: bool = True
+            Whether to check file fingerprint on every read. If False, files are keyed only by path
+            and changes of files are not detected (saves one metadata request per read)
+        """
+        self.connector = connector
+        self.cache_dir = cache_dir
+        self.max_cache_size = max_cache_size
+        self.validate = validate
+        self._local_connector = LocalConnector()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _get_cache_path(self, filepath: str) -> str:
+        fingerprint = self.connector.get_file_fingerprint(filepath) if self.validate else None
+        path_hash = hashlib.sha1(filepath.encode()).hexdigest()
+        fingerprint_hash = hashlib.sha1(str(fingerprint).encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{path_hash}-{fingerprint_hash}")
+
+    def _get_tmp_path(self) -> str:
+        # names of temporary files start with a dot, so they are not treated as cached files
+        return os.path.join(self.cache_dir, f".{uuid.uuid4().hex}.tmp")
+
+    @contextmanager
+    def _lock_cache(self) -> Iterator[None]:
+        """Locks the cache directory for all processes that use it"""
+        with open(os.path.join(self.cache_dir, CACHE_LOCK_FILENAME), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _scan_cache(self) -> list[tuple[float, int, str]]:
+        """Returns modification time, size and path of cached files, from least to most recently used"""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and not entry.name.startswith('.'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return sorted(entries)
+
+    def _read_cache_size(self) -> int:
+        try:
+            with open(os.path.join(self.cache_dir, CACHE_SIZE_FILENAME)) as f:
+                return int(f.read())
+        except FileNotFoundError:
+            return sum(size for _, size, _ in self._scan_cache())
+
+    def _write_cache_size(self, cache_size: int) -> None:
+        tmp_path = self._get_tmp_path()
+        with open(tmp_path, 'w') as f:
+            f.write(str(cache_size))
+        os.replace(tmp_path, os.path.join(self.cache_dir, CACHE_SIZE_FILENAME))
+
+    def _invalidate(self, filepath: str) -> None:
+        prefix = hashlib.sha1(filepath.encode()).hexdigest() + '-'
+        with self._lock_cache():
+            removed_size = 0
+            for filename in os.listdir(self.cache_dir):
+                if filename.startswith(prefix):
+                    cache_path = os.path.join(self.cache_dir, filename)
+                    try:
+                        removed_size += os.path.getsize(cache_path)
+                        os.remove(cache_path)
+                    except FileNotFoundError:
+                        pass
+            if removed_size > 0:
+                self._write_cache_size(max(self._read_cache_size() - removed_size, 0))
+
+    def _evict(self, size_to_add: int) -> int:
+        """Removes least recently used files, so a file of size_to_add fits into cache.
+        Should be called under lock. Returns the size of cache after eviction
+        """
+        entries = self._scan_cache()
+        cache_size = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if cache_size + size_to_add <= self.max_cache_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            cache_size -= size
+        return cache_size
+
+    @staticmethod
+    def _mark_used(cache_path: str) -> bool:
+        """Marks cached file as recently used. Returns False if file is not in cache"""
+        try:
+            os.utime(cache_path)  # order of files for eviction is kept by modification time
+        except FileNotFoundError:
+            return False
+        return True
+
+    def _get_cached_file(self, filepath: str) -> Optional[str]:
+        cache_path = self._get_cache_path(filepath)
+        if self._mark_used(cache_path):
+            return cache_path
+        return None
+
+    def _cache_file(self, filepath: str) -> Union[str, io.BytesIO]:
+        """Returns path to cached file or downloads file, adds it to cache and returns its content"""
+        cache_path = self._get_cache_path(filepath)
+        if self._mark_used(cache_path):
+            return cache_path
+
+        data = self.connector.read_file(filepath, binary=True)
+        size = data.getbuffer().nbytes
+        if size > self.max_cache_size:
+            return data
+
+        # write to temporary file first, so other processes never read partially written files
+        tmp_path = self._get_tmp_path()
+        self._local_connector.save_file(data, tmp_path, binary=True)
+        with self._lock_cache():
+            if os.path.exists(cache_path):
+                # file was cached by another process
+                os.remove(tmp_path)
+                return data
+            cache_size = self._read_cache_size()
+            if cache_size + size > self.max_cache_size:
+                cache_size = self._evict(size)
+            os.replace(tmp_path, cache_path)
+            self._write_cache_size(cache_size + size)
+        return data
+
+    def read_file(self, filepath: str, binary: bool) -> io.BytesIO:
+        cached = self._cache_file(filepath)
+        data = self._local_connector.read_file(cached, binary=True) if isinstance(cached, str) else cached
+        if binary:
+            return data
+        return data.getvalue().decode()  # type: ignore
+
+    def read_buffer(self, filepath: str) -> memoryview:
+        cached = self._cache_file(filepath)
+        if isinstance(cached, str):
+            return self._local_connector.read_buffer(cached)
+        return cached.getbuffer().toreadonly()
+
+    def read_tar(self, filepath: str) -> tarfile.TarFile:
+        cached = self._cache_file(filepath)
+        if isinstance(cached, str):
+            return self._local_connector.read_tar(cached)
+        return tarfile.open(fileobj=cached, mode="r")
+
+    def read_range(self, filepath: str, offset: int, size: int) -> bytes:
+        # ranged reads do not download the whole file, only already cached files are used
+        cached_path = self._get_cached_file(filepath)
+        if cached_path is not None:
+            return self._local_connector.read_range(cached_path, offset, size)
+        return self.connector.read_range(filepath, offset, size)
+
+    def open_stream(self, filepath: str) -> BinaryIO:
+        cached_path = self._get_cached_file(filepath)
+        if cached_path is not None:
+            return self._local_connector.open_stream(cached_path)
+        return self.connector.open_stream(filepath)
+
+    def open_write(self, filepath: str) -> BinaryIO:
+        self._invalidate(filepath)
+        return self.connector.open_write(filepath)
+
+    def get_file_fingerprint(self, filepath: str) -> Optional[str]:
+        return self.connector.get_file_fingerprint(filepath)
+
+    def save_file(
+        self, data: Union[str, bytes, io.BytesIO], filepath: str, binary: bool
+    ) -> None:
+        self.connector.save_file(data, filepath, binary)
+        self._invalidate(filepath)
+
+    def listdir(self, folder_path: str) -> list[str]:
+        return self.connector.listdir(folder_path)
+
+    def mkdir(self, folder_path: str) -> None:
+        self.connector.mkdir(folder_path)
+
+    def join(self, *args: str) -> str:
+        return self.connector.join(*args)
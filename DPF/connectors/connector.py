@@ -2,13 +2,28 @@ import io
 import os
 import tarfile
 from abc import ABC, abstractmethod
-from typing import Any, Union
+from typing import Any, BinaryIO, Optional, Union
 
 import pandas as pd
+import pyarrow.parquet as pq
 
 from DPF.connectors.errors import UnknownFileFormatException
 
 
+class _BufferedWriteFile(io.BytesIO):
+    """Buffer that saves its content to file with connector on close"""
+
+    def __init__(self, connector: "Connector", filepath: str):
+        super().__init__()
+        self.connector = connector
+        self.filepath = filepath
+
+    def close(self) -> None:
+        if not self.closed:
+            self.connector.save_file(self, self.filepath, binary=True)
+        super().close()
+
+
 class Connector(ABC):
     """
     Abstract class for all filesystems
@@ -51,6 +66,98 @@ class Connector(ABC):
         """
         pass
 
+    def read_buffer(self, filepath: str) -> memoryview:
+        """
+        Reads file content into a read-only buffer. Connectors that can map files
+        into memory should override this method to avoid copying file content
+
+        Parameters
+        ----------
+        filepath: str
+            Path to file
+
+        Returns
+        -------
+        memoryview
+            Read-only buffer with file content
+        """
+        return self.read_file(filepath, binary=True).getbuffer().toreadonly()
+
+    def open_stream(self, filepath: str) -> BinaryIO:
+        """
+        Opens file for sequential reading. Connectors that support streaming
+        should override this method, default implementation reads the whole file
+
+        Parameters
+        ----------
+        filepath: str
+            Path to file
+
+        Returns
+        -------
+        BinaryIO
+            File-like object, should be closed after reading (can be used as a context manager)
+        """
+        return self.read_file(filepath, binary=True)
+
+    def open_write(self, filepath: str) -> BinaryIO:
+        """
+        Opens file for sequential writing. Connectors that support streaming writes
+        (e.g. multipart uploads) should override this method, default implementation
+        buffers data in memory and saves the file when it is closed
+
+        Parameters
+        ----------
+        filepath: str
+            Path to file
+
+        Returns
+        -------
+        BinaryIO
+            File-like object, file is saved when it is closed (can be used as a context manager)
+        """
+        return _BufferedWriteFile(self, filepath)
+
+    def read_range(self, filepath: str, offset: int, size: int) -> bytes:
+        """
+        Reads a byte range of a file. Connectors that support ranged reads
+        should override this method, default implementation reads the whole file
+
+        Parameters
+        ----------
+        filepath: str
+            Path to file
+        offset: int
+            Offset of the first byte to read
+        size: int
+            Number of bytes to read
+
+        Returns
+        -------
+        bytes
+            Bytes of the range
+        """
+        data = self.read_file(filepath, binary=True)
+        return data.getbuffer()[offset:offset+size].tobytes()
+
+    def get_file_fingerprint(self, filepath: str) -> Optional[str]:
+        """
+        Returns a string that changes when file content changes (size, modification time, ETag).
+        Connectors that can get file metadata should override this method,
+        default implementation returns None (fingerprint is unknown)
+
+        Parameters
+        ----------
+        filepath: str
+            Path to file
+
+        Returns
+        -------
+        Optional[str]
+            Fingerprint of the file or None
+        """
+        return None
+
     def read_tar(self, filepath: str) -> tarfile.TarFile:
         """
         Reads a tar file like tarfile.open
@@ -63,7 +170,7 @@ class Connector(ABC):
         tar_bytes = self.read_file(filepath, binary=True)
         return tarfile.open(fileobj=tar_bytes, mode="r")
 
-    def read_dataframe(self, filepath: str, **kwargs: Any) -> pd.DataFrame:
+    def read_dataframe(self, filepath: str, columns: Optional[list[str]] = None, **kwargs: Any) -> pd.DataFrame:
         """
         Reads dataframe
 
@@ -71,6 +178,8 @@ class Connector(ABC):
         ----------
         filepath: str
             Path to dataframe file (csv, parquet, etc.)
+        columns: Optional[list[str]] = None
+            Columns to read. Columns that are not in the file are ignored. All columns are read if None
         **kwargs
             kwargs for pandas read function
 
@@ -82,9 +191,15 @@ class Connector(ABC):
         filetype = os.path.splitext(filepath)[1]  # get extension
         filetype = filetype.lstrip(".")
         data = self.read_file(filepath, binary=True)
+        columns_set = set(columns) if columns is not None else None
         if filetype == "csv":
+            if columns_set is not None:
+                kwargs["usecols"] = lambda col: col in columns_set
             return pd.read_csv(data, **kwargs)
         if filetype == "parquet":
+            if columns_set is not None:
+                kwargs["columns"] = [col for col in pq.read_schema(data).names if col in columns_set]
+                data.seek(0)
             return pd.read_parquet(data, **kwargs)
         else:
             raise UnknownFileFormatException(f"Unknown file format: {filetype}")
@@ -1,10 +1,67 @@
 import io
+import mmap
 import os
-from typing import Union
+import tarfile
+import uuid
+from types import TracebackType
+from typing import BinaryIO, Optional, Union
 
 from .connector import Connector
 
 
+class _MappedTarFile(tarfile.TarFile):
+    """Tar archive opened from a memory-mapped file, unmaps the file on close"""
+
+    def close(self) -> None:
+        super().close()
+        mapped_file = self.fileobj
+        if isinstance(mapped_file, mmap.mmap) and not mapped_file.closed:
+            try:
+                mapped_file.close()
+            except BufferError:
+                # buffers of archive members are still in use,
+                # file is unmapped when the last of them is released
+                pass
+
+
+class _ReplaceOnCloseFile(io.BufferedWriter):
+    """File that is written to a temporary path and replaces the target file on close,
+    so readers never see a partially written file
+    """
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        dirname, basename = os.path.split(filepath)
+        self.tmp_path = os.path.join(dirname, f".{basename}.{uuid.uuid4().hex}.tmp")
+        super().__init__(io.FileIO(self.tmp_path, "w"))
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        super().close()
+        os.replace(self.tmp_path, self.filepath)
+
+    def __exit__(
+        self,
+        exception_type: Optional[type[BaseException]],
+        exception_value: Optional[BaseException],
+        exception_traceback: Optional[TracebackType]
+    ) -> None:
+        if exception_type is None:
+            self.close()
+        else:
+            self._discard()
+
+    def __del__(self) -> None:
+        # file that was not closed explicitly is not complete
+        self._discard()
+
+    def _discard(self) -> None:
+        if not self.closed:
+            super().close()
+            os.remove(self.tmp_path)
+
+
 class LocalConnector(Connector):
     """
     Class that wraps interaction with local filesystem.
@@ -20,6 +77,45 @@ class LocalConnector(Connector):
                 res = f.read()
         return res
 
+    @staticmethod
+    def _mmap_file(filepath: str) -> mmap.mmap:
+        with open(filepath, "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def read_buffer(self, filepath: str) -> memoryview:
+        if os.path.getsize(filepath) == 0:
+            # empty files can not be mapped
+            return memoryview(b"")
+        # buffer holds the only reference to mapping, so file is unmapped when buffer is released
+        return memoryview(self._mmap_file(filepath))
+
+    def read_tar(self, filepath: str) -> tarfile.TarFile:
+        if os.path.getsize(filepath) == 0:
+            # empty files can not be mapped
+            return super().read_tar(filepath)
+        # archive is mapped into memory, so members are read from page cache without reading the whole file
+        mapped_file = self._mmap_file(filepath)
+        try:
+            return _MappedTarFile.open(fileobj=mapped_file, mode="r")
+        except Exception:
+            mapped_file.close()
+            raise
+
+    def open_stream(self, filepath: str) -> BinaryIO:
+        return open(filepath, "rb")
+
+    def open_write(self, filepath: str) -> BinaryIO:
+        return _ReplaceOnCloseFile(filepath)
+
+    def read_range(self, filepath: str, offset: int, size: int) -> bytes:
+        with open(filepath, "rb") as f:
+            f.seek(offset)
+            return f.read(size)
+
+    def get_file_fingerprint(self, filepath: str) -> Optional[str]:
+        stat = os.stat(filepath)
+        return f"{stat.st_size}-{stat.st_mtime_ns}"
+
     def save_file(
         self, data: Union[str, bytes, io.BytesIO], filepath: str, binary: bool
     ) -> None:
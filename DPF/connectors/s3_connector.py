@@ -1,11 +1,26 @@
 import io
-from typing import Union
+from functools import cache
+from typing import Any, BinaryIO, Optional, Union
 
 from fsconnectors import S3Connector as S3Client
 
 from .connector import Connector
 
 
+@cache
+def _get_botocore_client(endpoint_url: str, key: str, secret: str) -> Any:
+    # client is cached per process and is not stored in connector, so connector remains picklable
+    import botocore.session
+
+    session = botocore.session.get_session()
+    return session.create_client(
+        "s3",
+        endpoint_url=endpoint_url,
+        aws_access_key_id=key,
+        aws_secret_access_key=secret
+    )
+
+
 class S3Connector(Connector):
     """
     Class that wraps interaction with S3.
@@ -45,6 +60,28 @@ class S3Connector(Connector):
                 res = f.read()
         return res
 
+    def open_stream(self, filepath: str) -> BinaryIO:
+        stream: BinaryIO = self.s3client.open(self._preprocess_filepath(filepath), mode="rb")
+        return stream
+
+    def open_write(self, filepath: str) -> BinaryIO:
+        # s3fs uploads file by parts (multipart upload) when its buffer is filled
+        stream: BinaryIO = self.s3client.open(self._preprocess_filepath(filepath), mode="wb")
+        return stream
+
+    def read_range(self, filepath: str, offset: int, size: int) -> bytes:
+        with self.s3client.open(self._preprocess_filepath(filepath), mode="rb") as f:
+            f.seek(offset)
+            res: bytes = f.read(size)
+        return res
+
+    def get_file_fingerprint(self, filepath: str) -> Optional[str]:
+        bucket, key = self._preprocess_filepath(filepath).split("/", 1)
+        client = _get_botocore_client(self.endpoint_url, self.key, self.secret)
+        response = client.head_object(Bucket=bucket, Key=key)
+        etag = response["ETag"].strip('"')
+        return f"{response['ContentLength']}-{etag}"
+
     def save_file(
         self, data: Union[str, bytes, io.BytesIO], filepath: str, binary: bool
     ) -> None:
@@ -1,9 +1,15 @@
-from typing import Any, Union
+import queue
+import threading
+from collections.abc import Iterable, Iterator
+from typing import Any, Callable, Optional, TypeVar, Union
 
 from DPF.datatypes import ColumnDataType, FileDataType, ShardedDataType
 from DPF.modalities import ModalityName
 from DPF.types import ModalityToDataMapping
 
+ItemType = TypeVar("ItemType")
+ResultType = TypeVar("ResultType")
+
 
 # default identical preprocessing function for FilesDataset and ShardsDataset
 def identical_preprocess_function(modality2data: ModalityToDataMapping, metadata: dict[str, str]) -> Any:
@@ -24,6 +30,21 @@ def get_paths_columns_to_modality_mapping(
     }
 
 
+def get_lazy_path_columns(
+    datatypes: list[Union[ShardedDataType, FileDataType]],
+    df_columns: list[str]
+) -> dict[str, str]:
+    """Returns mapping from path columns that are not stored in dataframe to columns with file names.
+    Paths of these columns are built from split_name and file name when samples are read
+    """
+    return {
+        datatype.modality.path_column: datatype.modality.sharded_file_name_column
+        for datatype in datatypes
+        if isinstance(datatype, ShardedDataType) and datatype.modality.path_column not in df_columns
+        and datatype.modality.sharded_file_name_column in df_columns
+    }
+
+
 def get_columns_to_modality_mapping(
     datatypes: list[ColumnDataType]
 ) -> dict[str, ModalityName]:
@@ -31,3 +52,107 @@ def get_columns_to_modality_mapping(
         datatype.column_name: datatype.modality.name
         for datatype in datatypes
     }
+
+
+def prefetch_iterator(
+    load_function: Callable[[ItemType], ResultType],
+    items: Iterable[ItemType],
+    depth: int,
+    max_bytes: Optional[int] = None,
+    get_size: Optional[Callable[[ResultType], int]] = None,
+    release_function: Optional[Callable[[ResultType], None]] = None
+) -> Iterator[tuple[ItemType, ResultType]]:
+    """Iterates over items and results of load_function, loading next items in a background thread
+
+    Parameters
+    ----------
+    load_function: Callable[[ItemType], ResultType]
+        Function that loads an item (for example, downloads an archive)
+    items: Iterable[ItemType]
+        Items to load
+    depth: int
+        Maximum number of loaded items waiting in the queue. If 0, items are loaded synchronously
+    max_bytes: Optional[int] = None
+        Maximum total size of loaded items waiting in the queue. Next item is loaded only if the queue
+        has less than max_bytes, so the queue can exceed the limit by the size of one item
+    get_size: Optional[Callable[[ResultType], int]] = None
+        Function that returns size of the loaded item in bytes. Required if max_bytes is set
+    release_function: Optional[Callable[[ResultType], None]] = None
+        Function that releases loaded items that were not consumed (if iteration stopped early)
+
+    Returns
+    -------
+    Iterator[tuple[ItemType, ResultType]]
+        Iterator over items and their loaded results (in the same order as items)
+    """
+    if depth <= 0:
+        for item in items:
+            yield item, load_function(item)
+        return
+
+    assert max_bytes is None or get_size is not None, "get_size should be provided if max_bytes is set"
+    results: queue.Queue[Optional[tuple[Any, Any, int, Optional[Exception]]]] = queue.Queue(maxsize=depth)
+    stop_event = threading.Event()
+    memory_condition = threading.Condition()
+    queued_bytes = 0
+
+    def put(entry: Optional[tuple[Any, Any, int, Optional[Exception]]]) -> bool:
+        while not stop_event.is_set():
+            try:
+                results.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def has_memory() -> bool:
+        return stop_event.is_set() or max_bytes is None or queued_bytes == 0 or queued_bytes < max_bytes
+
+    def producer() -> None:
+        nonlocal queued_bytes
+        try:
+            for item in items:
+                # size of the item is known only after loading, so memory is checked before it is loaded
+                with memory_condition:
+                    memory_condition.wait_for(has_memory)
+                if stop_event.is_set():
+                    return
+                result = load_function(item)
+                size = get_size(result) if get_size is not None else 0
+                with memory_condition:
+                    queued_bytes += size
+                if not put((item, result, size, None)):
+                    if release_function is not None:
+                        release_function(result)
+                    return
+        except Exception as err:
+            put((None, None, 0, err))
+            return
+        put(None)
+
+    thread = threading.Thread(target=producer, daemon=True)
+    thread.start()
+    try:
+        while True:
+            entry = results.get()
+            if entry is None:
+                break
+            item, result, size, error = entry
+            if error is not None:
+                raise error
+            with memory_condition:
+                queued_bytes -= size
+                memory_condition.notify_all()
+            yield item, result
+    finally:
+        stop_event.set()
+        with memory_condition:
+            memory_condition.notify_all()
+        # release loaded items that were not consumed
+        while True:
+            try:
+                entry = results.get_nowait()
+            except queue.Empty:
+                break
+            if entry is not None and entry[3] is None and release_function is not None:
+                release_function(entry[1])
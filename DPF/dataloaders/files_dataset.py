@@ -6,9 +6,11 @@ from torch.utils.data import Dataset
 from DPF.connectors import Connector
 from DPF.dataloaders.dataloader_utils import (
     get_columns_to_modality_mapping,
+    get_lazy_path_columns,
     get_paths_columns_to_modality_mapping,
     identical_preprocess_function,
 )
+from DPF.dataloaders.sample_table import SampleTable
 from DPF.datatypes import ColumnDataType, FileDataType, ShardedDataType
 from DPF.types import ModalityToDataMapping
 
@@ -26,7 +28,9 @@ class FilesDataset(Dataset[tuple[bool, Any]]):
         metadata_columns: Optional[list[str]] = None,
         preprocess_function: Callable[[ModalityToDataMapping, dict[str, str]], Any] = identical_preprocess_function,
         # TODO(review) - на ошибке надо выбрасывать ошибку, а не возвращать None, и в дальнейшем эту ошибку обрабатывать прикладом, использующим этот класс
-        return_none_on_error: bool = False
+        return_none_on_error: bool = False,
+        zero_copy: bool = False,
+        split2path_prefix: Optional[dict[str, str]] = None
     ):
         """
         Parameters
@@ -44,6 +48,13 @@ class FilesDataset(Dataset[tuple[bool, Any]]):
             and the second argument is mapping from meta_column name to its value.
         return_none_on_error: bool = False
             Whether to return None if error during reading file occurs
+        zero_copy: bool = False
+            Whether to pass files to preprocess_function as read-only buffers (memoryview) instead of bytes.
+            LocalConnector maps files into memory, so file content is not copied.
+            preprocess_function should accept bytes-like objects and should not return these buffers
+        split2path_prefix: Optional[dict[str, str]] = None
+            Mapping from split name to the prefix of paths to files of this shard (for sharded files format).
+            If set and dataframe has file names instead of paths to files, paths are built from prefixes and file names
         """
         self.connector = connector
 
@@ -64,17 +75,36 @@ class FilesDataset(Dataset[tuple[bool, Any]]):
             list(self.path_column2modality.keys()) + list(self.column2modality.keys()) + self.meta_columns
         ))
 
-        self.data_to_iterate = df[self.all_columns].values
+        # path columns that are not stored in dataframe are built from split_name and file name
+        self.split2path_prefix = split2path_prefix or {}
+        self.lazy_path_columns = get_lazy_path_columns(
+            [datatype for datatype in self.datatypes if isinstance(datatype, ShardedDataType)], df.columns.tolist()
+        ) if split2path_prefix is not None else {}
+        self.table_columns = list(dict.fromkeys(
+            [self.lazy_path_columns.get(col, col) for col in self.all_columns]
+            + (['split_name'] if len(self.lazy_path_columns) > 0 else [])
+        ))
+        self._columns_to_drop = [col for col in self.table_columns if col not in self.all_columns]
+
+        self.sample_table = SampleTable(df, self.table_columns)
         self.preprocess_f = preprocess_function
         self.return_none_on_error = return_none_on_error
+        self.zero_copy = zero_copy
+
+    def _read_file(self, filepath: str) -> Union[bytes, memoryview]:
+        if self.zero_copy:
+            return self.connector.read_buffer(filepath)
+        return self.connector.read_file(filepath, binary=True).getvalue()
 
     def __len__(self) -> int:
-        return len(self.data_to_iterate)
+        return len(self.sample_table)
 
     def __getitem__(self, idx: int) -> tuple[bool, Any]:
-        row_sample_data = {
-            self.all_columns[c]: item for c, item in enumerate(self.data_to_iterate[idx])
-        }
+        row_sample_data = dict(zip(self.table_columns, self.sample_table.get_row(idx)))
+        for path_col, file_name_col in self.lazy_path_columns.items():
+            row_sample_data[path_col] = self.split2path_prefix[row_sample_data['split_name']] + row_sample_data[file_name_col]
+        for col in self._columns_to_drop:
+            row_sample_data.pop(col)
         modality2data = {}
         is_ok = True
 
@@ -83,12 +113,12 @@ class FilesDataset(Dataset[tuple[bool, Any]]):
             modality = self.path_column2modality[col]
             if self.return_none_on_error:
                 try:
-                    file_bytes = self.connector.read_file(row_sample_data[col], binary=True).getvalue()
+                    file_bytes = self._read_file(row_sample_data[col])
                 except Exception:
                     file_bytes = None
                     is_ok = False
             else:
-                file_bytes = self.connector.read_file(row_sample_data[col], binary=True).getvalue()
+                file_bytes = self._read_file(row_sample_data[col])
             modality2data[modality] = file_bytes
 
         # read data from columns
@@ -0,0 +1,86 @@
+from typing import Any, Union
+
+import numpy as np
+import pandas as pd
+
+
+class NumericColumn:
+    """Column of numbers or booleans stored in a numpy array"""
+
+    def __init__(self, values: np.ndarray[Any, Any]):
+        self.values = np.ascontiguousarray(values)
+
+    def __getitem__(self, idx: int) -> Any:
+        return self.values[idx].item()
+
+
+class StringColumn:
+    """Column of strings stored as concatenated utf-8 data and offsets of strings"""
+
+    def __init__(self, strings: list[str], null_mask: np.ndarray[Any, Any], null_value: Any):
+        encoded = [s.encode(errors="surrogatepass") for s in strings]
+        self.offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)), out=self.offsets[1:])
+        self.data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        self.null_mask = null_mask
+        self.null_value = null_value
+
+    def __getitem__(self, idx: int) -> Any:
+        if self.null_mask[idx]:
+            return self.null_value
+        return self.data[self.offsets[idx]:self.offsets[idx+1]].tobytes().decode(errors="surrogatepass")
+
+
+class ObjectColumn:
+    """Column of arbitrary python objects (fallback for columns that can not be stored compactly)"""
+
+    def __init__(self, values: np.ndarray[Any, Any]):
+        self.values = values
+
+    def __getitem__(self, idx: int) -> Any:
+        return self.values[idx]
+
+
+class SampleTable:
+    """
+    Compact storage of dataframe columns for dataloaders.
+    Numbers and strings are stored in contiguous numpy arrays instead of python objects,
+    so forked dataloader workers do not touch refcounts and the table is not copied on write
+    """
+
+    def __init__(self, df: pd.DataFrame, columns: list[str]):
+        """
+        Parameters
+        ----------
+        df: pd.DataFrame
+            Dataframe with samples
+        columns: list[str]
+            Columns to store
+        """
+        self.columns = columns
+        self.columns_data = [self._encode_column(df[col]) for col in columns]
+        self.total_rows = len(df)
+
+    @staticmethod
+    def _encode_column(series: pd.Series) -> Union[NumericColumn, StringColumn, ObjectColumn]:
+        if isinstance(series.dtype, np.dtype) and series.dtype.kind in "biuf":
+            return NumericColumn(series.to_numpy())
+
+        values = series.to_numpy(dtype=object)
+        null_mask = pd.isna(values)
+        strings = [value if not is_null else "" for value, is_null in zip(values, null_mask)]
+        if not all(isinstance(value, str) for value in strings):
+            return ObjectColumn(values)
+        null_value = values[null_mask][0] if null_mask.any() else None
+        return StringColumn(strings, null_mask, null_value)
+
+    def __len__(self) -> int:
+        return self.total_rows
+
+    def get_row(self, idx: int) -> tuple[Any, ...]:
+        """Returns values of the row in the order of columns"""
+        return tuple(column[idx] for column in self.columns_data)
+
+    def get_rows(self, start: int, end: int) -> list[tuple[Any, ...]]:
+        """Returns values of rows from start to end (not including)"""
+        return [self.get_row(idx) for idx in range(start, end)]
@@ -1,9 +1,14 @@
-import itertools
+import io
+import multiprocessing
 import os
 import tarfile
+from collections import defaultdict
 from collections.abc import Iterator
+from dataclasses import dataclass
+from functools import partial
 from typing import Any, Callable, Optional, Union
 
+import numpy as np
 import pandas as pd
 import torch
 from torch.utils.data import IterableDataset
@@ -11,11 +16,34 @@ from torch.utils.data import IterableDataset
 from DPF.connectors import Connector
 from DPF.dataloaders.dataloader_utils import (
     get_columns_to_modality_mapping,
+    get_lazy_path_columns,
     get_paths_columns_to_modality_mapping,
     identical_preprocess_function,
+    prefetch_iterator,
 )
+from DPF.dataloaders.sample_table import SampleTable
 from DPF.datatypes import ColumnDataType, ShardedDataType
 from DPF.types import ModalityToDataMapping
+from DPF.utils.tar_index import (
+    TarIndex,
+    build_tar_index,
+    read_tar_index,
+    read_tar_member,
+)
+
+# path to archive and range of samples of the shard: [start, end)
+ShardPart = tuple[str, int, int]
+# maximum number of dataloader workers that take shard parts from one queue
+MAX_QUEUE_WORKERS = 1024
+
+
+@dataclass
+class OpenedShard:
+    """Part of shard reading that can be done ahead: archive, its index or a range of its bytes"""
+    tar_index: Optional[TarIndex] = None
+    tar: Optional[tarfile.TarFile] = None
+    # bytes of archive that contain all files of the shard part, offsets in tar_index are relative to it
+    range_data: Optional[bytes] = None
 
 
 class ShardsDataset(IterableDataset[tuple[bool, Any]]):
@@ -31,7 +59,13 @@ class ShardsDataset(IterableDataset[tuple[bool, Any]]):
         datatypes: list[Union[ShardedDataType, ColumnDataType]],
         metadata_columns: Optional[list[str]] = None,
         preprocess_function: Callable[[ModalityToDataMapping, dict[str, str]], Any] = identical_preprocess_function,
-        return_none_on_error: bool = False
+        return_none_on_error: bool = False,
+        sparse_read_threshold: float = 0.2,
+        streaming: bool = False,
+        zero_copy: bool = False,
+        prefetch_shards: int = 0,
+        prefetch_max_bytes: Optional[int] = None,
+        samples_per_part: Optional[int] = None
     ):
         """
         Parameters
@@ -39,7 +73,8 @@ class ShardsDataset(IterableDataset[tuple[bool, Any]]):
         connector: Connector
             Object of a DPF.connectors.Connector type
         df: pd.DataFrame
-            Dataset dataframe from DatasetProcessor
+            Dataset dataframe from DatasetProcessor. If dataframe has file names instead of paths to files,
+            paths are built from archive paths and file names
         split2archive_path: Dict[str, str]
             Mapping of the shard index (e.g. split index) to the tar path
         datatypes: List[Union[ShardedDataType, FileDataType, ColumnDataType]]
@@ -51,6 +86,28 @@ class ShardsDataset(IterableDataset[tuple[bool, Any]]):
             and the second argument is mapping from meta_column name to its value.
         return_none_on_error: bool = False
             Whether to return None if error during reading file occurs
+        sparse_read_threshold: float = 0.2
+            If an archive has an index sidecar and the files to read take less than this fraction
+            of the archive, files are read by ranged reads instead of reading the whole archive.
+            Use 0 to always read whole archives
+        streaming: bool = False
+            Whether to read archives sequentially as a stream instead of loading the whole archive in memory.
+            Samples are yielded in the order of their files in archive
+        zero_copy: bool = False
+            Whether to pass files to preprocess_function as read-only memoryview slices of the archive
+            instead of bytes (archives are memory-mapped by LocalConnector).
+            preprocess_function should accept bytes-like objects and should not return these buffers
+        prefetch_shards: int = 0
+            Number of next archives that each worker reads in a background thread while the current one is processed.
+            Hides the latency of remote storages. Archives read in streaming mode are not prefetched
+        prefetch_max_bytes: Optional[int] = None
+            Maximum total size of prefetched archives in each worker. Next archive is read only while
+            prefetched archives take less than this size, so the limit can be exceeded by one archive
+        samples_per_part: Optional[int] = None
+            If set, shards with more samples are split into parts of this size that are processed by different workers.
+            If archive has an index sidecar, samples are split in the order of their files in archive
+            and files of a part are read with one ranged read,
+            otherwise every part reads the whole archive (efficient only for local archives)
         """
         super().__init__()
         self.connector = connector
@@ -70,62 +127,342 @@ class ShardsDataset(IterableDataset[tuple[bool, Any]]):
             list(self.path_column2modality.keys()) + list(self.column2modality.keys()) + self.meta_columns
         ))
 
-        #
-        self.tar_to_data = df.groupby("split_name").apply(
-            lambda x: [tuple(v.values()) for v in x[self.all_columns].to_dict("records")]
+        # path columns that are not stored in dataframe are built from archive path and file name
+        self.lazy_path_columns = get_lazy_path_columns(
+            [datatype for datatype in self.datatypes if isinstance(datatype, ShardedDataType)], df.columns.tolist()
+        )
+        self.table_columns = list(dict.fromkeys(self.lazy_path_columns.get(col, col) for col in self.all_columns))
+        self._file_name_columns_to_drop = [
+            col for col in self.lazy_path_columns.values() if col not in self.all_columns
+        ]
+
+        # samples are stored grouped by shards in a compact table, shard_ranges maps archive to its rows
+        split_codes, split_names = pd.factorize(df["split_name"], sort=True)
+        order = np.argsort(split_codes, kind="stable")
+        shard_ends = np.cumsum(np.bincount(split_codes, minlength=len(split_names)))
+        self.shard_ranges: dict[str, tuple[int, int]] = {
+            split2archive_path[split_name]: (int(end - count), int(end))
+            for split_name, end, count in zip(split_names, shard_ends, np.diff(shard_ends, prepend=0))
+        }
+        if samples_per_part is not None:
+            self._sort_split_shards_by_offset(df, order, samples_per_part)
+        self.sample_table = SampleTable(df[self.table_columns].take(order), self.table_columns)
+        # workers take shard parts from the shared queue, largest parts first
+        self.shard_parts_queue = sorted(
+            self._split_shards(samples_per_part), key=lambda part: part[2] - part[1], reverse=True
         )
-        self.tar_to_data.index = [split2archive_path[i] for i in self.tar_to_data.index]
+        # state of the queue shared between workers: [iteration seed, iteration number, next part index]
+        # and flags of workers that have started the current iteration
+        self._queue_state = multiprocessing.Array('q', 3)
+        self._queue_workers = multiprocessing.Array('b', MAX_QUEUE_WORKERS, lock=False)
 
         self.total_samples = len(df)
         self.preprocess_f = preprocess_function
         self.return_none_on_error = return_none_on_error
+        self.sparse_read_threshold = sparse_read_threshold
+        self.streaming = streaming
+        self.zero_copy = zero_copy
+        self.prefetch_shards = prefetch_shards
+        self.prefetch_max_bytes = prefetch_max_bytes
 
-    def __len__(self) -> int:
-        return self.total_samples
+    def _sort_split_shards_by_offset(self, df: pd.DataFrame, order: np.ndarray[Any, Any], samples_per_part: int) -> None:
+        """Sorts rows of shards that are split into parts by offsets of their files in archive,
+        so files of a part are close to each other and are read with a short ranged read
+        """
+        if len(self.path_column2modality) == 0:
+            return
+        path_column = list(self.path_column2modality.keys())[0]
+        file_name_column = self.lazy_path_columns.get(path_column, path_column)
+        for tar_path, (shard_start, shard_end) in self.shard_ranges.items():
+            if shard_end - shard_start <= samples_per_part:
+                continue
+            tar_index = read_tar_index(self.connector, tar_path)
+            if tar_index is None:
+                continue
+            shard_order = order[shard_start:shard_end]
+            file_names = df[file_name_column].take(shard_order)
+            # files that are not in archive are placed at the end of the shard
+            missing_offset = max((offset for offset, _ in tar_index.values()), default=0) + 1
+            offsets = [tar_index.get(os.path.basename(name), (missing_offset, 0))[0] for name in file_names]
+            order[shard_start:shard_end] = shard_order[np.argsort(offsets, kind="stable")]
 
-    def __iter__(self) -> Iterator[tuple[bool, Any]]:
-        worker_info = torch.utils.data.get_worker_info()
-        worker_total_num = worker_info.num_workers if worker_info is not None else None
-        worker_id = worker_info.id if worker_info is not None else None
+    def _split_shards(self, samples_per_part: Optional[int]) -> list[ShardPart]:
+        parts = []
+        for tar_path, (shard_start, shard_end) in self.shard_ranges.items():
+            shard_size = shard_end - shard_start
+            part_size = samples_per_part or shard_size
+            for start in range(0, shard_size, part_size):
+                parts.append((tar_path, start, min(start + part_size, shard_size)))
+        return parts
 
-        for tar_path in itertools.islice(
-            self.tar_to_data.keys(), worker_id, None, worker_total_num
-        ):
-            data_all = self.tar_to_data[tar_path]
-            tar_bytes = self.connector.read_file(tar_path, binary=True)
-            tar = tarfile.open(fileobj=tar_bytes, mode="r")
-            for data in data_all:
-                is_ok = True
-                row_sample_data = {self.all_columns[i]: item for i, item in enumerate(data)}
-                modality2data = {}
-
-                # read data from files
-                for col in self.path_column2modality.keys():
-                    modality = self.path_column2modality[col]
-                    filename = os.path.basename(row_sample_data[col])
-                    if self.return_none_on_error:
-                        try:
-                            file_bytes = tar.extractfile(filename).read()  # type: ignore
-                        except Exception:
-                            file_bytes = None
-                            is_ok = False
-                    else:
-                        file_bytes = tar.extractfile(filename).read()  # type: ignore
-                    modality2data[modality] = file_bytes
-
-                # read data from columns
-                for col in self.column2modality.keys():
-                    modality = self.column2modality[col]
-                    modality2data[modality] = row_sample_data[col]
-
-                preprocessed_data = None
-                if self.return_none_on_error and is_ok:
+    def _get_shard_data(self, shard_part: ShardPart) -> list[tuple[Any, ...]]:
+        tar_path, start, end = shard_part
+        shard_start = self.shard_ranges[tar_path][0]
+        return self.sample_table.get_rows(shard_start + start, shard_start + end)
+
+    def _get_filenames(self, data_all: list[tuple[Any, ...]]) -> list[str]:
+        columns_ids = [
+            self.table_columns.index(self.lazy_path_columns.get(col, col)) for col in self.path_column2modality.keys()
+        ]
+        return [os.path.basename(data[i]) for data in data_all for i in columns_ids]
+
+    def _get_row_sample_data(self, tar_path: str, data: tuple[Any, ...]) -> dict[str, Any]:
+        row_sample_data = dict(zip(self.table_columns, data))
+        for path_col, file_name_col in self.lazy_path_columns.items():
+            row_sample_data[path_col] = tar_path + '/' + row_sample_data[file_name_col]
+        for col in self._file_name_columns_to_drop:
+            row_sample_data.pop(col)
+        return row_sample_data
+
+    def _is_sparse_read(self, tar_index: TarIndex, data_all: list[tuple[Any, ...]]) -> bool:
+        archive_size = max((offset + size for offset, size in tar_index.values()), default=0)
+        size_to_read = sum(tar_index.get(filename, (0, 0))[1] for filename in self._get_filenames(data_all))
+        return size_to_read < archive_size * self.sparse_read_threshold
+
+    def _read_archive_range(self, tar_path: str, tar_index: TarIndex, data_all: list[tuple[Any, ...]]) -> OpenedShard:
+        members = [tar_index[filename] for filename in self._get_filenames(data_all) if filename in tar_index]
+        if len(members) == 0:
+            return OpenedShard(tar_index={}, range_data=b"")
+        range_start = min(offset for offset, _ in members)
+        range_end = max(offset + size for offset, size in members)
+        range_data = self.connector.read_range(tar_path, range_start, range_end - range_start)
+        range_index = {
+            name: (offset - range_start, size) for name, (offset, size) in tar_index.items()
+            if offset >= range_start and offset + size <= range_end
+        }
+        return OpenedShard(tar_index=range_index, range_data=range_data)
+
+    def _process_sample(
+        self,
+        row_sample_data: dict[str, Any],
+        modality2data: ModalityToDataMapping,
+        is_ok: bool
+    ) -> tuple[bool, Any]:
+        # read data from columns
+        for col in self.column2modality.keys():
+            modality = self.column2modality[col]
+            modality2data[modality] = row_sample_data[col]
+
+        preprocessed_data = None
+        if self.return_none_on_error and is_ok:
+            try:
+                preprocessed_data = self.preprocess_f(modality2data, row_sample_data)
+            except Exception:
+                is_ok = False
+        elif is_ok:
+            preprocessed_data = self.preprocess_f(modality2data, row_sample_data)
+        return is_ok, preprocessed_data
+
+    @staticmethod
+    def _get_tar_buffer(tar: tarfile.TarFile) -> memoryview:
+        fileobj = tar.fileobj
+        if isinstance(fileobj, io.BytesIO):
+            return fileobj.getbuffer()
+        # memory-mapped archive
+        return memoryview(fileobj)  # type: ignore
+
+    @staticmethod
+    def _get_opened_shard_size(opened_shard: OpenedShard) -> int:
+        if opened_shard.range_data is not None:
+            return len(opened_shard.range_data)
+        if opened_shard.tar is None:
+            return 0
+        fileobj = opened_shard.tar.fileobj
+        if isinstance(fileobj, io.BytesIO):
+            return fileobj.getbuffer().nbytes
+        return len(fileobj)  # type: ignore
+
+    @staticmethod
+    def _close_tar(tar: Optional[tarfile.TarFile]) -> None:
+        if tar is not None:
+            tar.close()
+
+    @staticmethod
+    def _extract_member(tar: tarfile.TarFile, filename: str) -> bytes:
+        return tar.extractfile(filename).read()  # type: ignore
+
+    @staticmethod
+    def _read_member_buffer(buffer: memoryview, tar_index: TarIndex, filename: str) -> memoryview:
+        offset, size = tar_index[filename]
+        return buffer[offset:offset+size].toreadonly()
+
+    @staticmethod
+    def _read_member_bytes(data: bytes, tar_index: TarIndex, filename: str) -> bytes:
+        offset, size = tar_index[filename]
+        return data[offset:offset+size]
+
+    def _iterate_shard_samples(
+        self,
+        tar_path: str,
+        data_all: list[tuple[Any, ...]],
+        read_member: Callable[[str], Union[bytes, memoryview]]
+    ) -> Iterator[tuple[bool, Any]]:
+        for data in data_all:
+            is_ok = True
+            row_sample_data = self._get_row_sample_data(tar_path, data)
+            modality2data: ModalityToDataMapping = {}
+
+            # read data from files
+            for col in self.path_column2modality.keys():
+                modality = self.path_column2modality[col]
+                filename = os.path.basename(row_sample_data[col])
+                if self.return_none_on_error:
                     try:
-                        preprocessed_data = self.preprocess_f(modality2data, row_sample_data)
+                        file_bytes = read_member(filename)
                     except Exception:
+                        file_bytes = None
                         is_ok = False
-                elif is_ok:
-                    preprocessed_data = self.preprocess_f(modality2data, row_sample_data)
+                else:
+                    file_bytes = read_member(filename)
+                modality2data[modality] = file_bytes
+
+            yield self._process_sample(row_sample_data, modality2data, is_ok)
+
+    def _iterate_shard_streaming(
+        self,
+        tar_path: str,
+        data_all: list[tuple[Any, ...]]
+    ) -> Iterator[tuple[bool, Any]]:
+        samples = [self._get_row_sample_data(tar_path, data) for data in data_all]
+        # mapping filename in archive to samples (and their columns) that use this file
+        filename2samples: dict[str, list[tuple[int, str]]] = defaultdict(list)
+        for sample_id, row_sample_data in enumerate(samples):
+            for col in self.path_column2modality.keys():
+                filename2samples[os.path.basename(row_sample_data[col])].append((sample_id, col))
 
-                yield is_ok, preprocessed_data
+        # samples are yielded as soon as all their files are read
+        pending_samples: dict[int, ModalityToDataMapping] = {i: {} for i in range(len(samples))}
+        with self.connector.open_stream(tar_path) as stream:
+            tar = tarfile.open(fileobj=stream, mode="r|")
+            for member in tar:
+                if member.name not in filename2samples:
+                    continue
+                file_bytes = tar.extractfile(member).read()  # type: ignore
+                for sample_id, col in filename2samples.pop(member.name):
+                    modality2data = pending_samples[sample_id]
+                    modality2data[self.path_column2modality[col]] = file_bytes
+                    if len(modality2data) == len(self.path_column2modality):
+                        pending_samples.pop(sample_id)
+                        yield self._process_sample(samples[sample_id], modality2data, True)
             tar.close()
+
+        # samples with files that are not presented in archive
+        for sample_id, modality2data in pending_samples.items():
+            is_ok = len(modality2data) == len(self.path_column2modality)
+            if not is_ok and not self.return_none_on_error:
+                missing = [
+                    os.path.basename(samples[sample_id][col]) for col, modality in self.path_column2modality.items()
+                    if modality not in modality2data
+                ]
+                raise KeyError(f"filename {missing[0]} not found in {tar_path}")
+            yield self._process_sample(samples[sample_id], modality2data, is_ok)
+
+    def _open_shard(self, shard_part: ShardPart) -> OpenedShard:
+        """Reads the index, the range or the whole archive of the shard part. This part of reading can be done ahead"""
+        if len(self.path_column2modality) == 0:
+            return OpenedShard()
+
+        tar_path, start, end = shard_part
+        data_all = self._get_shard_data(shard_part)
+        shard_start, shard_end = self.shard_ranges[tar_path]
+        is_split = end - start < shard_end - shard_start
+        tar_index = None
+        if is_split or self.sparse_read_threshold > 0:
+            tar_index = read_tar_index(self.connector, tar_path)
+
+        if tar_index is not None and is_split:
+            # files of the part are read with one ranged read
+            return self._read_archive_range(tar_path, tar_index, data_all)
+        elif tar_index is not None and self._is_sparse_read(tar_index, data_all):
+            return OpenedShard(tar_index=tar_index)
+        elif self.streaming:
+            return OpenedShard()
+        return OpenedShard(tar=self.connector.read_tar(tar_path))
+
+    def _iterate_shard(
+        self,
+        tar_path: str,
+        data_all: list[tuple[Any, ...]],
+        opened_shard: OpenedShard
+    ) -> Iterator[tuple[bool, Any]]:
+        read_member: Callable[[str], Union[bytes, memoryview]]
+        if len(self.path_column2modality) == 0:
+            # no file modalities requested, samples are served from dataframe without reading archive
+            for data in data_all:
+                row_sample_data = self._get_row_sample_data(tar_path, data)
+                yield self._process_sample(row_sample_data, {}, True)
+        elif opened_shard.range_data is not None:
+            assert opened_shard.tar_index is not None
+            if self.zero_copy:
+                read_member = partial(
+                    self._read_member_buffer, memoryview(opened_shard.range_data), opened_shard.tar_index
+                )
+            else:
+                read_member = partial(self._read_member_bytes, opened_shard.range_data, opened_shard.tar_index)
+            yield from self._iterate_shard_samples(tar_path, data_all, read_member)
+        elif opened_shard.tar_index is not None:
+            yield from self._iterate_shard_samples(
+                tar_path, data_all, partial(read_tar_member, self.connector, tar_path, opened_shard.tar_index)
+            )
+        elif opened_shard.tar is None:
+            yield from self._iterate_shard_streaming(tar_path, data_all)
+        else:
+            tar = opened_shard.tar
+            if self.zero_copy:
+                read_member = partial(self._read_member_buffer, self._get_tar_buffer(tar), build_tar_index(tar))
+            else:
+                read_member = partial(self._extract_member, tar)
+            yield from self._iterate_shard_samples(tar_path, data_all, read_member)
+            tar.close()
+
+    def __len__(self) -> int:
+        return self.total_samples
+
+    def _start_queue_iteration(self, worker_info: Any) -> int:
+        """Adds the worker to the current iteration of the shard parts queue or starts a new iteration.
+        Worker starts a new iteration if it belongs to a dataloader iteration with another base seed
+        or if it has already taken parts in the current iteration (next iteration with the same seed)
+
+        Returns
+        -------
+        int
+            Number of the iteration of the queue
+        """
+        assert worker_info.num_workers <= MAX_QUEUE_WORKERS, f"ShardsDataset supports up to {MAX_QUEUE_WORKERS} workers"
+        iteration_seed = worker_info.seed - worker_info.id
+        with self._queue_state.get_lock():
+            if self._queue_state[0] != iteration_seed or self._queue_workers[worker_info.id]:
+                self._queue_state[0] = iteration_seed
+                self._queue_state[1] += 1
+                self._queue_state[2] = 0
+                self._queue_workers[:] = bytes(MAX_QUEUE_WORKERS)
+            self._queue_workers[worker_info.id] = 1
+            return int(self._queue_state[1])
+
+    def _iterate_shard_parts(self, worker_info: Any) -> Iterator[ShardPart]:
+        if worker_info is None:
+            yield from self.shard_parts_queue
+            return
+
+        iteration = self._start_queue_iteration(worker_info)
+        while True:
+            with self._queue_state.get_lock():
+                # workers of a previous iteration (e.g. of an abandoned dataloader iterator) stop taking parts
+                if self._queue_state[1] != iteration:
+                    return
+                part_index = self._queue_state[2]
+                self._queue_state[2] += 1
+            if part_index >= len(self.shard_parts_queue):
+                return
+            yield self.shard_parts_queue[part_index]
+
+    def __iter__(self) -> Iterator[tuple[bool, Any]]:
+        worker_info = torch.utils.data.get_worker_info()
+        for shard_part, opened_shard in prefetch_iterator(
+            self._open_shard, self._iterate_shard_parts(worker_info),
+            depth=self.prefetch_shards,
+            max_bytes=self.prefetch_max_bytes,
+            get_size=self._get_opened_shard_size,
+            release_function=lambda opened_shard: self._close_tar(opened_shard.tar)
+        ):
+            yield from self._iterate_shard(shard_part[0], self._get_shard_data(shard_part), opened_shard)
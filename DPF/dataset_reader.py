@@ -1,8 +1,10 @@
 from functools import partial
-from typing import Optional, Union
+from typing import Any, Optional, Union
 
+import numpy as np
 import pandas as pd
-from tqdm.contrib.concurrent import process_map
+import pyarrow as pa
+from tqdm.contrib.concurrent import process_map, thread_map
 
 from DPF.configs import (
     DatasetConfig,
@@ -12,14 +14,34 @@ from DPF.configs import (
 )
 from DPF.connectors import Connector, LocalConnector
 from DPF.datatypes import FileDataType, ShardedDataType
+from DPF.filter_expression import (
+    FilterExpression,
+    apply_filter_expressions,
+    filter_expressions_to_arrow,
+)
 from DPF.processors import (
     DatasetProcessor,
     FilesDatasetProcessor,
+    ShardedDatasetProcessor,
     ShardedFilesDatasetProcessor,
     ShardsDatasetProcessor,
+    StreamingShardedDatasetProcessor,
 )
 
-from .dataset_reader_utils import get_path_filename, read_and_validate_df
+from .dataset_reader_utils import (
+    MANIFEST_FILENAME,
+    SCHEMA_OVERLAY_FILENAME,
+    apply_schema_overlay,
+    get_datafiles_and_sidecars,
+    get_overlay_source_column,
+    get_path_filename,
+    get_split_name_codes,
+    read_and_validate_df,
+    read_and_validate_table,
+    read_manifest,
+    read_schema_overlay,
+    save_manifest,
+)
 
 
 class DatasetReader:
@@ -50,13 +72,20 @@ class DatasetReader:
         validate_columns: bool = True,
         processes: int = 1,
         progress_bar: bool = False,
+        columns: Optional[list[str]] = None,
+        filters: Optional[list[FilterExpression]] = None,
+        datafile2sidecars: Optional[dict[str, list[str]]] = None,
     ) -> list[tuple[str, pd.DataFrame]]:
         if len(datafiles) == 0:
             raise ValueError("No datafiles in this path")
 
         required_columns = config.user_column_names if validate_columns else None
 
-        worker_co = partial(read_and_validate_df, self.connector, required_columns)
+        worker_co = partial(
+            read_and_validate_df, self.connector, required_columns, columns=columns, filters=filters,
+            datafile2sidecars=datafile2sidecars,
+            key_column=self._get_sidecar_key_column(config) if datafile2sidecars else None
+        )
         paths_dataframes: list[tuple[str, pd.DataFrame]] = process_map(
             worker_co, datafiles,
             max_workers=processes,
@@ -65,34 +94,112 @@ class DatasetReader:
         )
 
         if validate_columns:
-            self._validate_dataframes_columns(config, paths_dataframes)
+            self._validate_dataframes_columns(
+                config, [(path, df.columns.tolist()) for path, df in paths_dataframes]
+            )
         return paths_dataframes
 
+    def _read_and_validate_tables(
+        self,
+        datafiles: list[str],
+        config: DatasetConfig,
+        validate_columns: bool = True,
+        threads: int = 1,
+        progress_bar: bool = False,
+        columns: Optional[list[str]] = None,
+        filters: Optional[list[FilterExpression]] = None,
+        datafile2sidecars: Optional[dict[str, list[str]]] = None,
+    ) -> list[tuple[str, pa.Table]]:
+        if len(datafiles) == 0:
+            raise ValueError("No datafiles in this path")
+
+        required_columns = config.user_column_names if validate_columns else None
+
+        worker_co = partial(
+            read_and_validate_table, self.connector, required_columns, columns=columns, filters=filters,
+            datafile2sidecars=datafile2sidecars,
+            key_column=self._get_sidecar_key_column(config) if datafile2sidecars else None
+        )
+        paths_tables: list[tuple[str, pa.Table]] = thread_map(
+            worker_co, datafiles,
+            max_workers=threads,
+            disable=not progress_bar
+        )
+
+        if validate_columns:
+            self._validate_dataframes_columns(
+                config, [(path, table.column_names) for path, table in paths_tables]
+            )
+        return paths_tables
+
+    @staticmethod
+    def _get_sidecar_key_column(config: DatasetConfig) -> str:
+        # sidecar files are joined with datafiles by file names
+        for datatype in config.datatypes:
+            if isinstance(datatype, ShardedDataType):
+                return datatype.user_basename_column_name
+        raise ValueError("Sidecar files are supported only for sharded datasets")
+
     @staticmethod
     def _validate_dataframes_columns(
         config: DatasetConfig,
-        paths_dataframes: list[tuple[str, pd.DataFrame]],
+        paths_columns: list[tuple[str, list[str]]],
     ) -> None:
         required_columns = config.user_column_names
 
-        column_set = set(paths_dataframes[0][1].columns.tolist())
-        for path, df in paths_dataframes:
-            df_columns = set(df.columns.tolist())
+        column_set = set(paths_columns[0][1])
+        for path, columns in paths_columns:
+            df_columns = set(columns)
 
             for col in required_columns:
                 assert col in df_columns, f'Expected {path} to have "{col}" column'
             assert df_columns == column_set, (
                 f"Dataframe {path} have different columns. "
-                f"Expected {column_set}, got {set(df.columns)}"
+                f"Expected {column_set}, got {df_columns}"
             )
 
+    @staticmethod
+    def _get_columns_to_read(
+        config: DatasetConfig,
+        columns: Optional[list[str]],
+        filters: Optional[list[FilterExpression]] = None
+    ) -> Optional[list[str]]:
+        if columns is None:
+            return None
+        # columns required by config and columns used in filters are always read
+        filter_columns = [f.column for f in filters] if filters else []
+        return list(dict.fromkeys(config.user_column_names + columns + filter_columns))
+
+    @staticmethod
+    def _get_datafile_filters(
+        config: DatasetConfig,
+        filters: Optional[list[FilterExpression]]
+    ) -> Optional[list[FilterExpression]]:
+        if not filters:
+            return None
+        # filters use column names of DatasetProcessor.df, datafiles have column names from config
+        default2user_column = {v: k for k, v in config.user_columns_to_rename.items()}
+        path_columns = {
+            datatype.modality.path_column for datatype in config.datatypes
+            if isinstance(datatype, (ShardedDataType, FileDataType))
+        }
+        datafile_filters = []
+        for f in filters:
+            if f.column in path_columns:
+                raise ValueError(f'Filter on "{f.column}" column can not be applied when reading a dataset')
+            datafile_filters.append(f.rename(default2user_column.get(f.column, f.column)))
+        return datafile_filters
+
     @staticmethod
     def _convert_sharded_columns_to_path_columns(
         split_suffix: str,
         config: Union[ShardedFilesDatasetConfig, ShardsDatasetConfig],
         df: pd.DataFrame
     ) -> pd.DataFrame:
-        split_container_path = config.path.rstrip('/')+'/'+df['split_name']+split_suffix+'/'
+        # prefixes are computed once per shard for categorical split_name
+        split_container_path = df['split_name'].map(
+            lambda split_name: config.path.rstrip('/')+'/'+split_name+split_suffix+'/'
+        ).astype(str)
         cols_to_drop = set()
 
         for datatype in config.datatypes:
@@ -122,35 +229,259 @@ class DatasetReader:
         columns.extend(list(orig_columns))
         return df[columns]
 
+    @staticmethod
+    def _skip_empty_datafiles(paths_data: list[tuple[str, Any]]) -> list[tuple[str, Any]]:
+        # datafiles without rows after filtering are not merged (one is kept to preserve columns)
+        non_empty = [(path, data) for path, data in paths_data if len(data) > 0]
+        return non_empty if len(non_empty) > 0 else paths_data[:1]
+
     @staticmethod
     def _merge_sharded_dataframes(paths_dataframes: list[tuple[str, pd.DataFrame]]) -> pd.DataFrame:
-        for path, df in paths_dataframes:
-            df_name = get_path_filename(path)
-            df.insert(loc=1, column='split_name', value=df_name)
-        return pd.concat([d[1] for d in paths_dataframes], ignore_index=True)
+        df = pd.concat([d[1] for d in paths_dataframes], ignore_index=True)
+        # split_name is stored as categorical column
+        codes, categories = get_split_name_codes(
+            [get_path_filename(path) for path, _ in paths_dataframes], [len(d) for _, d in paths_dataframes]
+        )
+        df.insert(loc=1, column='split_name', value=pd.Categorical.from_codes(codes, categories=categories))
+        return df
+
+    @staticmethod
+    def _merge_sharded_tables(paths_tables: list[tuple[str, pa.Table]]) -> pd.DataFrame:
+        split_names = [get_path_filename(path) for path, _ in paths_tables]
+        codes, categories = get_split_name_codes(split_names, [table.num_rows for _, table in paths_tables])
+        # split_name is stored as dictionary column, it is converted to categorical column
+        dictionary = pa.array(categories, type=pa.string())
+        tables = []
+        start = 0
+        for _, table in paths_tables:
+            split_name_array = pa.DictionaryArray.from_arrays(codes[start:start+table.num_rows], dictionary)
+            tables.append(table.add_column(1, 'split_name', split_name_array))
+            start += table.num_rows
+        try:
+            table = pa.concat_tables(tables, promote_options="permissive")
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # types of columns can not be unified, pandas will store them as objects
+            return pd.concat([t.to_pandas() for t in tables], ignore_index=True)
+        return table.to_pandas()
+
+    def _read_and_merge_dataframes(
+        self,
+        datafiles: list[str],
+        config: Union[ShardedFilesDatasetConfig, ShardsDatasetConfig],
+        validate_columns: bool,
+        workers: int,
+        progress_bar: bool,
+        backend: str,
+        columns: Optional[list[str]] = None,
+        filters: Optional[list[FilterExpression]] = None,
+        datafile2sidecars: Optional[dict[str, list[str]]] = None
+    ) -> pd.DataFrame:
+        assert backend in ["pandas", "arrow"], f"Unknown backend: {backend}"
+        if backend == "arrow":
+            paths_tables = self._read_and_validate_tables(
+                datafiles, config, validate_columns, workers, progress_bar, columns, filters, datafile2sidecars
+            )
+            return self._merge_sharded_tables(self._skip_empty_datafiles(paths_tables))
+
+        paths_dataframes = self._read_and_validate_dataframes(
+            datafiles, config, validate_columns, workers, progress_bar, columns, filters, datafile2sidecars
+        )
+        return self._merge_sharded_dataframes(self._skip_empty_datafiles(paths_dataframes))
+
+    def _get_datafile_fingerprint(self, path: str, datafile2sidecars: dict[str, list[str]]) -> Optional[str]:
+        # datafile is changed if its sidecar files are changed
+        fingerprints = []
+        for filepath in [path] + datafile2sidecars.get(path, []):
+            fingerprint = self.connector.get_file_fingerprint(filepath)
+            if fingerprint is None:
+                return None
+            fingerprints.append(fingerprint)
+        return ';'.join(fingerprints)
+
+    def _read_and_merge_with_manifest(
+        self,
+        dataset_path: str,
+        datafiles: list[str],
+        config: Union[ShardedFilesDatasetConfig, ShardsDatasetConfig],
+        validate_columns: bool,
+        workers: int,
+        progress_bar: bool,
+        backend: str,
+        columns: Optional[list[str]] = None,
+        filters: Optional[list[FilterExpression]] = None,
+        datafile2sidecars: Optional[dict[str, list[str]]] = None
+    ) -> pd.DataFrame:
+        manifest_path = self.connector.join(dataset_path, MANIFEST_FILENAME)
+        split_names = [get_path_filename(path) for path in datafiles]
+        fingerprints: list[Optional[str]] = thread_map(
+            partial(self._get_datafile_fingerprint, datafile2sidecars=datafile2sidecars or {}), datafiles,
+            max_workers=workers,
+            disable=True
+        )
+        manifest = read_manifest(self.connector, manifest_path)
+        manifest_table, manifest_fingerprints = manifest if manifest is not None else (None, {})
+
+        # only datafiles that are new or changed since the manifest was saved are read
+        unchanged_splits = {
+            split_name for split_name, fingerprint in zip(split_names, fingerprints)
+            if fingerprint is not None and manifest_fingerprints.get(split_name) == fingerprint
+        }
+        datafiles_to_read = [
+            path for path, split_name in zip(datafiles, split_names) if split_name not in unchanged_splits
+        ]
+
+        new_fingerprints = {
+            split_name: fingerprint for split_name, fingerprint in zip(split_names, fingerprints)
+            if fingerprint is not None
+        }
+        update_manifest = new_fingerprints != manifest_fingerprints
+
+        paths_dataframes = []
+        if manifest_table is not None and len(unchanged_splits) > 0:
+            if filters and not update_manifest:
+                manifest_table = manifest_table.filter(filter_expressions_to_arrow(filters))
+            if columns is not None and not update_manifest:
+                manifest_table = manifest_table.select([
+                    col for col in manifest_table.column_names if col == 'split_name' or col in columns
+                ])
+            manifest_df = manifest_table.to_pandas()
+            paths_dataframes.append((manifest_path, manifest_df[manifest_df['split_name'].isin(unchanged_splits)]))
+        if len(datafiles_to_read) > 0:
+            # all rows and columns are read, because the manifest stores whole datafiles
+            df_new = self._read_and_merge_dataframes(
+                datafiles_to_read, config, validate_columns, workers, progress_bar, backend,
+                datafile2sidecars=datafile2sidecars
+            )
+            paths_dataframes.append((dataset_path, df_new))
+
+        if validate_columns:
+            self._validate_dataframes_columns(config, [
+                (path, [col for col in df.columns if col != 'split_name' and (columns is None or col in columns)])
+                for path, df in paths_dataframes
+            ])
+        df = pd.concat([df for _, df in paths_dataframes], ignore_index=True)
+        if len(paths_dataframes) > 1:
+            # rows are ordered by datafiles as if all datafiles were read
+            split_order = {split_name: i for i, split_name in enumerate(split_names)}
+            df = df.iloc[np.argsort(df['split_name'].map(split_order).to_numpy(), kind='stable')]
+            df = df.reset_index(drop=True)
+
+        if update_manifest:
+            save_manifest(self.connector, manifest_path, df, new_fingerprints)
+        if filters:
+            df = apply_filter_expressions(df, filters).reset_index(drop=True)
+        if columns is not None:
+            df = df[[col for col in df.columns if col == 'split_name' or col in columns]]
+        return df
 
     def _post_process_sharded_dataframes(
         self,
         split_suffix: str,
         config: Union[ShardedFilesDatasetConfig, ShardsDatasetConfig],
-        paths_dataframes: list[tuple[str, pd.DataFrame]]
+        df: pd.DataFrame,
+        lazy_paths: bool = False
     ) -> pd.DataFrame:
-        df = self._merge_sharded_dataframes(paths_dataframes)
-
         columns_to_rename = config.user_columns_to_rename
         if len(columns_to_rename) > 0:
             df.rename(columns=columns_to_rename, inplace=True)
 
-        df = self._convert_sharded_columns_to_path_columns(split_suffix, config, df)
+        df['split_name'] = df['split_name'].astype('category').cat.remove_unused_categories()
+        if not lazy_paths:
+            df = self._convert_sharded_columns_to_path_columns(split_suffix, config, df)
         df = self._rearrange_dataframe_columns(df, config)
         return df
 
+    def _read_sharded_dataframe(
+        self,
+        config: Union[ShardedFilesDatasetConfig, ShardsDatasetConfig],
+        datafiles: list[str],
+        datafile2sidecars: Optional[dict[str, list[str]]],
+        validate_columns: bool,
+        workers: int,
+        progress_bar: bool,
+        backend: str,
+        use_manifest: bool,
+        columns: Optional[list[str]],
+        filters: Optional[list[FilterExpression]]
+    ) -> pd.DataFrame:
+        dataset_path = config.path.rstrip("/")
+        # columns can be renamed or deleted in the schema overlay without changing datafiles
+        overlay_operations = read_schema_overlay(
+            self.connector, self.connector.join(dataset_path, SCHEMA_OVERLAY_FILENAME)
+        )
+        datafile_filters = self._get_datafile_filters(config, filters)
+        if len(overlay_operations) > 0:
+            if columns is not None:
+                source_columns = [get_overlay_source_column(col, overlay_operations) for col in columns]
+                columns = [col for col in source_columns if col is not None]
+            if datafile_filters is not None:
+                datafile_filters = [
+                    f.rename(get_overlay_source_column(f.column, overlay_operations) or f.column)
+                    for f in datafile_filters
+                ]
+
+        columns_to_read = self._get_columns_to_read(config, columns, datafile_filters)
+        if use_manifest:
+            df = self._read_and_merge_with_manifest(
+                dataset_path, datafiles, config, validate_columns, workers, progress_bar, backend,
+                columns_to_read, datafile_filters, datafile2sidecars
+            )
+        else:
+            df = self._read_and_merge_dataframes(
+                datafiles, config, validate_columns, workers, progress_bar, backend,
+                columns_to_read, datafile_filters, datafile2sidecars
+            )
+        return apply_schema_overlay(df, overlay_operations)
+
+    def _list_shards_datafiles(self, config: ShardsDatasetConfig) -> tuple[list[str], dict[str, list[str]]]:
+        datafiles_ext_dot = '.' + config.datafiles_ext.lstrip(".")
+        archive_ext_dot = '.' + config.archives_ext.lstrip(".")
+
+        filepaths = self.connector.listdir(config.path.rstrip("/"))
+        datafiles, datafile2sidecars = get_datafiles_and_sidecars(filepaths, config.datafiles_ext)
+        archive_paths = [p for p in filepaths if p.endswith(archive_ext_dot)]
+        if len(datafiles) == 0:
+            raise ValueError("No datafiles in this path")
+
+        # validate paths
+        table_paths_set = set(datafiles)
+        archive_paths_set = set(archive_paths)
+        for filepath in table_paths_set:
+            assert filepath.replace(datafiles_ext_dot, archive_ext_dot) in archive_paths_set, \
+                f"File {filepath} has not associated archive"
+        for filepath in archive_paths_set:
+            assert filepath.replace(archive_ext_dot, datafiles_ext_dot) in table_paths_set, \
+                f"Archive {filepath} has not associated data file"
+        return datafiles, datafile2sidecars
+
+    def _list_sharded_files_datafiles(
+        self,
+        config: ShardedFilesDatasetConfig
+    ) -> tuple[list[str], dict[str, list[str]]]:
+        datafiles_ext = config.datafiles_ext.lstrip(".")
+
+        filepaths = self.connector.listdir(config.path.rstrip("/"))
+        datafiles, datafile2sidecars = get_datafiles_and_sidecars(filepaths, datafiles_ext)
+        if len(datafiles) == 0:
+            raise ValueError("No datafiles in this path")
+
+        # validate paths
+        for filepath in set(datafiles):
+            assert filepath.replace('.'+datafiles_ext, '') in filepaths, \
+                f"File {filepath} has not associated folder"
+        return datafiles, datafile2sidecars
+
     def read_shards(
         self,
         config: ShardsDatasetConfig,
         validate_columns: bool = True,
         workers: int = 1,
         progress_bar: bool = True,
+        backend: str = "pandas",
+        use_manifest: bool = False,
+        columns: Optional[list[str]] = None,
+        filters: Optional[list[FilterExpression]] = None,
+        lazy_paths: bool = False,
     ) -> ShardsDatasetProcessor:
         """Creates ShardsDatasetProcessor dataset
 
@@ -161,44 +492,43 @@ class DatasetReader:
         validate_columns: bool = True
             Whether to check if columns in different csvs are matched
         workers: int = 1
-            Number of parallel processes
+            Number of parallel processes (threads for "arrow" backend)
         progress_bar: bool = True
             Whether to display the progress bar
+        backend: str = "pandas"
+            Backend to read datafiles. "pandas" reads datafiles with pandas in parallel processes,
+            "arrow" reads datafiles with pyarrow in parallel threads and merges them into one Arrow table
+        use_manifest: bool = False
+            Whether to use the manifest of the dataset: a file with metadata of all datafiles that is saved
+            in the dataset folder. Only new and changed datafiles are read, the manifest is updated if needed
+        columns: Optional[list[str]] = None
+            Columns of datafiles to read. Columns required by config and split columns are always read.
+            All columns are read if None
+        filters: Optional[list[FilterExpression]] = None
+            Conditions on columns that rows of the dataset should match. Conditions are applied
+            to every datafile before merging, parquet row groups are skipped using statistics
+        lazy_paths: bool = False
+            Whether to store only file names (e.g. image_name column) in dataframe instead of full paths to files
+            (e.g. image_path column). Paths are built only when files are read, it saves memory for large datasets
 
         Returns
         -------
         ShardsDatasetProcessor
             Instance of ShardsDatasetProcessor dataset
         """
-        dataset_path = config.path.rstrip("/")
-        datafiles_ext_dot = '.' + config.datafiles_ext.lstrip(".")
         archive_ext_dot = '.' + config.archives_ext.lstrip(".")
+        datafiles, datafile2sidecars = self._list_shards_datafiles(config)
 
-        filepaths = self.connector.listdir(dataset_path)
-        datafiles = [p for p in filepaths if p.endswith(datafiles_ext_dot)]
-        archive_paths = [p for p in filepaths if p.endswith(archive_ext_dot)]
-        if len(datafiles) == 0:
-            raise ValueError("No datafiles in this path")
-
-        # validate paths
-        table_paths_set = set(datafiles)
-        archive_paths_set = set(archive_paths)
-        for filepath in table_paths_set:
-            assert filepath.replace(datafiles_ext_dot, archive_ext_dot) in archive_paths_set, \
-                f"File {filepath} has not associated archive"
-        for filepath in archive_paths_set:
-            assert filepath.replace(archive_ext_dot, datafiles_ext_dot) in table_paths_set, \
-                f"Archive {filepath} has not associated data file"
-        #
-
-        paths_dataframes = self._read_and_validate_dataframes(
-            datafiles, config, validate_columns, workers, progress_bar,
+        df = self._read_sharded_dataframe(
+            config, datafiles, datafile2sidecars, validate_columns, workers, progress_bar, backend,
+            use_manifest, columns, filters
         )
-        df = self._post_process_sharded_dataframes(archive_ext_dot, config, paths_dataframes)
+        df = self._post_process_sharded_dataframes(archive_ext_dot, config, df, lazy_paths)
         processor = ShardsDatasetProcessor(
             connector=self.connector,
             df=df,
-            config=config
+            config=config,
+            datafile2sidecars=datafile2sidecars
         )
         return processor
 
@@ -208,6 +538,11 @@ class DatasetReader:
         validate_columns: bool = True,
         workers: int = 1,
         progress_bar: bool = True,
+        backend: str = "pandas",
+        use_manifest: bool = False,
+        columns: Optional[list[str]] = None,
+        filters: Optional[list[FilterExpression]] = None,
+        lazy_paths: bool = False,
     ) -> ShardedFilesDatasetProcessor:
         """Creates ShardedFilesDatasetProcessor dataset
 
@@ -218,44 +553,50 @@ class DatasetReader:
         validate_columns: bool = True
             Whether to check if columns in different csvs are matched
         workers: int = 1
-            Number of parallel processes
+            Number of parallel processes (threads for "arrow" backend)
         progress_bar: bool = True
             Whether to display the progress bar
+        backend: str = "pandas"
+            Backend to read datafiles. "pandas" reads datafiles with pandas in parallel processes,
+            "arrow" reads datafiles with pyarrow in parallel threads and merges them into one Arrow table
+        use_manifest: bool = False
+            Whether to use the manifest of the dataset: a file with metadata of all datafiles that is saved
+            in the dataset folder. Only new and changed datafiles are read, the manifest is updated if needed
+        columns: Optional[list[str]] = None
+            Columns of datafiles to read. Columns required by config and split columns are always read.
+            All columns are read if None
+        filters: Optional[list[FilterExpression]] = None
+            Conditions on columns that rows of the dataset should match. Conditions are applied
+            to every datafile before merging, parquet row groups are skipped using statistics
+        lazy_paths: bool = False
+            Whether to store only file names (e.g. image_name column) in dataframe instead of full paths to files
+            (e.g. image_path column). Paths are built only when files are read, it saves memory for large datasets
 
         Returns
         -------
         ShardedFilesDatasetProcessor
             Instance of ShardedFilesDatasetProcessor dataset
         """
-        dataset_path = config.path.rstrip("/")
-        datafiles_ext = config.datafiles_ext.lstrip(".")
-
-        filepaths = self.connector.listdir(dataset_path)
-        datafiles = [p for p in filepaths if p.endswith('.'+datafiles_ext)]
-        if len(datafiles) == 0:
-            raise ValueError("No datafiles in this path")
-
-        # validate paths
-        table_paths_set = set(datafiles)
-        for filepath in table_paths_set:
-            assert filepath.replace('.'+datafiles_ext, '') in filepaths, \
-                f"File {filepath} has not associated folder"
-        #
+        datafiles, datafile2sidecars = self._list_sharded_files_datafiles(config)
 
-        paths_dataframes = self._read_and_validate_dataframes(
-            datafiles, config, validate_columns, workers, progress_bar,
+        df = self._read_sharded_dataframe(
+            config, datafiles, datafile2sidecars, validate_columns, workers, progress_bar, backend,
+            use_manifest, columns, filters
         )
-        df = self._post_process_sharded_dataframes('', config, paths_dataframes)
+        df = self._post_process_sharded_dataframes('', config, df, lazy_paths)
         processor = ShardedFilesDatasetProcessor(
             connector=self.connector,
             df=df,
-            config=config
+            config=config,
+            datafile2sidecars=datafile2sidecars
         )
         return processor
 
     def read_files(
         self,
         config: FilesDatasetConfig,
+        columns: Optional[list[str]] = None,
+        filters: Optional[list[FilterExpression]] = None,
     ) -> FilesDatasetProcessor:
         """Creates FilesDatasetProcessor dataset
 
@@ -263,6 +604,11 @@ class DatasetReader:
         ----------
         config: FilesDatasetConfig
             Config of FilesDatasetConfig type
+        columns: Optional[list[str]] = None
+            Columns of the table to read. Columns required by config are always read.
+            All columns are read if None
+        filters: Optional[list[FilterExpression]] = None
+            Conditions on columns that rows of the dataset should match
 
         Returns
         -------
@@ -270,12 +616,13 @@ class DatasetReader:
             Instance of FilesDatasetProcessor dataset
         """
         table_path = config.table_path.rstrip("/")
-        df = self.connector.read_dataframe(table_path)
-
-        required_columns = list(config.user_column2default_column.keys())
-        column_set = set(df.columns.tolist())
-        for col in required_columns:
-            assert col in column_set, f'Expected table to have "{col}" column'
+        datafile_filters = self._get_datafile_filters(config, filters)
+        _, df = read_and_validate_df(
+            self.connector, config.user_column_names, table_path,
+            columns=self._get_columns_to_read(config, columns, datafile_filters),
+            filters=datafile_filters
+        )
+        df = df.reset_index(drop=True)
 
         # renaming columns
         columns_to_rename = config.user_columns_to_rename
@@ -306,7 +653,8 @@ class DatasetReader:
         config: DatasetConfig
             Config of DatasetConfig type
         **kwargs
-            Parameters for read_shards, read_sharded_files, read_files methods
+            Parameters for read_shards, read_sharded_files methods.
+            Only `columns` and `filters` parameters are used for read_files
 
         Returns
         -------
@@ -319,11 +667,103 @@ class DatasetReader:
         elif isinstance(config, ShardedFilesDatasetConfig):
             processor = self.read_sharded_files(config, **kwargs)
         elif isinstance(config, FilesDatasetConfig):
-            processor = self.read_files(config)
+            processor = self.read_files(config, columns=kwargs.get('columns'), filters=kwargs.get('filters'))
         else:
             raise ValueError(f"Unsupported config: {config}")
         return processor
 
+    def _read_sharded_group(
+        self,
+        config: Union[ShardsDatasetConfig, ShardedFilesDatasetConfig],
+        datafiles: list[str],
+        validate_columns: bool = True,
+        workers: int = 1,
+        backend: str = "pandas",
+        columns: Optional[list[str]] = None,
+        filters: Optional[list[FilterExpression]] = None,
+        lazy_paths: bool = False,
+        datafile2sidecars: Optional[dict[str, list[str]]] = None,
+    ) -> ShardedDatasetProcessor:
+        df = self._read_sharded_dataframe(
+            config, datafiles, datafile2sidecars, validate_columns, workers, False, backend,
+            False, columns, filters
+        )
+        # sidecar files of the group are passed to processor, so it doesn't list the dataset directory
+        group_datafile2sidecars = {path: (datafile2sidecars or {}).get(path, []) for path in datafiles}
+        processor: ShardedDatasetProcessor
+        if isinstance(config, ShardsDatasetConfig):
+            df = self._post_process_sharded_dataframes('.' + config.archives_ext.lstrip("."), config, df, lazy_paths)
+            processor = ShardsDatasetProcessor(
+                connector=self.connector, df=df, config=config, datafile2sidecars=group_datafile2sidecars
+            )
+        else:
+            df = self._post_process_sharded_dataframes('', config, df, lazy_paths)
+            processor = ShardedFilesDatasetProcessor(
+                connector=self.connector, df=df, config=config, datafile2sidecars=group_datafile2sidecars
+            )
+        return processor
+
+    def read_streaming(
+        self,
+        config: Union[ShardsDatasetConfig, ShardedFilesDatasetConfig],
+        shards_per_group: int = 1,
+        validate_columns: bool = True,
+        workers: int = 1,
+        progress_bar: bool = True,
+        backend: str = "pandas",
+        columns: Optional[list[str]] = None,
+        filters: Optional[list[FilterExpression]] = None,
+        lazy_paths: bool = False,
+    ) -> StreamingShardedDatasetProcessor:
+        """Creates StreamingShardedDatasetProcessor for datasets that don't fit in memory.
+        Metadata is read by groups of shards when filters are applied
+
+        Parameters
+        ----------
+        config: Union[ShardsDatasetConfig, ShardedFilesDatasetConfig]
+            Config of sharded dataset
+        shards_per_group: int = 1
+            Number of shards to read and process at once
+        validate_columns: bool = True
+            Whether to check if columns in datafiles of a group are matched
+        workers: int = 1
+            Number of parallel processes (threads for "arrow" backend) to read datafiles of a group
+        progress_bar: bool = True
+            Whether to display the progress bar over groups of shards
+        backend: str = "pandas"
+            Backend to read datafiles, "pandas" or "arrow"
+        columns: Optional[list[str]] = None
+            Columns of datafiles to read. All columns are read if None
+        filters: Optional[list[FilterExpression]] = None
+            Conditions on columns that rows of the dataset should match. Rows that don't match are not processed
+        lazy_paths: bool = False
+            Whether to store only file names instead of full paths to files in dataframes of groups
+
+        Returns
+        -------
+        StreamingShardedDatasetProcessor
+            Instance of StreamingShardedDatasetProcessor
+        """
+        datafiles: list[str]
+        datafile2sidecars: dict[str, list[str]]
+        if isinstance(config, ShardsDatasetConfig):
+            datafiles, datafile2sidecars = self._list_shards_datafiles(config)
+        elif isinstance(config, ShardedFilesDatasetConfig):
+            datafiles, datafile2sidecars = self._list_sharded_files_datafiles(config)
+        else:
+            raise ValueError(f"Streaming is supported only for sharded datasets, got: {config}")
+        return StreamingShardedDatasetProcessor(
+            config,
+            datafiles,
+            partial(
+                self._read_sharded_group, config,
+                validate_columns=validate_columns, workers=workers, backend=backend,
+                columns=columns, filters=filters, lazy_paths=lazy_paths, datafile2sidecars=datafile2sidecars
+            ),
+            shards_per_group=shards_per_group,
+            pbar=progress_bar
+        )
+
     def from_df(self, config: DatasetConfig, df: pd.DataFrame) -> DatasetProcessor:
         """Creates DatasetProcessor from config and dataframe
 
@@ -1,23 +1,262 @@
-from typing import Optional
+import io
+import json
+import os
+from typing import Any, Optional
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
 
 from DPF.connectors import Connector
+from DPF.connectors.errors import UnknownFileFormatException
+from DPF.filter_expression import (
+    FilterExpression,
+    apply_filter_expressions,
+    filter_expressions_to_arrow,
+)
+
+MANIFEST_FILENAME = "_manifest.arrow"
+MANIFEST_FINGERPRINTS_KEY = b"dpf_fingerprints"
+SIDECAR_EXT = "parquet"
+SCHEMA_OVERLAY_FILENAME = "_schema_overlay.json"
+
+
+def get_sidecar_path(datafile_path: str, column_group: str) -> str:
+    """Returns path to the sidecar file of a datafile with columns of the group: 0.csv -> 0.<column_group>.parquet"""
+    return os.path.splitext(datafile_path)[0] + f".{column_group}.{SIDECAR_EXT}"
+
+
+def get_datafiles_and_sidecars(filepaths: list[str], datafiles_ext: str) -> tuple[list[str], dict[str, list[str]]]:
+    """Splits paths to datafiles and sidecar files (split.<column_group>.parquet).
+    File is a sidecar only if there is a datafile of its split, so datafiles with dots in names
+    (e.g. part.0001.parquet) are not treated as sidecars.
+    Returns datafiles and mapping from datafiles to their sidecar files
+    """
+    datafiles_ext_dot = '.' + datafiles_ext.lstrip('.')
+    split2datafile = {path[:-len(datafiles_ext_dot)]: path for path in filepaths if path.endswith(datafiles_ext_dot)}
+    sidecar2datafile = {}
+    for path in filepaths:
+        if not path.endswith("." + SIDECAR_EXT):
+            continue
+        split_name = path[:-len("." + SIDECAR_EXT)].rsplit('.', 1)[0]
+        datafile = split2datafile.get(split_name)
+        if datafile is not None and datafile != path:
+            sidecar2datafile[path] = datafile
+
+    datafiles = [path for path in split2datafile.values() if path not in sidecar2datafile]
+    datafile2sidecars: dict[str, list[str]] = {}
+    for path in sorted(sidecar2datafile):
+        datafile2sidecars.setdefault(sidecar2datafile[path], []).append(path)
+    return datafiles, datafile2sidecars
+
+
+def _join_sidecar_df(df: pd.DataFrame, sidecar_df: pd.DataFrame, key_column: str) -> pd.DataFrame:
+    sidecar_columns = [col for col in sidecar_df.columns if col != key_column]
+    # columns from sidecar override columns of datafile
+    df = df.drop(columns=[col for col in sidecar_columns if col in df.columns])
+    return pd.merge(df, sidecar_df, on=key_column, how='left')
+
+
+def _join_sidecar_table(table: pa.Table, sidecar_table: pa.Table, key_column: str) -> pa.Table:
+    # rows of sidecar are aligned to rows of table, missing rows are nulls
+    indices = pc.index_in(table[key_column], value_set=sidecar_table[key_column])
+    sidecar_table = sidecar_table.drop_columns([key_column]).take(indices)
+    for name in sidecar_table.column_names:
+        if name in table.column_names:
+            table = table.drop_columns([name])
+        table = table.append_column(name, sidecar_table[name])
+    return table
 
 
 def read_and_validate_df(
     connector: Connector,
     required_columns: Optional[list[str]],
-    path: str
+    path: str,
+    columns: Optional[list[str]] = None,
+    filters: Optional[list[FilterExpression]] = None,
+    datafile2sidecars: Optional[dict[str, list[str]]] = None,
+    key_column: Optional[str] = None
 ) -> tuple[str, pd.DataFrame]:
-    df = connector.read_dataframe(path)
+    sidecars = (datafile2sidecars or {}).get(path, [])
+    kwargs = {}
+    if filters and path.endswith(".parquet") and len(sidecars) == 0:
+        # row groups are skipped using parquet statistics
+        kwargs["filters"] = [(f.column, f.op, f.value) for f in filters]
+    df = connector.read_dataframe(path, columns=columns, **kwargs)
+    for sidecar in sidecars:
+        assert key_column is not None, "Key column is required to join sidecar files"
+        df = _join_sidecar_df(df, connector.read_dataframe(sidecar, columns=columns), key_column)
 
     if required_columns:
         for col in required_columns:
             assert col in df.columns, f'Expected {path} to have "{col}" column'
 
+    if filters:
+        df = apply_filter_expressions(df, filters)
     return path, df
 
 
+def _read_csv_table(buffer: pa.Buffer, columns: Optional[list[str]] = None) -> pa.Table:
+    read_options = pa_csv.ReadOptions(use_threads=False)
+    convert_options = pa_csv.ConvertOptions(strings_can_be_null=True)
+    if columns is not None:
+        file_columns = pa_csv.open_csv(pa.BufferReader(buffer), read_options=read_options).schema.names
+        convert_options.include_columns = [col for col in file_columns if col in set(columns)]
+    table = pa_csv.read_csv(pa.BufferReader(buffer), read_options=read_options, convert_options=convert_options)
+
+    # pandas does not parse dates and times in csv, these columns are read again as strings
+    temporal_columns = [field.name for field in table.schema if pa.types.is_temporal(field.type)]
+    if len(temporal_columns) > 0:
+        convert_options.column_types = {col: pa.string() for col in temporal_columns}
+        table = pa_csv.read_csv(pa.BufferReader(buffer), read_options=read_options, convert_options=convert_options)
+    return table
+
+
+def _read_parquet_table(
+    connector: Connector,
+    path: str,
+    columns: Optional[list[str]] = None,
+    filter_expression: Optional[pc.Expression] = None
+) -> pa.Table:
+    buffer = pa.py_buffer(connector.read_file(path, binary=True).getbuffer())
+    if columns is not None:
+        file_columns = pq.read_schema(pa.BufferReader(buffer)).names
+        columns = [col for col in file_columns if col in set(columns)]
+    return pq.read_table(pa.BufferReader(buffer), columns=columns, filters=filter_expression, use_threads=False)
+
+
+def read_and_validate_table(
+    connector: Connector,
+    required_columns: Optional[list[str]],
+    path: str,
+    columns: Optional[list[str]] = None,
+    filters: Optional[list[FilterExpression]] = None,
+    datafile2sidecars: Optional[dict[str, list[str]]] = None,
+    key_column: Optional[str] = None
+) -> tuple[str, pa.Table]:
+    sidecars = (datafile2sidecars or {}).get(path, [])
+    filetype = os.path.splitext(path)[1].lstrip(".")
+    filter_expression = filter_expressions_to_arrow(filters) if filters else None
+    if filetype == "csv":
+        table = _read_csv_table(pa.py_buffer(connector.read_file(path, binary=True).getbuffer()), columns)
+    elif filetype == "parquet":
+        # row groups are skipped using parquet statistics
+        table = _read_parquet_table(connector, path, columns, filter_expression if len(sidecars) == 0 else None)
+        if len(sidecars) == 0:
+            filter_expression = None
+    else:
+        raise UnknownFileFormatException(f"Unknown file format: {filetype}")
+    for sidecar in sidecars:
+        assert key_column is not None, "Key column is required to join sidecar files"
+        table = _join_sidecar_table(table, _read_parquet_table(connector, sidecar, columns), key_column)
+
+    if required_columns:
+        for col in required_columns:
+            assert col in table.column_names, f'Expected {path} to have "{col}" column'
+
+    if filter_expression is not None:
+        table = table.filter(filter_expression)
+    return path, table
+
+
 def get_path_filename(path: str) -> str:
     return path.split('/')[-1].split('.')[0]
+
+
+def get_split_name_codes(split_names: list[str], lengths: list[int]) -> tuple[np.ndarray[Any, Any], list[str]]:
+    """Returns category codes of split_name column for datafiles with given numbers of rows and sorted categories"""
+    categories = sorted(set(split_names))
+    category2code = {category: i for i, category in enumerate(categories)}
+    codes = np.repeat(np.array([category2code[name] for name in split_names], dtype=np.int32), lengths)
+    return codes, categories
+
+
+def read_manifest(connector: Connector, manifest_path: str) -> Optional[tuple[pa.Table, dict[str, str]]]:
+    """Reads the manifest of the dataset. Returns None if there is no manifest
+
+    Returns
+    -------
+    Optional[tuple[pa.Table, dict[str, str]]]
+        Merged table of all datafiles (with split_name column)
+        and mapping from split name to the fingerprint of its datafile
+    """
+    try:
+        data = connector.read_file(manifest_path, binary=True)
+    except Exception:
+        return None
+    table = pa.ipc.open_file(pa.BufferReader(data.getbuffer())).read_all()
+    fingerprints = json.loads(table.schema.metadata[MANIFEST_FINGERPRINTS_KEY])
+    return table, fingerprints
+
+
+def save_manifest(
+    connector: Connector,
+    manifest_path: str,
+    df: pd.DataFrame,
+    fingerprints: dict[str, str]
+) -> None:
+    """Saves merged dataframe of all datafiles and fingerprints of datafiles as the manifest of the dataset"""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        MANIFEST_FINGERPRINTS_KEY: json.dumps(fingerprints).encode()
+    })
+    data = io.BytesIO()
+    with pa.ipc.new_file(data, table.schema) as writer:
+        writer.write_table(table)
+    connector.save_file(data, manifest_path, binary=True)
+
+
+def read_schema_overlay(connector: Connector, overlay_path: str) -> list[dict[str, Any]]:
+    """Reads operations of the schema overlay of the dataset. Returns empty list if there is no overlay
+
+    Returns
+    -------
+    list[dict[str, Any]]
+        Operations in order they were made: {"rename": {old_name: new_name}} or {"delete": [column, ...]}
+    """
+    try:
+        data = connector.read_file(overlay_path, binary=True)
+    except FileNotFoundError:
+        return []
+    # other errors are raised, dataset read without its overlay would have wrong columns
+    operations: list[dict[str, Any]] = json.loads(data.getvalue())["operations"]
+    return operations
+
+
+def save_schema_overlay(connector: Connector, overlay_path: str, operations: list[dict[str, Any]]) -> None:
+    """Saves operations of the schema overlay of the dataset"""
+    connector.save_file(json.dumps({"operations": operations}), overlay_path, binary=False)
+
+
+def apply_schema_overlay(df: pd.DataFrame, operations: list[dict[str, Any]]) -> pd.DataFrame:
+    """Renames and deletes columns of dataframe according to operations of the schema overlay.
+    Columns that are not in dataframe are skipped
+    """
+    for operation in operations:
+        if "rename" in operation:
+            df = df.rename(columns=operation["rename"])
+        else:
+            df = df.drop(columns=[col for col in operation["delete"] if col in df.columns])
+    return df
+
+
+def get_overlay_source_column(column: str, operations: list[dict[str, Any]]) -> Optional[str]:
+    """Returns name of the column in datafiles for a column name after the schema overlay.
+    Returns None if the column was deleted
+    """
+    for operation in reversed(operations):
+        if "rename" in operation:
+            column_map = operation["rename"]
+            new2old = {new: old for old, new in column_map.items()}
+            if column in new2old:
+                column = new2old[column]
+            elif column in column_map:
+                # column was renamed and does not exist after renaming
+                return None
+        elif column in operation["delete"]:
+            return None
+    return column
@@ -0,0 +1,82 @@
+import operator
+from dataclasses import dataclass
+from functools import reduce
+from typing import Any, Literal
+
+import pandas as pd
+import pyarrow.compute as pc
+
+FilterOperator = Literal["==", "!=", "<", "<=", ">", ">=", "in", "not in"]
+
+_COMPARISON_OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+@dataclass(frozen=True)
+class FilterExpression:
+    """
+    Declarative condition on a dataframe column: `column op value`.
+    Unlike dataframe filters with arbitrary functions, these conditions can be applied
+    by DatasetReader to every datafile before datafiles are merged.
+    Rows with null values in the column never match the condition
+
+    Parameters
+    ----------
+    column: str
+        Name of the column in dataframe of DatasetProcessor
+    op: FilterOperator
+        One of "==", "!=", "<", "<=", ">", ">=", "in", "not in"
+    value: Any
+        Value to compare with. For "in" and "not in" should be a list of values
+    """
+    column: str
+    op: FilterOperator
+    value: Any
+
+    def __post_init__(self) -> None:
+        assert self.op in _COMPARISON_OPERATORS or self.op in ("in", "not in"), f"Unknown operator: {self.op}"
+        if self.op in ("in", "not in"):
+            assert isinstance(self.value, (list, tuple, set)), f'Value for "{self.op}" operator should be a list'
+
+    def rename(self, column: str) -> "FilterExpression":
+        """Returns the same condition for another column"""
+        return FilterExpression(column, self.op, self.value)
+
+    def get_mask(self, df: pd.DataFrame) -> pd.Series:
+        """Returns boolean mask of rows that match the condition"""
+        series = df[self.column]
+        if self.op == "in":
+            mask = series.isin(list(self.value))
+        elif self.op == "not in":
+            mask = ~series.isin(list(self.value))
+        else:
+            mask = _COMPARISON_OPERATORS[self.op](series, self.value)
+        return mask & series.notna()
+
+    def to_arrow(self) -> pc.Expression:
+        """Returns pyarrow expression of the condition (used to filter Arrow tables and parquet row groups)"""
+        field = pc.field(self.column)
+        if self.op == "in":
+            return field.isin(list(self.value))
+        if self.op == "not in":
+            return ~field.isin(list(self.value)) & field.is_valid()
+        return _COMPARISON_OPERATORS[self.op](field, self.value)
+
+
+def apply_filter_expressions(df: pd.DataFrame, filters: list[FilterExpression]) -> pd.DataFrame:
+    """Returns rows of dataframe that match all conditions"""
+    if len(filters) == 0:
+        return df
+    mask = reduce(operator.and_, [f.get_mask(df) for f in filters])
+    return df[mask.to_numpy()]
+
+
+def filter_expressions_to_arrow(filters: list[FilterExpression]) -> pc.Expression:
+    """Returns pyarrow expression that matches all conditions"""
+    return reduce(operator.and_, [f.to_arrow() for f in filters])
@@ -1,6 +1,8 @@
+import hashlib
 import multiprocessing
 import sys
 from abc import ABC, abstractmethod
+from collections.abc import Generator
 from typing import Any
 
 import pandas as pd
@@ -11,6 +13,10 @@ from DPF.dataloaders.dataloader_utils import identical_collate_fn
 from DPF.modalities import ModalityName
 from DPF.types import ModalityToDataMapping
 
+_FINGERPRINT_IGNORED_PARAMS = {
+    'pbar', 'pbar_position', '_created_by_multigpu_data_filter', 'device', 'batch_size', 'num_workers', 'workers'
+}
+
 
 class DataFilter(ABC):
     """
@@ -99,6 +105,27 @@ class DataFilter(ABC):
         """
         pass
 
+    def get_fingerprint(self) -> str:
+        """Returns a hash of filter class, schema and simple parameters (numbers, strings, lists of them).
+        Parameters that don't change results (device, workers, batch size, progress bar) are ignored.
+        Used to find results of the same filter in a checkpoint directory
+
+        Returns
+        -------
+        str
+            Fingerprint of the filter
+        """
+        simple_types = (str, int, float, bool, type(None))
+        params = {
+            k: v for k, v in vars(self).items()
+            if k not in _FINGERPRINT_IGNORED_PARAMS and (
+                isinstance(v, simple_types)
+                or (isinstance(v, (list, tuple)) and all(isinstance(i, simple_types) for i in v))
+            )
+        }
+        data = repr((type(self).__module__, type(self).__qualname__, self.schema, sorted(params.items())))
+        return hashlib.md5(data.encode()).hexdigest()
+
     @staticmethod
     def _add_values_from_batch(
         main_dict: dict[str, list[Any]],
@@ -123,6 +150,24 @@ class DataFilter(ABC):
         pd.DataFrame
             Dataframe with columns from schema property
         """
+        filter_results = self._get_dict_from_schema()
+        for filter_results_batch in self.run_by_batches(dataset):
+            self._add_values_from_batch(filter_results, filter_results_batch)
+        return pd.DataFrame(filter_results)
+
+    def run_by_batches(self, dataset: Dataset[tuple[bool, Any]]) -> Generator[dict[str, list[Any]], None, None]:
+        """Runs datafilter on a dataset and yields results of every batch as soon as it is processed
+
+        Parameters
+        ----------
+        dataset: Dataset[tuple[bool, Any]]
+            torch.Dataset instance with samples to process
+
+        Returns
+        -------
+        Generator[dict[str, list[Any]], None, None]
+            Mappings from columns of schema property to their data for samples of a batch
+        """
         multiprocessing_context = None
         if self._created_by_multigpu_data_filter and sys.platform not in {'win32', 'darwin'}:
             multiprocessing_context = multiprocessing.get_context('fork')
@@ -132,15 +177,21 @@ class DataFilter(ABC):
             multiprocessing_context=multiprocessing_context,
             **self.dataloader_kwargs
         )
-        filter_results = self._get_dict_from_schema()
-
-        for batch in tqdm(dataloader, disable=not self.pbar, position=self.pbar_position):
-            # drop Nans
-            batch_filtered = [b[1] for b in batch if b[0]]
-            if len(batch_filtered) == 0:
-                continue
 
-            filter_results_batch = self.process_batch(batch_filtered)
-            self._add_values_from_batch(filter_results, filter_results_batch)
-
-        return pd.DataFrame(filter_results)
+        # tqdm.auto calls iter() on the iterable twice, each call would start workers of a new dataloader iteration
+        dataloader_iter = iter(dataloader)
+        try:
+            for batch in tqdm(
+                dataloader_iter, total=len(dataloader), disable=not self.pbar, position=self.pbar_position
+            ):
+                # drop Nans
+                batch_filtered = [b[1] for b in batch if b[0]]
+                if len(batch_filtered) == 0:
+                    continue
+
+                yield self.process_batch(batch_filtered)
+        finally:
+            # error traceback keeps this frame alive, so the iterator is dropped here to shut down its workers.
+            # Otherwise they are shut down in garbage collection, that can run during an import
+            # in a forked worker of the next dataloader and break the import there
+            del dataloader_iter
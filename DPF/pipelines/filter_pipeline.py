@@ -3,6 +3,7 @@ from typing import Any, Callable, Optional
 
 import pandas as pd
 
+from DPF.filter_expression import FilterExpression
 from DPF.filters import ColumnFilter, DataFilter
 from DPF.filters.multigpu_filter import MultiGPUDataFilter
 from DPF.processors import DatasetProcessor
@@ -12,6 +13,7 @@ from DPF.utils.logger import init_logger, init_stdout_logger
 from .pipeline_stages import (
     DataFramePipelineStage,
     DeduplicationPipelineStage,
+    FilterExpressionsPipelineStage,
     FilterPipelineStage,
     PipelineStage,
     ShufflePipelineStage,
@@ -125,6 +127,32 @@ class FilterPipeline:
             PipelineStageRunner(stage, on_error=on_error)
         )
 
+    def add_filter_expressions(
+        self,
+        filters: list[FilterExpression],
+        on_error: OnErrorOptions = "stop"
+    ) -> None:
+        stage = FilterExpressionsPipelineStage(filters)
+        self.stages.append(
+            PipelineStageRunner(stage, on_error=on_error)
+        )
+
+    def get_reader_filters(self) -> list[FilterExpression]:
+        """Returns filter expressions of the first stages of the pipeline,
+        that can be passed to DatasetReader to filter rows while reading the dataset
+
+        Returns
+        -------
+        list[FilterExpression]
+            Filter expressions from add_filter_expressions stages before any other stage
+        """
+        filters = []
+        for stage_runner in self.stages:
+            if not isinstance(stage_runner.stage, FilterExpressionsPipelineStage):
+                break
+            filters.extend(stage_runner.stage.filters)
+        return filters
+
     def add_transforms(
         self,
         transforms_class: type[BaseFilesTransforms],
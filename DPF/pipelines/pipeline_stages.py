@@ -4,6 +4,7 @@ from typing import Any, Callable, Optional, Union
 
 import pandas as pd
 
+from DPF.filter_expression import FilterExpression, apply_filter_expressions
 from DPF.filters import ColumnFilter, DataFilter
 from DPF.filters.multigpu_filter import MultiGPUDataFilter
 from DPF.processors import DatasetProcessor
@@ -47,6 +48,19 @@ class DataFramePipelineStage(PipelineStage):
         processor._df = self.filter_func(processor.df)
 
 
+class FilterExpressionsPipelineStage(PipelineStage):
+
+    def __init__(self, filters: list[FilterExpression]):
+        self.filters = filters
+
+    @property
+    def stage_name(self) -> str:
+        return f"FilterExpressionsPipelineStage(filters={self.filters})"
+
+    def run(self, processor: DatasetProcessor, logger: logging.Logger) -> None:
+        processor._df = apply_filter_expressions(processor.df, self.filters)
+
+
 class DeduplicationPipelineStage(PipelineStage):
 
     def __init__(self, columns_to_dedup: list[str]):
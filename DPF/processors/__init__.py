@@ -3,3 +3,4 @@ from .processor import DatasetProcessor
 from .sharded_files_processor import ShardedFilesDatasetProcessor
 from .sharded_processor import ShardedDatasetProcessor
 from .shards_processor import ShardsDatasetProcessor
+from .streaming_processor import StreamingShardedDatasetProcessor
@@ -111,7 +111,8 @@ class FilesDatasetProcessor(DatasetProcessor, ApplyTransformProcessorMixin):
         modalities: list[ModalityName],
         columns_to_use: Optional[list[str]] = None,
         preprocess_f: Callable[[ModalityToDataMapping, dict[str, str]], Any] = identical_preprocess_function,
-        return_none_on_error: bool = False
+        return_none_on_error: bool = False,
+        dataset_kwargs: Optional[dict[str, Any]] = None
     ) -> FilesDataset:
         assert len(set(modalities)) == len(list(modalities))
         datatypes_to_load = [self.config.modality2datatype[m] for m in modalities]
@@ -121,16 +122,22 @@ class FilesDatasetProcessor(DatasetProcessor, ApplyTransformProcessorMixin):
             datatypes_to_load,  # type: ignore
             metadata_columns=columns_to_use,
             preprocess_function=preprocess_f,
-            return_none_on_error=return_none_on_error
+            return_none_on_error=return_none_on_error,
+            **(dataset_kwargs or {})
         )
 
     def _read_sample_data(
         self,
-        sample: dict[str, str]
+        sample: dict[str, str],
+        modalities: Optional[list[ModalityName]] = None
     ) -> ModalityToDataMapping:
         path_column2modality: dict[str, ModalityName] = {}
         column2modality: dict[str, ModalityName] = {}
-        for d in self.config.datatypes:
+        if modalities is None:
+            datatypes = self.config.datatypes
+        else:
+            datatypes = [self.config.modality2datatype[m] for m in modalities]
+        for d in datatypes:
             if isinstance(d, ColumnDataType):
                 column2modality[d.column_name] = d.modality.name
             elif isinstance(d, FileDataType):
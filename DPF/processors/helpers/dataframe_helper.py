@@ -1,3 +1,5 @@
+import threading
+from collections import OrderedDict
 from typing import Any, Optional
 
 import pandas as pd
@@ -5,6 +7,7 @@ from tqdm.contrib.concurrent import thread_map
 
 from DPF.configs import DatasetConfig
 from DPF.connectors import Connector
+from DPF.dataset_reader_utils import apply_schema_overlay
 
 
 class DataFramesChanger:
@@ -13,11 +16,61 @@ class DataFramesChanger:
         self,
         datafile_paths: list[str],
         connector: Connector,
-        config: DatasetConfig
+        config: DatasetConfig,
+        max_cached_bytes: Optional[int] = 2 * 1024**3
     ):
+        """
+        Parameters
+        ----------
+        datafile_paths: list[str]
+            Paths to datafiles to change
+        connector: Connector
+            Connector to read and write datafiles
+        config: DatasetConfig
+            Config of a dataset
+        max_cached_bytes: Optional[int] = 2 * 1024**3
+            Maximum memory size of datafiles read during validation that are kept in memory
+            to be modified without reading them again. Datafiles that don't fit are read twice.
+            All datafiles are kept if None, every datafile is read twice if 0
+        """
         self.datafile_paths = datafile_paths
         self.connector = connector
         self.config = config
+        self.max_cached_bytes = max_cached_bytes
+        # path -> dataframe and its memory size, from first to last validated
+        self._cached_dataframes: OrderedDict[str, tuple[pd.DataFrame, int]] = OrderedDict()
+        self._cached_bytes = 0
+        self._cache_lock = threading.Lock()
+
+    def _pop_cached_dataframe(self, path: str) -> Optional[pd.DataFrame]:
+        if path not in self._cached_dataframes:
+            return None
+        df, size = self._cached_dataframes.pop(path)
+        self._cached_bytes -= size
+        return df
+
+    def _cache_dataframe(self, path: str, df: pd.DataFrame) -> None:
+        if self.max_cached_bytes == 0:
+            return
+        size = int(df.memory_usage(deep=True).sum()) if self.max_cached_bytes is not None else 0
+        with self._cache_lock:
+            self._pop_cached_dataframe(path)
+            self._cached_dataframes[path] = (df, size)
+            self._cached_bytes += size
+            while self.max_cached_bytes is not None and self._cached_bytes > self.max_cached_bytes:
+                self._pop_cached_dataframe(next(iter(self._cached_dataframes)))
+
+    def _read_dataframe(self, path: str) -> pd.DataFrame:
+        with self._cache_lock:
+            df = self._pop_cached_dataframe(path)
+        if df is None:
+            df = self.connector.read_dataframe(path)
+        return df
+
+    @staticmethod
+    def _get_paths_to_modify(paths: list[str]) -> list[str]:
+        # datafiles validated last are still in cache if it is limited, so they are modified first
+        return paths[::-1]
 
     def _save_dataframe(self, df: pd.DataFrame, path: str, **kwargs) -> Optional[str]:  # type: ignore
         errname = None
@@ -31,9 +84,10 @@ class DataFramesChanger:
         df = self.connector.read_dataframe(path)
         for col in columns_to_delete:
             assert col in df.columns, f'Dataframe {path} dont have "{col}" column'
+        self._cache_dataframe(path, df)
 
     def delete_columns_for_path(self, columns_to_delete: list[str], path: str) -> Optional[str]:
-        df = self.connector.read_dataframe(path)
+        df = self._read_dataframe(path)
         df.drop(columns=columns_to_delete, inplace=True)
         return self._save_dataframe(df, path, index=False)
 
@@ -43,17 +97,28 @@ class DataFramesChanger:
         max_threads: int = 16,
         pbar: bool = True
     ) -> list[str]:
+        return self.delete_columns_by_paths(
+            dict.fromkeys(self.datafile_paths, columns_to_delete), max_threads=max_threads, pbar=pbar
+        )
+
+    def delete_columns_by_paths(
+        self,
+        path2columns: dict[str, list[str]],
+        max_threads: int = 16,
+        pbar: bool = True
+    ) -> list[str]:
+        paths = [path for path, columns in path2columns.items() if len(columns) > 0]
         # validate all files before modifying them
         thread_map(
-            lambda p: self.validate_path_for_delete(columns_to_delete, p),
-            self.datafile_paths,
+            lambda p: self.validate_path_for_delete(path2columns[p], p),
+            paths,
             max_workers=max_threads,
             disable=not pbar
         )
         # modify datafiles
         errors = thread_map(
-            lambda p: self.delete_columns_for_path(columns_to_delete, p),
-            self.datafile_paths,
+            lambda p: self.delete_columns_for_path(path2columns[p], p),
+            self._get_paths_to_modify(paths),
             max_workers=max_threads,
             disable=not pbar
         )
@@ -64,9 +129,10 @@ class DataFramesChanger:
         for col_old, col_new in column_map.items():
             assert col_old in df.columns, f'Dataframe {path} dont have "{col_old}" column'
             assert col_new not in df.columns, f'Dataframe {path} already have "{col_new}" column'
+        self._cache_dataframe(path, df)
 
     def rename_columns_for_path(self, column_map: dict[str, str], path: str) -> Optional[str]:
-        df = self.connector.read_dataframe(path)
+        df = self._read_dataframe(path)
         df.rename(columns=column_map, inplace=True)
         return self._save_dataframe(df, path, index=False)
 
@@ -86,7 +152,7 @@ class DataFramesChanger:
         # modify datafiles
         errors = thread_map(
             lambda p: self.rename_columns_for_path(column_map, p),
-            self.datafile_paths,
+            self._get_paths_to_modify(self.datafile_paths),
             max_workers=max_threads,
             disable=not pbar
         )
@@ -96,12 +162,16 @@ class DataFramesChanger:
         self,
         key_column: str,
         df_new: list[dict[str, Any]],
-        path: str
+        path: str,
+        allow_partial: bool = False
     ) -> None:
         df_new = pd.DataFrame(df_new)
         df_old = self.connector.read_dataframe(path)
         assert key_column in df_old.columns, f'Dataframe {path} dont have "{key_column}" column'
-        assert set(df_old[key_column]) == set(df_new[key_column]), f'Dataframe {path} has different values in "{key_column}"'  # type: ignore
+        if allow_partial:
+            assert set(df_new[key_column]).issubset(set(df_old[key_column])), f'New dataframe for {path} has values in "{key_column}" that are not in dataframe'  # type: ignore
+        else:
+            assert set(df_old[key_column]) == set(df_new[key_column]), f'Dataframe {path} has different values in "{key_column}"'  # type: ignore
 
         duplicates = df_old[df_old[key_column].duplicated()][key_column].tolist()
         assert len(duplicates) == 0, f'Dataframe {path} has duplicates in "{key_column}" column: {duplicates}'
@@ -109,18 +179,30 @@ class DataFramesChanger:
         duplicates = df_new[df_new[key_column].duplicated()][key_column].tolist()  # type: ignore
         assert len(duplicates) == 0, f'New dataframe for {path} has duplicates in "{key_column}" column: {duplicates}'
 
-        assert len(df_old) == len(df_new), f'Length of {path} dataframe is changed'
+        if not allow_partial:
+            assert len(df_old) == len(df_new), f'Length of {path} dataframe is changed'
+        self._cache_dataframe(path, df_old)
 
     def update_columns_for_path(
         self,
         key_column: str,
         df_new: list[dict[str, Any]],
-        path: str
+        path: str,
+        allow_partial: bool = False
     ) -> Optional[str]:
         df_new = pd.DataFrame(df_new)
-        df_old = self.connector.read_dataframe(path)
+        df_old = self._read_dataframe(path)
 
         columns_to_add = [i for i in df_new.columns if i != key_column]  # type: ignore [attr-defined]
+        if allow_partial:
+            # only rows from new dataframe are updated, other rows keep old values (or NaN for new columns)
+            new_values = df_new.set_index(key_column).reindex(df_old[key_column])  # type: ignore [attr-defined]
+            is_updated = df_old[key_column].isin(df_new[key_column]).to_numpy()  # type: ignore [call-overload]
+            for col in columns_to_add:
+                values = pd.Series(new_values[col].to_numpy(), index=df_old.index)
+                df_old[col] = values.where(is_updated, df_old[col]) if col in df_old.columns else values
+            return self._save_dataframe(df_old, path, index=False)
+
         columns_intersection = set(df_old.columns).intersection(set(columns_to_add))
 
         if len(columns_intersection) > 0:
@@ -134,20 +216,76 @@ class DataFramesChanger:
         key_column: str,
         path2df: dict[str, list[dict[str, Any]]],
         max_threads: int = 16,
-        pbar: bool = True
+        pbar: bool = True,
+        allow_partial: bool = False
     ) -> list[str]:
         # validate all files before modifying them
         thread_map(
-            lambda p: self.validate_path_for_update(key_column, path2df[p], p),
+            lambda p: self.validate_path_for_update(key_column, path2df[p], p, allow_partial),
             list(path2df.keys()),
             max_workers=max_threads,
             disable=not pbar
         )
         # modify datafiles
         errors = thread_map(
-            lambda p: self.update_columns_for_path(key_column, path2df[p], p),
+            lambda p: self.update_columns_for_path(key_column, path2df[p], p, allow_partial),
+            self._get_paths_to_modify(list(path2df.keys())),
+            max_workers=max_threads,
+            disable=not pbar
+        )
+        return [err for err in errors if err is not None]
+
+    def update_sidecar_for_path(
+        self,
+        key_column: str,
+        df_new: list[dict[str, Any]],
+        path: str,
+        exists: bool
+    ) -> Optional[str]:
+        new_values = pd.DataFrame(df_new).set_index(key_column)
+        duplicates = new_values.index[new_values.index.duplicated()].tolist()
+        assert len(duplicates) == 0, f'New dataframe for {path} has duplicates in "{key_column}" column: {duplicates}'
+        if not exists:
+            return self._save_dataframe(new_values.reset_index(), path, index=False)
+
+        old_values = self.connector.read_dataframe(path).set_index(key_column)
+        # updated rows get new values, other rows of sidecar keep old values (NaN for new columns)
+        is_updated = old_values.index.isin(new_values.index)
+        old_columns = [col for col in old_values.columns if col not in new_values.columns]
+        df_updated = new_values.join(old_values.loc[is_updated, old_columns])
+        df = pd.concat([old_values[~is_updated], df_updated]).reset_index()
+        return self._save_dataframe(df, path, index=False)
+
+    def update_sidecars(
+        self,
+        key_column: str,
+        path2df: dict[str, list[dict[str, Any]]],
+        existing_paths: set[str],
+        max_threads: int = 16,
+        pbar: bool = True
+    ) -> list[str]:
+        errors = thread_map(
+            lambda p: self.update_sidecar_for_path(key_column, path2df[p], p, p in existing_paths),
             list(path2df.keys()),
             max_workers=max_threads,
             disable=not pbar
         )
         return [err for err in errors if err is not None]
+
+    def apply_schema_overlay_for_path(self, operations: list[dict[str, Any]], path: str) -> Optional[str]:
+        df = apply_schema_overlay(self.connector.read_dataframe(path), operations)
+        return self._save_dataframe(df, path, index=False)
+
+    def apply_schema_overlay(
+        self,
+        operations: list[dict[str, Any]],
+        max_threads: int = 16,
+        pbar: bool = True
+    ) -> list[str]:
+        errors = thread_map(
+            lambda p: self.apply_schema_overlay_for_path(operations, p),
+            self.datafile_paths,
+            max_workers=max_threads,
+            disable=not pbar
+        )
+        return [err for err in errors if err is not None]
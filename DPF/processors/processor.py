@@ -1,10 +1,14 @@
 import os.path
 from abc import ABC, abstractmethod
+from collections.abc import Iterable, Iterator
+from contextlib import closing
+from functools import partial
 from typing import Any, Callable, Optional, Union
 
 import pandas as pd
 from torch.utils.data import DataLoader, Dataset
 from tqdm.auto import tqdm
+from tqdm.contrib.concurrent import process_map
 
 from DPF.configs import DatasetConfig, config2format
 from DPF.connectors import Connector, LocalConnector
@@ -16,10 +20,30 @@ from DPF.datatypes import ColumnDataType
 from DPF.filters import ColumnFilter, DataFilter
 from DPF.modalities import MODALITIES, ModalityName
 from DPF.processors.writers import ABSWriter, ShardedFilesWriter, ShardsWriter
+from DPF.processors.writers.shuffle import (
+    WriterSample,
+    shuffle_with_buckets,
+    shuffle_with_buffer,
+)
+from DPF.processors.writers.utils import get_next_shard_index
 from DPF.types import ModalityToDataMapping
 from DPF.validators import ValidationResult
 
 
+def _write_dataset_part(
+    processor: "DatasetProcessor",
+    writer: ABSWriter,
+    columns_to_save: Optional[list[str]] = None
+) -> None:
+    # samples are read in the process that writes the shard, so they are not sent between processes
+    processor._write_dataset(
+        writer,
+        columns_to_save=columns_to_save,
+        dataloader_kwargs={'num_workers': 0},
+        pbar=False
+    )
+
+
 class DatasetProcessor(ABC):
     """DatasetProcessor is an interface used to interact with dataset
 
@@ -57,6 +81,10 @@ class DatasetProcessor(ABC):
     def modalities(self) -> list[str]:
         return list(self.config.modality2datatype.keys())
 
+    def _get_column(self, column: str) -> pd.Series:
+        """Returns column of dataframe. Processors can build columns that are not stored in dataframe"""
+        return self._df[column]
+
     def __getitem__(self, column_name: str) -> pd.Series:
         return self._df[column_name]
 
@@ -158,7 +186,8 @@ class DatasetProcessor(ABC):
         modalities: list[ModalityName],
         columns_to_use: Optional[list[str]] = None,
         preprocess_f: Callable[[ModalityToDataMapping, dict[str, str]], Any] = identical_preprocess_function,
-        return_none_on_error: bool = False
+        return_none_on_error: bool = False,
+        dataset_kwargs: Optional[dict[str, Any]] = None
     ) -> Dataset[tuple[bool, Any]]:
         """Method that returns torch.Dataset class for this dataset"""
         pass
@@ -167,7 +196,10 @@ class DatasetProcessor(ABC):
         self,
         datafilter: DataFilter,
         validate_filter_result: bool = True,
-        return_none_on_error: bool = False
+        return_none_on_error: bool = False,
+        dataset_kwargs: Optional[dict[str, Any]] = None,
+        checkpoint_dir: Optional[str] = None,
+        checkpoint_size: int = 10000
     ) -> None:
         """Applies a data filter to dataset
 
@@ -179,28 +211,180 @@ class DatasetProcessor(ABC):
             Whether to check the correctness of datafilter result (data integrity)
         return_none_on_error: bool = False
             Whether to return None on sample if there is error in dataloader
+        dataset_kwargs: Optional[dict[str, Any]] = None
+            Additional parameters for torch dataset of this format (for example, streaming=True for shards)
+        checkpoint_dir: Optional[str] = None
+            Directory to save results of every processed shard (or every checkpoint_size samples for files format).
+            Results are saved in a subdirectory named by datafilter fingerprint.
+            If run is restarted with the same directory, samples that are saved in checkpoints are not processed again
+        checkpoint_size: int = 10000
+            Number of samples in one checkpoint for datasets without shards
         """
-        dataset = self._get_torch_dataset(
+        if checkpoint_dir is None:
+            df_result = self._run_data_filter(datafilter, return_none_on_error, dataset_kwargs)
+        else:
+            df_result = self._run_data_filter_by_parts(
+                datafilter, return_none_on_error, dataset_kwargs,
+                self._split_to_parts(checkpoint_size), self._get_checkpoint_path(datafilter, checkpoint_dir)
+            )
+        self._merge_data_filter_result(datafilter, df_result, validate_filter_result)
+
+    def _merge_data_filter_result(
+        self,
+        datafilter: DataFilter,
+        df_result: pd.DataFrame,
+        validate_filter_result: bool
+    ) -> None:
+        key_column = datafilter.key_column
+        key_values = self._get_column(key_column)
+
+        if validate_filter_result:
+            assert set(key_values) == set(df_result[key_column]), \
+                f"Result dataframe after filter have different values in key column {key_column}"
+            assert len(df_result) == len(self._df), \
+                f"Length of resulted dataframe changed after filtering. Old length = {len(self._df)}, new = {len(df_result)}"
+
+        if key_column in self._df.columns:
+            self._df = pd.merge(self._df, df_result, on=key_column, how='left')
+        else:
+            # key column is not stored in dataframe (e.g. paths are built lazily)
+            self._df = pd.merge(
+                self._df, df_result, left_on=key_values.to_numpy(), right_on=key_column, how='left'
+            ).drop(columns=key_column)
+
+    def _get_data_filter_dataset(
+        self,
+        datafilter: DataFilter,
+        return_none_on_error: bool,
+        dataset_kwargs: Optional[dict[str, Any]]
+    ) -> Dataset[tuple[bool, Any]]:
+        return self._get_torch_dataset(
             modalities=datafilter.modalities,
             columns_to_use=datafilter.metadata_columns + [datafilter.key_column],
             preprocess_f=datafilter.preprocess_data,
-            return_none_on_error=return_none_on_error
+            return_none_on_error=return_none_on_error,
+            dataset_kwargs=dataset_kwargs
         )
-        df_result = datafilter.run(dataset)
 
-        if validate_filter_result:
-            assert set(self._df[datafilter.key_column]) == set(df_result[datafilter.key_column]), \
-                f"Result dataframe after filter have different values in key column {datafilter.key_column}"
-            assert len(df_result) == len(self._df), \
-                f"Length of resulted dataframe changed after filtering. Old length = {len(self._df)}, new = {len(df_result)}"
+    def _run_data_filter(
+        self,
+        datafilter: DataFilter,
+        return_none_on_error: bool,
+        dataset_kwargs: Optional[dict[str, Any]]
+    ) -> pd.DataFrame:
+        dataset = self._get_data_filter_dataset(datafilter, return_none_on_error, dataset_kwargs)
+        return datafilter.run(dataset)
+
+    def _group_rows_by_shards(self) -> pd.DataFrame:
+        """Returns dataframe with rows of every shard placed together, rows of one shard keep their order"""
+        return self._df
 
-        self._df = pd.merge(self._df, df_result, on=datafilter.key_column, how='left')
+    def _split_to_parts(self, part_size: int) -> list[tuple[str, pd.DataFrame]]:
+        """Splits dataframe to parts that are processed separately. Returns names and dataframes of parts"""
+        return [
+            (f'rows_{i}', self._df.iloc[i:i+part_size])
+            for i in range(0, len(self._df), part_size)
+        ]
+
+    def _get_checkpoint_path(self, datafilter: DataFilter, checkpoint_dir: str) -> str:
+        checkpoint_path = self.connector.join(checkpoint_dir.rstrip('/'), datafilter.get_fingerprint())
+        self.connector.mkdir(checkpoint_path)
+        return checkpoint_path
+
+    def _read_checkpoint(self, part_path: Optional[str], saved_checkpoints: set[str]) -> Optional[pd.DataFrame]:
+        if part_path is None or part_path not in saved_checkpoints:
+            return None
+        try:
+            return self.connector.read_dataframe(part_path)
+        except Exception:
+            # checkpoint was not fully written
+            return None
+
+    def _run_data_filter_by_parts(
+        self,
+        datafilter: DataFilter,
+        return_none_on_error: bool,
+        dataset_kwargs: Optional[dict[str, Any]],
+        parts: list[tuple[str, pd.DataFrame]],
+        checkpoint_path: Optional[str] = None,
+        part_callback: Optional[Callable[["DatasetProcessor", pd.DataFrame], None]] = None
+    ) -> pd.DataFrame:
+        """Runs datafilter on all parts in one dataloader pass. Results of a part are saved to checkpoint
+        and passed to part_callback as soon as all samples of the part are processed
+        """
+        saved_checkpoints = set(self.connector.listdir(checkpoint_path)) if checkpoint_path else set()
+
+        key_column = datafilter.key_column
+        part_paths: list[Optional[str]] = []
+        saved_results: list[pd.DataFrame] = []
+        new_results: list[dict[str, list[Any]]] = []
+        samples_left: list[int] = []
+        key2part_id: dict[Any, int] = {}
+        dfs_to_process: list[pd.DataFrame] = []
+        for part_id, (part_name, df_part) in enumerate(parts):
+            part_path = self.connector.join(checkpoint_path, part_name + '.parquet') if checkpoint_path else None
+            keys = type(self)(self.connector, df_part, self.config)._get_column(key_column)
+            df_saved = self._read_checkpoint(part_path, saved_checkpoints)
+            if df_saved is None:
+                df_saved = pd.DataFrame({col: [] for col in datafilter.schema})
+            # only samples that are not in checkpoint are processed (dataset could be changed after checkpoint)
+            df_saved = df_saved[df_saved[key_column].isin(keys)]
+            to_process = ~keys.isin(df_saved[key_column]).to_numpy()
+            for key in keys[to_process]:
+                key2part_id[key] = part_id
+            dfs_to_process.append(df_part[to_process])
+
+            part_paths.append(part_path)
+            saved_results.append(df_saved)
+            new_results.append(datafilter._get_dict_from_schema())
+            samples_left.append(int(to_process.sum()))
+
+        part_results: list[Optional[pd.DataFrame]] = [None] * len(parts)
+
+        def _finish_part(part_id: int) -> None:
+            df_new = pd.DataFrame(new_results[part_id])
+            dfs = [df for df in [saved_results[part_id], df_new] if len(df) > 0]
+            df_result = pd.concat(dfs, ignore_index=True) if len(dfs) > 0 else df_new
+            part_path = part_paths[part_id]
+            if part_path is not None and len(df_new) > 0:
+                self.connector.save_dataframe(df_result, part_path, index=False)
+            if part_callback is not None:
+                part_callback(type(self)(self.connector, parts[part_id][1], self.config), df_result)
+            part_results[part_id] = df_result
+
+        for part_id in range(len(parts)):
+            if samples_left[part_id] == 0:
+                _finish_part(part_id)
+
+        if len(key2part_id) > 0:
+            processor = type(self)(self.connector, pd.concat(dfs_to_process), self.config)
+            dataset = processor._get_data_filter_dataset(datafilter, return_none_on_error, dataset_kwargs)
+            with closing(datafilter.run_by_batches(dataset)) as filter_results_batches:
+                for filter_results_batch in filter_results_batches:
+                    for i, key in enumerate(filter_results_batch[key_column]):
+                        part_id = key2part_id[key]
+                        for col, values in filter_results_batch.items():
+                            new_results[part_id][col].append(values[i])
+                        samples_left[part_id] -= 1
+                        if samples_left[part_id] == 0:
+                            _finish_part(part_id)
+
+        # parts with samples that were not read because of errors
+        for part_id in range(len(parts)):
+            if part_results[part_id] is None:
+                _finish_part(part_id)
+
+        results = [df for df in part_results if df is not None]
+        if len(results) == 0:
+            return pd.DataFrame({col: [] for col in datafilter.schema})
+        return pd.concat(results, ignore_index=True)
 
     def apply_multi_gpu_data_filter(  # type: ignore
         self,
         multi_gpu_datafilter,
         validate_filter_result: bool = True,
-        return_none_on_error: bool = False
+        return_none_on_error: bool = False,
+        dataset_kwargs: Optional[dict[str, Any]] = None
     ) -> None:
         """Applies a multi-gpu data filter to dataset
 
@@ -212,12 +396,15 @@ class DatasetProcessor(ABC):
             Whether to check the correctness of datafilter result (data integrity)
         return_none_on_error: bool = False
             Whether to return None on sample if there is error in dataloader
+        dataset_kwargs: Optional[dict[str, Any]] = None
+            Additional parameters for torch dataset of this format
         """
         self._df = multi_gpu_datafilter.run(
             self.df, self.config, self.connector,
             filter_run_kwargs={
                 "validate_filter_result": validate_filter_result,
-                "return_none_on_error": return_none_on_error
+                "return_none_on_error": return_none_on_error,
+                "dataset_kwargs": dataset_kwargs
             }
         )
 
@@ -276,7 +463,8 @@ class DatasetProcessor(ABC):
     @abstractmethod
     def _read_sample_data(
         self,
-        sample: dict[str, Any]
+        sample: dict[str, Any],
+        modalities: Optional[list[ModalityName]] = None
     ) -> ModalityToDataMapping:
         """Reads data for one sample from dataset
 
@@ -284,6 +472,8 @@ class DatasetProcessor(ABC):
         ----------
         sample: dict[str, Any]
             Sample from dataframe
+        modalities: Optional[list[ModalityName]] = None
+            Modalities to read. If None, all modalities of a dataset are read
 
         Returns
         -------
@@ -294,7 +484,8 @@ class DatasetProcessor(ABC):
 
     def get_random_sample(
         self,
-        df_filter: Optional[pd.Series] = None
+        df_filter: Optional[pd.Series] = None,
+        modalities: Optional[list[ModalityName]] = None
     ) -> tuple[ModalityToDataMapping, dict[str, Any]]:
         """Returns a random sample from dataset
 
@@ -302,6 +493,9 @@ class DatasetProcessor(ABC):
         ----------
         df_filter: Optional[pd.Series] = None
             Condition for dataframe to filter, df[df_filter] will be used for sampling. If None, uses original dataframe.
+        modalities: Optional[list[ModalityName]] = None
+            Modalities to read. If None, all modalities of a dataset are read.
+            Files are not read if only column modalities (e.g. text) are requested
 
         Returns
         -------
@@ -316,7 +510,7 @@ class DatasetProcessor(ABC):
             df_to_sample = self.df
 
         sample = df_to_sample.sample(1).iloc[0].to_dict()
-        modality2bytes = self._read_sample_data(sample)
+        modality2bytes = self._read_sample_data(sample, modalities)
         return modality2bytes, sample
 
     def filter_df(
@@ -332,12 +526,35 @@ class DatasetProcessor(ABC):
         """
         self._df = self._df[condition]
 
+    def _iter_samples_to_write(self, dataloader: DataLoader[Any], pbar: bool = True) -> Iterator[WriterSample]:
+        # tqdm.auto calls iter() on the iterable twice, each call would start workers of a new dataloader iteration
+        dataloader_iter = iter(dataloader)
+        for batch in tqdm(dataloader_iter, total=len(dataloader), disable=not pbar):
+            modality2bytes, metadata = batch[0][1]
+
+            modality2sample_data = {}
+            for modality, bytes_data in modality2bytes.items():
+                datatype = self.config.modality2datatype[modality]
+                if isinstance(datatype, ColumnDataType):
+                    pass
+                else:
+                    path_col = MODALITIES[modality].path_column
+                    extension = os.path.splitext(os.path.basename(metadata[path_col]))[-1]
+                    modality2sample_data[modality] = (extension, bytes_data)
+                    metadata.pop(path_col)
+
+            yield modality2sample_data, metadata
+
     def _write_dataset(
         self,
         writer: ABSWriter,
         columns_to_save: Optional[list[str]] = None,
         dataloader_kwargs: Optional[dict[str, Any]] = None,
-        pbar: bool = True
+        pbar: bool = True,
+        shuffle_buffer_size: int = 0,
+        shuffle_buckets: int = 0,
+        shuffle_tmp_dir: Optional[str] = None,
+        shuffle_seed: Optional[int] = None
     ) -> None:
         columns_to_save = columns_to_save or []
         dataloader_kwargs = dataloader_kwargs or {}
@@ -357,34 +574,59 @@ class DatasetProcessor(ABC):
         )
         dataloader = DataLoader(dataset, **new_dataloader_kwargs)  # type: ignore [arg-type]
 
-        with writer as writer:
-            for batch in tqdm(dataloader, disable=not pbar):
-                modality2bytes, metadata = batch[0][1]
-
-                modality2sample_data = {}
-                for modality, bytes_data in modality2bytes.items():
-                    datatype = self.config.modality2datatype[modality]
-                    if isinstance(datatype, ColumnDataType):
-                        pass
-                    else:
-                        path_col = MODALITIES[modality].path_column
-                        extension = os.path.splitext(os.path.basename(metadata[path_col]))[-1]
-                        modality2sample_data[modality] = (extension, bytes_data)
-                        metadata.pop(path_col)
+        # datasets read samples grouped by shards, so samples are shuffled after reading
+        samples: Iterable[WriterSample] = self._iter_samples_to_write(dataloader, pbar=pbar)
+        if shuffle_buckets > 0:
+            samples = shuffle_with_buckets(samples, shuffle_buckets, tmp_dir=shuffle_tmp_dir, seed=shuffle_seed)
+        if shuffle_buffer_size > 0:
+            samples = shuffle_with_buffer(samples, shuffle_buffer_size, seed=shuffle_seed)
 
+        with writer as writer:
+            for modality2sample_data, metadata in samples:
                 writer.save_sample(modality2sample_data, metadata)
 
+    def _write_dataset_parallel(
+        self,
+        get_writer: Callable[..., ABSWriter],
+        start_shard_index: int,
+        max_files_in_shard: int,
+        columns_to_save: Optional[list[str]] = None,
+        workers: int = 8,
+        pbar: bool = True
+    ) -> None:
+        # every process writes complete shards: shard i gets samples [i*max_files_in_shard, (i+1)*max_files_in_shard)
+        # so shard indexes and file names are the same as in sequential writing.
+        # Samples are grouped by source shards, so every process reads only a few source archives
+        df = self._group_rows_by_shards()
+        parts = [
+            type(self)(self.connector, df.iloc[i:i+max_files_in_shard], self.config)
+            for i in range(0, len(df), max_files_in_shard)
+        ]
+        writers = [get_writer(start_shard_index=start_shard_index+i) for i in range(len(parts))]
+        process_map(
+            _write_dataset_part, parts, writers, [columns_to_save]*len(parts),
+            max_workers=workers,
+            chunksize=1,
+            disable=not pbar
+        )
+
     def save_to_sharded_files(
         self,
         destination_dir: str,
         connector: Optional[Connector] = None,
-        max_files_in_shard: int = 1000,
+        max_files_in_shard: Optional[int] = 1000,
         datafiles_ext: str = "csv",
         filenaming: str = "counter",
         columns_to_save: Optional[list[str]] = None,
         rename_columns: Optional[dict[str, str]] = None,
         workers: int = 8,
-        pbar: bool = True
+        pbar: bool = True,
+        parallel: bool = False,
+        max_bytes_in_shard: Optional[int] = None,
+        shuffle_buffer_size: int = 0,
+        shuffle_buckets: int = 0,
+        shuffle_tmp_dir: Optional[str] = None,
+        shuffle_seed: Optional[int] = None
     ) -> None:
         """Converts dataset to sharded files format
 
@@ -394,8 +636,8 @@ class DatasetProcessor(ABC):
             Path to directory
         connector: Optional[Connector] = None
             The connector for where this path is located. LocalConnector is used by default
-        max_files_in_shard: int = 1000
-            Maximum number of files in shard
+        max_files_in_shard: Optional[int] = 1000
+            Maximum number of samples in shard. Shards are limited only by max_bytes_in_shard if None
         datafiles_ext: str = "csv"
             Extension of files with data tables
         filenaming: str = "counter"
@@ -408,37 +650,90 @@ class DatasetProcessor(ABC):
             Number of parallel processes
         pbar: bool = True
             Whether to show a progress bar
+        parallel: bool = False
+            Whether to write shards in parallel. Each of the workers processes reads samples and writes complete shards,
+            instead of sending samples to the single writer. New shards are written after existing shards in destination_dir.
+            Samples are grouped by source shards as in sequential writing, so processes don't read the same archives
+        max_bytes_in_shard: Optional[int] = None
+            Maximum size of files in shard in bytes. Shard is closed when size of its files reaches this value,
+            so only the last sample can exceed it
+        shuffle_buffer_size: int = 0
+            If positive, samples are shuffled with a buffer of this size before writing.
+            Buffer should contain samples of several shards, samples are not shuffled if 0
+        shuffle_buckets: int = 0
+            If positive, samples are shuffled in two passes before writing: samples are written to this number
+            of temporary buckets on local disk, then every bucket is shuffled in memory
+        shuffle_tmp_dir: Optional[str] = None
+            Local directory for temporary buckets. Default temporary directory is used if None
+        shuffle_seed: Optional[int] = None
+            Seed of the shuffle. Shuffle is reproducible if samples are read in the same order (e.g. with workers=1)
         """
         if connector is None:
             connector = LocalConnector()
 
+        if parallel:
+            assert max_files_in_shard is not None and max_bytes_in_shard is None, \
+                "Parallel writing requires max_files_in_shard and doesn't support max_bytes_in_shard"
+            assert shuffle_buffer_size == 0 and shuffle_buckets == 0, "Parallel writing doesn't support shuffling"
+            self._write_dataset_parallel(
+                partial(
+                    ShardedFilesWriter,
+                    connector,
+                    destination_dir,
+                    keys_mapping=rename_columns,
+                    max_files_in_shard=max_files_in_shard,
+                    datafiles_ext=datafiles_ext,
+                    filenaming=filenaming
+                ),
+                get_next_shard_index(connector, destination_dir, datafiles_ext),
+                max_files_in_shard,
+                columns_to_save=columns_to_save,
+                workers=workers,
+                pbar=pbar
+            )
+            return
+
         writer = ShardedFilesWriter(
             connector,
             destination_dir,
             keys_mapping=rename_columns,
             max_files_in_shard=max_files_in_shard,
             datafiles_ext=datafiles_ext,
-            filenaming=filenaming
+            filenaming=filenaming,
+            max_bytes_in_shard=max_bytes_in_shard
         )
         self._write_dataset(
             writer,
             columns_to_save=columns_to_save,
             dataloader_kwargs={'num_workers': workers},
-            pbar=pbar
+            pbar=pbar,
+            shuffle_buffer_size=shuffle_buffer_size,
+            shuffle_buckets=shuffle_buckets,
+            shuffle_tmp_dir=shuffle_tmp_dir,
+            shuffle_seed=shuffle_seed
         )
 
     def save_to_shards(
         self,
         destination_dir: str,
         connector: Optional[Connector] = None,
-        max_files_in_shard: int = 1000,
+        max_files_in_shard: Optional[int] = 1000,
         datafiles_ext: str = "csv",
         archives_ext: str = "tar",
         filenaming: str = "counter",
         columns_to_save: Optional[list[str]] = None,
         rename_columns: Optional[dict[str, str]] = None,
         workers: int = 8,
-        pbar: bool = True
+        pbar: bool = True,
+        write_tar_index: bool = True,
+        parallel: bool = False,
+        upload_queue_size: int = 0,
+        streaming: bool = False,
+        max_bytes_in_shard: Optional[int] = None,
+        shuffle_buffer_size: int = 0,
+        shuffle_buckets: int = 0,
+        shuffle_tmp_dir: Optional[str] = None,
+        shuffle_seed: Optional[int] = None
     ) -> None:
         """Converts dataset to sharded files format
 
@@ -448,8 +743,8 @@ class DatasetProcessor(ABC):
             Path to directory
         connector: Optional[Connector] = None
             The connector where this path is located. LocalConnector is used by default
-        max_files_in_shard: int = 1000
-            Maximum number of files in shard
+        max_files_in_shard: Optional[int] = 1000
+            Maximum number of samples in shard. Shards are limited only by max_bytes_in_shard if None
         datafiles_ext: str = "csv"
             Extension of files with data tables
         archives_ext: Optional[str] = "tar"
@@ -464,10 +759,60 @@ class DatasetProcessor(ABC):
             Number of parallel processes
         pbar: bool = True
             Whether to show a progress bar
+        write_tar_index: bool = True
+            Whether to write index sidecar (member offsets) next to each archive
+        parallel: bool = False
+            Whether to write shards in parallel. Each of the workers processes reads samples and writes complete shards,
+            instead of sending samples to the single writer. New shards are written after existing shards in destination_dir.
+            Samples are grouped by source shards as in sequential writing, so processes don't read the same archives
+        upload_queue_size: int = 0
+            Maximum number of completed shards waiting for upload in the background thread.
+            Shards are uploaded synchronously if 0
+        streaming: bool = False
+            Whether to write archives directly to destination (multipart upload for S3) instead of buffering them in memory
+        max_bytes_in_shard: Optional[int] = None
+            Maximum size of archive in bytes. Archive is closed when its size reaches this value,
+            so only the last sample can exceed it
+        shuffle_buffer_size: int = 0
+            If positive, samples are shuffled with a buffer of this size before writing.
+            Buffer should contain samples of several shards, samples are not shuffled if 0
+        shuffle_buckets: int = 0
+            If positive, samples are shuffled in two passes before writing: samples are written to this number
+            of temporary buckets on local disk, then every bucket is shuffled in memory
+        shuffle_tmp_dir: Optional[str] = None
+            Local directory for temporary buckets. Default temporary directory is used if None
+        shuffle_seed: Optional[int] = None
+            Seed of the shuffle. Shuffle is reproducible if samples are read in the same order (e.g. with workers=1)
         """
         if connector is None:
             connector = LocalConnector()
 
+        if parallel:
+            assert max_files_in_shard is not None and max_bytes_in_shard is None, \
+                "Parallel writing requires max_files_in_shard and doesn't support max_bytes_in_shard"
+            assert shuffle_buffer_size == 0 and shuffle_buckets == 0, "Parallel writing doesn't support shuffling"
+            self._write_dataset_parallel(
+                partial(
+                    ShardsWriter,
+                    connector,
+                    destination_dir,
+                    keys_to_rename=rename_columns,
+                    max_files_in_shard=max_files_in_shard,
+                    datafiles_ext=datafiles_ext,
+                    archives_ext=archives_ext,
+                    filenaming=filenaming,
+                    write_tar_index=write_tar_index,
+                    upload_queue_size=upload_queue_size,
+                    streaming=streaming
+                ),
+                get_next_shard_index(connector, destination_dir, datafiles_ext),
+                max_files_in_shard,
+                columns_to_save=columns_to_save,
+                workers=workers,
+                pbar=pbar
+            )
+            return
+
         writer = ShardsWriter(
             connector,
             destination_dir,
@@ -475,13 +820,21 @@ class DatasetProcessor(ABC):
             max_files_in_shard=max_files_in_shard,
             datafiles_ext=datafiles_ext,
             archives_ext=archives_ext,
-            filenaming=filenaming
+            filenaming=filenaming,
+            write_tar_index=write_tar_index,
+            upload_queue_size=upload_queue_size,
+            streaming=streaming,
+            max_bytes_in_shard=max_bytes_in_shard
         )
         self._write_dataset(
             writer,
             columns_to_save=columns_to_save,
             dataloader_kwargs={'num_workers': workers},
-            pbar=pbar
+            pbar=pbar,
+            shuffle_buffer_size=shuffle_buffer_size,
+            shuffle_buckets=shuffle_buckets,
+            shuffle_tmp_dir=shuffle_tmp_dir,
+            shuffle_seed=shuffle_seed
         )
 
     def __len__(self) -> int:
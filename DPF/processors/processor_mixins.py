@@ -1,3 +1,5 @@
+from typing import Callable
+
 import pandas as pd
 
 from DPF.configs import DatasetConfig
@@ -9,6 +11,7 @@ class ApplyTransformProcessorMixin:
     """Mixin for DatasetProcessor. Enables the ability to use DPF.transforms. Works only for files datasets"""
     config: DatasetConfig
     _df: pd.DataFrame
+    _get_column: Callable[[str], pd.Series]
 
     def apply_transform(self, transforms: BaseFilesTransforms) -> None:
         """Applies a transformation for dataset`s files. Files are overwritten.
@@ -21,7 +24,8 @@ class ApplyTransformProcessorMixin:
         assert transforms.modality in self.config.modality2datatype
 
         filepath_column = MODALITIES[transforms.modality].path_column
-        filepaths = self._df[filepath_column].tolist()
+        filepaths_column = self._get_column(filepath_column)
+        filepaths = filepaths_column.tolist()
 
         metadata_lists = None
         if len(transforms.required_metadata) > 0:
@@ -40,4 +44,10 @@ class ApplyTransformProcessorMixin:
         # drop metadata columns from original df to replace them
         self._df.drop(columns=transforms.metadata_to_change, errors='ignore', inplace=True)
 
-        self._df = pd.merge(self._df, df_to_merge, on=filepath_column, how='left')
+        if filepath_column in self._df.columns:
+            self._df = pd.merge(self._df, df_to_merge, on=filepath_column, how='left')
+        else:
+            # paths are not stored in dataframe (e.g. paths are built lazily)
+            self._df = pd.merge(
+                self._df, df_to_merge, left_on=filepaths_column.to_numpy(), right_on=filepath_column, how='left'
+            ).drop(columns=filepath_column)
@@ -24,13 +24,30 @@ class ShardedFilesDatasetProcessor(ShardedDatasetProcessor, ApplyTransformProces
         self,
         connector: Connector,
         df: pd.DataFrame,
-        config: ShardedFilesDatasetConfig
+        config: ShardedFilesDatasetConfig,
+        datafile2sidecars: Optional[dict[str, list[str]]] = None
     ):
-        super().__init__(connector, df, config)
+        super().__init__(connector, df, config, datafile2sidecars)
 
     def get_shard_path(self, split_name: str) -> str:
         return self.config.path + '/' + split_name + '/'
 
+    def _compact_shard_files(
+        self,
+        split_name: str,
+        df: pd.DataFrame,
+        destination_dir: str,
+        connector: Connector
+    ) -> None:
+        shard_path = self.get_path_prefix(split_name)
+        new_shard_path = connector.join(destination_dir, split_name)
+        connector.mkdir(new_shard_path)
+        for datatype in self.config.datatypes:
+            if isinstance(datatype, ShardedDataType):
+                for file_name in self._get_file_names(df, datatype):
+                    data = self.connector.read_file(shard_path + file_name, binary=True)
+                    connector.save_file(data, connector.join(new_shard_path, file_name), binary=True)
+
     def validate(
         self,
         validate_filestructure: bool = True,
@@ -60,39 +77,51 @@ class ShardedFilesDatasetProcessor(ShardedDatasetProcessor, ApplyTransformProces
         modalities: list[ModalityName],
         columns_to_use: Optional[list[str]] = None,
         preprocess_f: Callable[[ModalityToDataMapping, dict[str, str]], Any] = identical_preprocess_function,
-        return_none_on_error: bool = False
+        return_none_on_error: bool = False,
+        dataset_kwargs: Optional[dict[str, Any]] = None
     ) -> FilesDataset:
         assert len(set(modalities)) == len(list(modalities))
         datatypes_to_load = [self.config.modality2datatype[m] for m in modalities]
+        split2path_prefix = {
+            i: self.get_path_prefix(i) for i in self.df['split_name'].unique().tolist()
+        }
         return FilesDataset(
             self.connector,
             self._df,
             datatypes_to_load,  # type: ignore
             metadata_columns=columns_to_use,
             preprocess_function=preprocess_f,
-            return_none_on_error=return_none_on_error
+            return_none_on_error=return_none_on_error,
+            split2path_prefix=split2path_prefix,
+            **(dataset_kwargs or {})
         )
 
     def _read_sample_data(
         self,
-        sample: dict[str, str]
+        sample: dict[str, str],
+        modalities: Optional[list[ModalityName]] = None
     ) -> ModalityToDataMapping:
-        path_column2modality: dict[str, ModalityName] = {}
+        path_column2datatype: dict[str, ShardedDataType] = {}
         column2modality: dict[str, ModalityName] = {}
-        for d in self.config.datatypes:
+        if modalities is None:
+            datatypes = self.config.datatypes
+        else:
+            datatypes = [self.config.modality2datatype[m] for m in modalities]
+        for d in datatypes:
             if isinstance(d, ColumnDataType):
                 column2modality[d.column_name] = d.modality.name
             elif isinstance(d, ShardedDataType):
-                path_column2modality[d.modality.path_column] = d.modality.name
+                path_column2datatype[d.modality.path_column] = d
             else:
                 raise ValueError()
 
         modality2data: ModalityToDataMapping = {}
         # read files
-        for col in path_column2modality.keys():
-            modality = path_column2modality[col]
-            file_bytes = self.connector.read_file(sample[col], binary=True).getvalue()
-            modality2data[modality] = file_bytes
+        for col, datatype in path_column2datatype.items():
+            filepath = self.get_path_prefix(sample['split_name']) + self._get_sample_filename(sample, datatype) \
+                if col in self.lazy_path_columns else sample[col]
+            file_bytes = self.connector.read_file(filepath, binary=True).getvalue()
+            modality2data[datatype.modality.name] = file_bytes
         # read data from columns
         for col in column2modality.keys():
             modality = column2modality[col]
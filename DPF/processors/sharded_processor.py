@@ -1,11 +1,26 @@
 import os
 from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Optional
 
 import pandas as pd
+from tqdm.contrib.concurrent import thread_map
 
 from DPF.configs import ShardedDatasetConfig
 from DPF.connectors import Connector
+from DPF.dataloaders.dataloader_utils import get_lazy_path_columns
+from DPF.dataset_reader_utils import (
+    SCHEMA_OVERLAY_FILENAME,
+    SIDECAR_EXT,
+    apply_schema_overlay,
+    get_datafiles_and_sidecars,
+    get_overlay_source_column,
+    get_sidecar_path,
+    read_schema_overlay,
+    save_schema_overlay,
+)
 from DPF.datatypes import ShardedDataType
+from DPF.filters import DataFilter
 from DPF.processors.helpers import DataFramesChanger
 
 from .processor import DatasetProcessor
@@ -18,9 +33,16 @@ class ShardedDatasetProcessor(DatasetProcessor, ABC):
         connector: Connector,
         df: pd.DataFrame,
         config: ShardedDatasetConfig,
+        datafile2sidecars: Optional[dict[str, list[str]]] = None
     ):
         super().__init__(connector, df, config)
         assert 'split_name' in self.columns
+        # sidecar files of shards and columns stored in them, dataset directory is listed on first use if not set.
+        # Columns are cached until files of the dataset are changed
+        self._split2sidecar_paths: Optional[dict[str, list[str]]] = None
+        if datafile2sidecars is not None:
+            self._split2sidecar_paths = self._get_split2sidecar_paths(datafile2sidecars)
+        self._split2sidecar_columns: dict[str, dict[str, list[str]]] = {}
 
     @abstractmethod
     def get_shard_path(self, split_name: str) -> str:
@@ -29,55 +51,584 @@ class ShardedDatasetProcessor(DatasetProcessor, ABC):
     def get_datafile_path(self, split_name: str) -> str:
         return self.config.path+'/'+split_name+'.'+self.config.datafiles_ext  # type: ignore
 
-    def rename_columns(self, column_map: dict[str, str], workers: int = 16) -> list[str]:
+    def get_path_prefix(self, split_name: str) -> str:
+        """Returns prefix of paths to files of the shard (path to archive or folder of the shard with slash)"""
+        return self.get_shard_path(split_name).rstrip('/') + '/'
+
+    @property
+    def lazy_path_columns(self) -> dict[str, str]:
+        """Mapping from path columns that are not stored in dataframe to columns with file names.
+        Dataframe stores only file names if dataset was read with lazy_paths=True
+        """
+        return get_lazy_path_columns(
+            [d for d in self.config.datatypes if isinstance(d, ShardedDataType)], self.columns
+        )
+
+    def get_path_column(self, column: str) -> pd.Series:
+        """Returns paths to files of the path column. If dataframe stores only file names,
+        paths are built from split_name and file names
+
+        Parameters
+        ----------
+        column: str
+            Name of the path column (e.g. image_path)
+
+        Returns
+        -------
+        pd.Series
+            Paths to files
+        """
+        file_name_column = self.lazy_path_columns.get(column)
+        if file_name_column is None:
+            return self._df[column]
+        # prefixes are computed once per shard for categorical split_name
+        prefixes = self._df['split_name'].map(self.get_path_prefix).astype(str)
+        return (prefixes + self._df[file_name_column]).rename(column)
+
+    def _get_column(self, column: str) -> pd.Series:
+        if column in self.lazy_path_columns:
+            return self.get_path_column(column)
+        return super()._get_column(column)
+
+    def _get_sample_filename(self, sample: dict[str, Any], datatype: ShardedDataType) -> str:
+        if datatype.modality.path_column in sample:
+            return os.path.basename(str(sample[datatype.modality.path_column]))
+        return str(sample[datatype.modality.sharded_file_name_column])
+
+    def _group_rows_by_shards(self) -> pd.DataFrame:
+        return self._df.sort_values('split_name', kind='stable')
+
+    def _split_to_parts(self, part_size: int) -> list[tuple[str, pd.DataFrame]]:
+        return [
+            (str(split_name), df_part)
+            for split_name, df_part in self._df.groupby('split_name', sort=True, observed=True)
+        ]
+
+    def apply_data_filter(
+        self,
+        datafilter: DataFilter,
+        validate_filter_result: bool = True,
+        return_none_on_error: bool = False,
+        dataset_kwargs: Optional[dict[str, Any]] = None,
+        checkpoint_dir: Optional[str] = None,
+        checkpoint_size: int = 10000,
+        write_back: bool = False,
+        write_workers: int = 4
+    ) -> None:
+        """Applies a data filter to dataset
+
+        Parameters
+        ----------
+        datafilter: DataFilter
+            Instance of a DataFilter
+        validate_filter_result: bool = True
+            Whether to check the correctness of datafilter result (data integrity)
+        return_none_on_error: bool = False
+            Whether to return None on sample if there is error in dataloader
+        dataset_kwargs: Optional[dict[str, Any]] = None
+            Additional parameters for torch dataset of this format (for example, streaming=True for shards)
+        checkpoint_dir: Optional[str] = None
+            Directory to save results of every processed shard.
+            Results are saved in a subdirectory named by datafilter fingerprint.
+            If run is restarted with the same directory, samples that are saved in checkpoints are not processed again
+        checkpoint_size: int = 10000
+            Not used for sharded datasets, results are saved by shards
+        write_back: bool = False
+            Whether to write result columns to datafiles of shards. Samples of all shards are read in one dataloader pass,
+            datafile of a shard is updated in background threads as soon as all samples of the shard are processed
+        write_workers: int = 4
+            Number of threads to write datafiles if write_back is True
+        """
+        if not write_back:
+            super().apply_data_filter(
+                datafilter, validate_filter_result, return_none_on_error, dataset_kwargs,
+                checkpoint_dir, checkpoint_size
+            )
+            return
+
+        checkpoint_path = self._get_checkpoint_path(datafilter, checkpoint_dir) if checkpoint_dir else None
+        split2sidecar_columns = self._get_sidecar_columns(self.df['split_name'].unique().tolist(), write_workers)
+        futures: list[Future[list[str]]] = []
+        with ThreadPoolExecutor(max_workers=write_workers) as executor:
+
+            def _write_part(part_processor: DatasetProcessor, df_result: pd.DataFrame) -> None:
+                assert isinstance(part_processor, ShardedDatasetProcessor)
+                part_processor._merge_data_filter_result(datafilter, df_result, validate_filter_result)
+                futures.append(executor.submit(
+                    part_processor._update_columns, datafilter.result_columns,
+                    workers=1, allow_partial=True, pbar=False, sidecar=None,
+                    # part is one shard, its datafile is kept in memory between validation and writing
+                    max_cached_bytes=None, split2sidecar_columns=split2sidecar_columns
+                ))
+
+            df_result = self._run_data_filter_by_parts(
+                datafilter, return_none_on_error, dataset_kwargs,
+                self._split_to_parts(checkpoint_size), checkpoint_path, _write_part
+            )
+        errors = [err for future in futures for err in future.result()]
+        self._split2sidecar_columns.clear()
+        assert len(errors) == 0, f"Errors during writing results to datafiles: {errors}"
+        self._merge_data_filter_result(datafilter, df_result, validate_filter_result)
+
+    def _get_schema_overlay_path(self) -> str:
+        return self.connector.join(self.config.path.rstrip('/'), SCHEMA_OVERLAY_FILENAME)
+
+    def _add_schema_overlay_operation(self, operation: dict[str, Any]) -> None:
+        reserved_columns = set(self.config.user_column2default_column.keys()) \
+            | set(self.config.user_column2default_column.values()) | {'split_name'} \
+            | {d.modality.path_column for d in self.config.datatypes if isinstance(d, ShardedDataType)}
+        columns = list(operation["rename"].keys()) + list(operation["rename"].values()) \
+            if "rename" in operation else operation["delete"]
+        for col in columns:
+            assert col not in reserved_columns, f'Column "{col}" is required by dataset config'
+
+        overlay_path = self._get_schema_overlay_path()
+        operations = read_schema_overlay(self.connector, overlay_path)
+        save_schema_overlay(self.connector, overlay_path, operations + [operation])
+
+    def _validate_columns_not_in_schema_overlay(self, columns: list[str]) -> None:
+        operations = read_schema_overlay(self.connector, self._get_schema_overlay_path())
+        if len(operations) == 0:
+            return
+        for col in columns:
+            # column in datafiles should not be renamed or deleted by overlay and should not be a result of renaming
+            is_changed = apply_schema_overlay(pd.DataFrame(columns=[col]), operations).columns.tolist() != [col]
+            assert not is_changed and get_overlay_source_column(col, operations) == col, \
+                f'Column "{col}" is renamed or deleted in schema overlay, use compact_schema_overlay() before changing it'
+
+    def _get_key_column(self) -> str:
+        """Returns column with file names that is used to join datafiles and sidecar files"""
+        key_column = None
+        for d in self.config.datatypes:
+            if isinstance(d, ShardedDataType):
+                key_column = d.user_basename_column_name
+                break
+        assert key_column is not None, "Cant find key column to use for update"
+        return key_column
+
+    @staticmethod
+    def _get_split2sidecar_paths(datafile2sidecars: dict[str, list[str]]) -> dict[str, list[str]]:
+        return {
+            os.path.splitext(os.path.basename(datafile))[0]: sidecar_paths
+            for datafile, sidecar_paths in datafile2sidecars.items()
+        }
+
+    def _get_sidecar_columns(self, splits: list[str], workers: int = 16) -> dict[str, dict[str, list[str]]]:
+        """Returns mapping from splits to names of their sidecar files (column groups) and columns stored in them.
+        Only sidecar files of splits that are not cached are read
+        """
+        if self._split2sidecar_paths is None:
+            _, datafile2sidecars = get_datafiles_and_sidecars(
+                self.connector.listdir(self.config.path.rstrip('/')), self.config.datafiles_ext  # type: ignore
+            )
+            self._split2sidecar_paths = self._get_split2sidecar_paths(datafile2sidecars)
+
+        sidecars = []
+        for split_name in splits:
+            if split_name in self._split2sidecar_columns:
+                continue
+            self._split2sidecar_columns[split_name] = {}
+            for path in self._split2sidecar_paths.get(split_name, []):
+                column_group = os.path.basename(path)[len(split_name)+1:-len('.'+SIDECAR_EXT)]
+                sidecars.append((split_name, column_group, path))
+
+        sidecars_columns = thread_map(
+            lambda sidecar: self.connector.read_dataframe(sidecar[2]).columns.tolist(),
+            sidecars,
+            max_workers=workers,
+            disable=True
+        )
+        key_column = self._get_key_column()
+        for (split_name, column_group, _), columns in zip(sidecars, sidecars_columns):
+            self._split2sidecar_columns[split_name][column_group] = [col for col in columns if col != key_column]
+        return {split_name: self._split2sidecar_columns[split_name] for split_name in splits}
+
+    def _add_sidecar_paths(self, sidecar_paths: list[str], column_group: str) -> None:
+        """Adds sidecar files created by update_columns to the cached list of sidecar files"""
+        if self._split2sidecar_paths is None:
+            return
+        for path in sidecar_paths:
+            split_name = os.path.basename(path)[:-len(f'.{column_group}.{SIDECAR_EXT}')]
+            split_sidecar_paths = self._split2sidecar_paths.setdefault(split_name, [])
+            if path not in split_sidecar_paths:
+                self._split2sidecar_paths[split_name] = split_sidecar_paths + [path]
+
+    @staticmethod
+    def _get_columns_in_sidecars(group2columns: dict[str, list[str]], columns: list[str]) -> dict[str, str]:
+        """Returns mapping from columns that are stored in sidecar files of a shard to names of these sidecars"""
+        column2group: dict[str, str] = {}
+        for column_group, group_columns in sorted(group2columns.items()):
+            for col in group_columns:
+                if col in columns:
+                    assert col not in column2group, \
+                        f'Column "{col}" is stored in sidecars "{column2group[col]}" and "{column_group}"'
+                    column2group[col] = column_group
+        return column2group
+
+    def _get_file_names(self, df: pd.DataFrame, datatype: ShardedDataType) -> pd.Series:
+        """Returns names of files of the datatype in the shard (names of archive members or files in folder)"""
+        if datatype.modality.sharded_file_name_column in df.columns:
+            return df[datatype.modality.sharded_file_name_column].astype(str)
+        return df[datatype.modality.path_column].map(os.path.basename)
+
+    def _get_datafile_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Converts rows of dataframe to rows of datafile: file names instead of paths, column names from config"""
+        df = df.drop(columns=['split_name'])
+        for datatype in self.config.datatypes:
+            if isinstance(datatype, ShardedDataType) and datatype.modality.path_column in df.columns:
+                df.insert(
+                    df.columns.get_loc(datatype.modality.path_column),
+                    datatype.modality.sharded_file_name_column,
+                    self._get_file_names(df, datatype)
+                )
+                df = df.drop(columns=[datatype.modality.path_column])
+        default2user_column = {v: k for k, v in self.config.user_columns_to_rename.items()}
+        return df.rename(columns=default2user_column)
+
+    @abstractmethod
+    def _compact_shard_files(
+        self,
+        split_name: str,
+        df: pd.DataFrame,
+        destination_dir: str,
+        connector: Connector
+    ) -> None:
+        """Copies files of samples in dataframe from the shard to the shard in destination directory"""
+        pass
+
+    def _compact_shard(
+        self,
+        split_name: str,
+        df: pd.DataFrame,
+        destination_dir: str,
+        connector: Connector
+    ) -> Optional[str]:
+        errname = None
+        try:
+            self._compact_shard_files(split_name, df, destination_dir, connector)
+            datafile_path = connector.join(destination_dir, split_name + '.' + self.config.datafiles_ext)  # type: ignore
+            connector.save_dataframe(self._get_datafile_dataframe(df), datafile_path, index=False)
+        except Exception as err:
+            errname = f"Error during compacting shard {split_name}: {err}"
+        return errname
+
+    def compact_to(
+        self,
+        destination_dir: str,
+        workers: int = 16,
+        pbar: bool = True,
+        connector: Optional[Connector] = None
+    ) -> list[str]:
+        """Writes shards with only samples from dataframe (e.g. after filter_df) to destination_dir.
+        Files are copied without decoding, shards keep their names, datafiles have columns of dataframe
+
+        Parameters
+        ----------
+        destination_dir: str
+            Path to directory for compacted dataset
+        workers: int = 16
+            Number of parallel threads
+        pbar: bool = True
+            Whether to show a progress bar
+        connector: Optional[Connector] = None
+            The connector where destination_dir is located. Connector of the dataset is used by default
+
+        Returns
+        -------
+        List[str]
+            List of errors
+        """
+        connector = connector or self.connector
+        destination_dir = destination_dir.rstrip('/')
+        assert connector is not self.connector or destination_dir != self.config.path.rstrip('/'), \
+            "Dataset can not be compacted to the same directory"
+        connector.mkdir(destination_dir)
+        errors = thread_map(
+            lambda item: self._compact_shard(str(item[0]), item[1], destination_dir, connector),
+            list(self._df.groupby('split_name', sort=True, observed=True)),
+            max_workers=workers,
+            disable=not pbar
+        )
+        return [err for err in errors if err is not None]
+
+    def compact_schema_overlay(self, workers: int = 16, pbar: bool = True) -> list[str]:
+        """Applies the schema overlay (columns renamed or deleted with overlay=True)
+        to all datafiles and sidecar files of a dataset and clears the overlay
+
+        Parameters
+        ----------
+        workers: int = 16
+            Number of parallel threads
+        pbar: bool = True
+            Whether to show a progress bar
+
+        Returns
+        -------
+        List[str]
+            List of errors
+        """
+        overlay_path = self._get_schema_overlay_path()
+        operations = read_schema_overlay(self.connector, overlay_path)
+        if len(operations) == 0:
+            return []
+
+        datafiles, datafile2sidecars = get_datafiles_and_sidecars(
+            self.connector.listdir(self.config.path.rstrip('/')), self.config.datafiles_ext  # type: ignore
+        )
+        filepaths = datafiles + [path for sidecars in datafile2sidecars.values() for path in sidecars]
+        helper = DataFramesChanger(filepaths, self.connector, self.config)
+        errors = helper.apply_schema_overlay(operations, max_threads=workers, pbar=pbar)
+        self._split2sidecar_columns.clear()
+        if len(errors) == 0:
+            save_schema_overlay(self.connector, overlay_path, [])
+        return errors
+
+    def rename_columns(
+        self,
+        column_map: dict[str, str],
+        workers: int = 16,
+        max_cached_bytes: Optional[int] = 2 * 1024**3,
+        overlay: bool = False
+    ) -> list[str]:
+        """Renames columns in files of a dataset
+
+        Parameters
+        ----------
+        column_map: Dict[str, str]
+            Mapping of old column name into new column name
+        workers: int = 16
+            Number of parallel threads
+        max_cached_bytes: Optional[int] = 2 * 1024**3
+            Maximum memory size of datafiles that are kept in memory after validation to write them
+            without reading again. Datafiles that don't fit are read twice.
+            All datafiles are kept if None, every datafile is read twice if 0
+        overlay: bool = False
+            Whether to save the operation to the schema overlay of a dataset instead of rewriting datafiles.
+            DatasetReader applies the overlay on read, use compact_schema_overlay() to apply it to datafiles
+
+        Returns
+        -------
+        List[str]
+            List of errors
+        """
+        if overlay:
+            for col_old, col_new in column_map.items():
+                assert col_old in self.columns, f'Dataset dont have "{col_old}" column'
+                assert col_new not in self.columns, f'Dataset already have "{col_new}" column'
+            self._add_schema_overlay_operation({"rename": column_map})
+            self._df.rename(columns=column_map, inplace=True)
+            return []
+
+        self._validate_columns_not_in_schema_overlay(list(column_map.keys()) + list(column_map.values()))
         splits = self.df['split_name'].unique().tolist()
         datafile_paths = [self.get_datafile_path(split) for split in splits]
+        for group2columns in self._get_sidecar_columns(splits, workers).values():
+            column2group = self._get_columns_in_sidecars(
+                group2columns, list(column_map.keys()) + list(column_map.values())
+            )
+            assert len(column2group) == 0, f'Columns {list(column2group)} are stored in sidecar files and cant be renamed'
 
         helper = DataFramesChanger(
-            datafile_paths, self.connector, self.config
+            datafile_paths, self.connector, self.config, max_cached_bytes
         )
         errors = helper.rename_columns(column_map, max_threads=workers)
+        self._split2sidecar_columns.clear()
         self._df.rename(columns=column_map, inplace=True)
         return errors
 
-    def delete_columns(self, columns: list[str], workers: int = 16) -> list[str]:
+    def delete_columns(
+        self,
+        columns: list[str],
+        workers: int = 16,
+        max_cached_bytes: Optional[int] = 2 * 1024**3,
+        overlay: bool = False
+    ) -> list[str]:
+        """Deletes columns in files of a dataset
+
+        Parameters
+        ----------
+        columns: List[str]
+            List of column names to delete
+        workers: int = 16
+            Number of parallel threads
+        max_cached_bytes: Optional[int] = 2 * 1024**3
+            Maximum memory size of datafiles that are kept in memory after validation to write them
+            without reading again. Datafiles that don't fit are read twice.
+            All datafiles are kept if None, every datafile is read twice if 0
+        overlay: bool = False
+            Whether to save the operation to the schema overlay of a dataset instead of rewriting datafiles.
+            DatasetReader applies the overlay on read, use compact_schema_overlay() to apply it to datafiles
+
+        Returns
+        -------
+        List[str]
+            List of errors
+        """
         for col in columns:
             assert col not in self.config.user_column2default_column.keys(), \
                 f'Column "{col}" is required column for "{self.config.user_column2default_column[col]}"'
 
+        if overlay:
+            for col in columns:
+                assert col in self.columns, f'Dataset dont have "{col}" column'
+            self._add_schema_overlay_operation({"delete": columns})
+            self._df.drop(columns=columns, inplace=True)
+            return []
+
+        self._validate_columns_not_in_schema_overlay(columns)
+
         splits = self.df['split_name'].unique().tolist()
-        datafile_paths = [self.get_datafile_path(split) for split in splits]
+        split2sidecar_columns = self._get_sidecar_columns(splits, workers)
+        # columns stored in sidecar files are deleted from these files, other columns from datafiles
+        path2columns = {}
+        for split in splits:
+            datafile_path = self.get_datafile_path(split)
+            column2group = self._get_columns_in_sidecars(split2sidecar_columns.get(split, {}), columns)
+            path2columns[datafile_path] = [col for col in columns if col not in column2group]
+            for column_group in sorted(set(column2group.values())):
+                path2columns[get_sidecar_path(datafile_path, column_group)] = [
+                    col for col, group in column2group.items() if group == column_group
+                ]
 
         helper = DataFramesChanger(
-            datafile_paths, self.connector, self.config
+            list(path2columns.keys()), self.connector, self.config, max_cached_bytes
         )
-        errors = helper.delete_columns(columns, max_threads=workers)
+        errors = helper.delete_columns_by_paths(path2columns, max_threads=workers)
+        self._split2sidecar_columns.clear()
         self._df.drop(columns=columns, inplace=True)
         return errors
 
-    def update_columns(self, columns: list[str], workers: int = 16) -> list[str]:
-        key_column = None
+    def update_columns(
+        self,
+        columns: list[str],
+        workers: int = 16,
+        allow_partial: bool = False,
+        pbar: bool = True,
+        sidecar: Optional[str] = None,
+        max_cached_bytes: Optional[int] = 2 * 1024**3
+    ) -> list[str]:
+        """Updates info in columns or adds new columns in files of a dataset
+
+        Parameters
+        ----------
+        columns: List[str]
+            List of column names to add or update
+        workers: int = 16
+            Number of parallel threads
+        allow_partial: bool = False
+            Whether dataframe can contain only part of rows of datafiles (e.g. after filter_df).
+            Other rows of datafiles keep old values (NaN for new columns)
+        pbar: bool = True
+            Whether to show a progress bar
+        sidecar: Optional[str] = None
+            Name of a column group. If set, columns are written to sidecar files of shards
+            (split.<sidecar>.parquet next to the datafile) instead of rewriting datafiles.
+            Sidecar files are joined with datafiles by DatasetReader.
+            If None, columns that are already stored in sidecar files are updated in these files
+        max_cached_bytes: Optional[int] = 2 * 1024**3
+            Maximum memory size of datafiles that are kept in memory after validation to write them
+            without reading again. Datafiles that don't fit are read twice.
+            All datafiles are kept if None, every datafile is read twice if 0
+
+        Returns
+        -------
+        List[str]
+            List of errors
+        """
+        splits = self.df['split_name'].unique().tolist()
+        return self._update_columns(
+            columns, workers, allow_partial, pbar, sidecar, max_cached_bytes,
+            self._get_sidecar_columns(splits, workers)
+        )
+
+    def _update_columns(
+        self,
+        columns: list[str],
+        workers: int,
+        allow_partial: bool,
+        pbar: bool,
+        sidecar: Optional[str],
+        max_cached_bytes: Optional[int],
+        split2sidecar_columns: dict[str, dict[str, list[str]]]
+    ) -> list[str]:
+        key_column = self._get_key_column()
         path_column = None
+        file_name_column = None
         for d in self.config.datatypes:
             if isinstance(d, ShardedDataType):
-                key_column = d.user_basename_column_name
                 path_column = d.modality.path_column
+                file_name_column = self.lazy_path_columns.get(path_column)
                 break
-        assert key_column is not None, "Cant find key column to use for update"
         assert key_column not in columns, f'Cant update key column "{key_column}"'
+        self._validate_columns_not_in_schema_overlay(columns)
 
         def _add_key_column(data: pd.DataFrame) -> pd.DataFrame:
-            data[key_column] = data[path_column].apply(os.path.basename)
+            if file_name_column is not None:
+                data = data.rename(columns={file_name_column: key_column})
+            else:
+                data[key_column] = data[path_column].apply(os.path.basename)
+                # path column is built by reader and is not stored in datafiles
+                data = data.drop(columns=[path_column])
             return data
 
-        table_to_new_data = self.df.groupby("split_name").apply(
-            lambda x: list(v for v in _add_key_column(x[[path_column]+columns]).to_dict("records"))  # noqa
+        source_column = file_name_column or path_column
+        table_to_new_data = self.df.groupby("split_name", observed=True).apply(
+            lambda x: list(v for v in _add_key_column(x[[source_column]+columns]).to_dict("records"))  # noqa
         )
-        table_to_new_data.index = [self.get_datafile_path(i) for i in table_to_new_data.index]
 
         helper = DataFramesChanger(
-            list(table_to_new_data.keys()), self.connector, self.config
+            [self.get_datafile_path(split) for split in table_to_new_data.index],
+            self.connector, self.config, max_cached_bytes
         )
-        errors = helper.update_columns(key_column, dict(table_to_new_data), max_threads=workers)
+        existing_sidecars = {
+            get_sidecar_path(self.get_datafile_path(split), column_group)
+            for split, group2columns in split2sidecar_columns.items() for column_group in group2columns
+        }
+        if sidecar is not None:
+            for split in table_to_new_data.index:
+                group2columns = split2sidecar_columns.get(split, {})
+                for col, column_group in self._get_columns_in_sidecars(group2columns, columns).items():
+                    assert column_group == sidecar, f'Column "{col}" is stored in sidecar files "{column_group}"'
+            sidecar2new_data = {
+                get_sidecar_path(self.get_datafile_path(split), sidecar): data
+                for split, data in table_to_new_data.items()
+            }
+            errors = helper.update_sidecars(
+                key_column, sidecar2new_data, existing_sidecars, max_threads=workers, pbar=pbar
+            )
+            if len(errors) == 0:
+                self._add_sidecar_paths(list(sidecar2new_data.keys()), sidecar)
+            else:
+                self._split2sidecar_paths = None
+            self._split2sidecar_columns.clear()
+            return errors
+
+        # columns stored in sidecar files are updated in these files, other columns in datafiles
+        datafile2data = {}
+        sidecar2data = {}
+        for split, data in table_to_new_data.items():
+            datafile_path = self.get_datafile_path(split)
+            column2group = self._get_columns_in_sidecars(split2sidecar_columns.get(split, {}), columns)
+            for column_group in sorted(set(column2group.values())):
+                group_columns = [key_column] + [col for col, group in column2group.items() if group == column_group]
+                sidecar2data[get_sidecar_path(datafile_path, column_group)] = [
+                    {col: row[col] for col in group_columns} for row in data
+                ]
+            datafile_columns = [col for col in columns if col not in column2group]
+            if len(datafile_columns) > 0:
+                datafile2data[datafile_path] = [
+                    {col: row[col] for col in [key_column] + datafile_columns} for row in data
+                ]
+
+        errors = []
+        if len(datafile2data) > 0:
+            errors.extend(helper.update_columns(
+                key_column, datafile2data, max_threads=workers, pbar=pbar, allow_partial=allow_partial
+            ))
+        if len(sidecar2data) > 0:
+            errors.extend(helper.update_sidecars(
+                key_column, sidecar2data, existing_sidecars, max_threads=workers, pbar=pbar
+            ))
+        self._split2sidecar_columns.clear()
         return errors
 
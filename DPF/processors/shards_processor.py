@@ -1,4 +1,5 @@
-import os
+import io
+import tarfile
 from typing import Any, Callable, Optional
 
 import pandas as pd
@@ -9,6 +10,13 @@ from DPF.dataloaders import ShardsDataset, identical_preprocess_function
 from DPF.datatypes import ColumnDataType, ShardedDataType
 from DPF.modalities import ModalityName
 from DPF.types import ModalityToDataMapping
+from DPF.utils.tar_index import (
+    build_tar_index,
+    build_tar_indexes,
+    read_tar_index,
+    read_tar_member,
+    save_tar_index,
+)
 from DPF.validators import ValidationResult
 from DPF.validators.format_validators import ShardsValidator
 
@@ -22,13 +30,61 @@ class ShardsDatasetProcessor(ShardedDatasetProcessor):
         self,
         connector: Connector,
         df: pd.DataFrame,
-        config: ShardedDatasetConfig
+        config: ShardedDatasetConfig,
+        datafile2sidecars: Optional[dict[str, list[str]]] = None
     ):
-        super().__init__(connector, df, config)
+        super().__init__(connector, df, config, datafile2sidecars)
 
     def get_shard_path(self, split_name: str) -> str:
         return self.config.path + '/' + split_name + '.' + self.config.archives_ext
 
+    def _compact_shard_files(
+        self,
+        split_name: str,
+        df: pd.DataFrame,
+        destination_dir: str,
+        connector: Connector
+    ) -> None:
+        file_names: set[str] = set()
+        for datatype in self.config.datatypes:
+            if isinstance(datatype, ShardedDataType):
+                file_names.update(self._get_file_names(df, datatype))
+
+        # members are copied as raw bytes, files are not extracted and decoded
+        tar = self.connector.read_tar(self.get_shard_path(split_name))
+        tar_bytes = io.BytesIO()
+        with tarfile.open(fileobj=tar_bytes, mode="w") as new_tar:
+            for member in tar:
+                if member.isfile() and member.name in file_names:
+                    new_tar.addfile(member, tar.extractfile(member))
+        tar.close()
+
+        tar_path = connector.join(destination_dir, split_name + '.' + self.config.archives_ext)
+        tar_bytes.seek(0)
+        tar_index = build_tar_index(tarfile.open(fileobj=tar_bytes, mode="r"))
+        connector.save_file(tar_bytes, tar_path, binary=True)
+        save_tar_index(connector, tar_index, tar_path)
+
+    def build_tar_indexes(self, workers: int = 16, pbar: bool = True) -> list[str]:
+        """Builds index sidecars (member offsets) for archives of a dataset.
+        Indexed archives allow to read single samples without downloading the whole archive
+
+        Parameters
+        ----------
+        workers: int = 16
+            Number of parallel threads
+        pbar: bool = True
+            Whether to show a progress bar
+
+        Returns
+        -------
+        List[str]
+            List of errors
+        """
+        splits = self.df['split_name'].unique().tolist()
+        tar_paths = [self.get_shard_path(split) for split in splits]
+        return build_tar_indexes(self.connector, tar_paths, workers=workers, pbar=pbar)
+
     def validate(
         self,
         validate_filestructure: bool = True,
@@ -57,7 +113,8 @@ class ShardsDatasetProcessor(ShardedDatasetProcessor):
         modalities: list[ModalityName],
         columns_to_use: Optional[list[str]] = None,
         preprocess_f: Callable[[ModalityToDataMapping, dict[str, str]], Any] = identical_preprocess_function,
-        return_none_on_error: bool = False
+        return_none_on_error: bool = False,
+        dataset_kwargs: Optional[dict[str, Any]] = None
     ) -> ShardsDataset:
         assert len(set(modalities)) == len(list(modalities))
         split2archive_path = {
@@ -71,33 +128,50 @@ class ShardsDatasetProcessor(ShardedDatasetProcessor):
             datatypes_to_load,  # type: ignore
             metadata_columns=columns_to_use,
             preprocess_function=preprocess_f,
-            return_none_on_error=return_none_on_error
+            return_none_on_error=return_none_on_error,
+            **(dataset_kwargs or {})
         )
 
     def _read_sample_data(
         self,
-        sample: dict[str, str]
+        sample: dict[str, str],
+        modalities: Optional[list[ModalityName]] = None
     ) -> ModalityToDataMapping:
         tar_path = self.get_shard_path(sample['split_name'])
-        path_column2modality: dict[str, ModalityName] = {}
+        path_column2datatype: dict[str, ShardedDataType] = {}
         column2modality: dict[str, ModalityName] = {}
-        for d in self.config.datatypes:
+        if modalities is None:
+            datatypes = self.config.datatypes
+        else:
+            datatypes = [self.config.modality2datatype[m] for m in modalities]
+        for d in datatypes:
             if isinstance(d, ColumnDataType):
                 column2modality[d.column_name] = d.modality.name
             elif isinstance(d, ShardedDataType):
-                path_column2modality[d.modality.path_column] = d.modality.name
+                path_column2datatype[d.modality.path_column] = d
             else:
                 raise ValueError()
 
-        tar = self.connector.read_tar(tar_path)
+        # archive is not read if there are no file modalities to read
+        tar_index = None
+        tar = None
+        if len(path_column2datatype) > 0:
+            tar_index = read_tar_index(self.connector, tar_path)
+            if tar_index is None:
+                tar = self.connector.read_tar(tar_path)
 
         modality2data: ModalityToDataMapping = {}
         # read files
-        for col in path_column2modality.keys():
-            modality = path_column2modality[col]
-            filename = os.path.basename(sample[col])
-            file_bytes = tar.extractfile(filename).read()  # type: ignore
+        for datatype in path_column2datatype.values():
+            modality = datatype.modality.name
+            filename = self._get_sample_filename(sample, datatype)
+            if tar_index is not None:
+                file_bytes = read_tar_member(self.connector, tar_path, tar_index, filename)
+            else:
+                file_bytes = tar.extractfile(filename).read()  # type: ignore
             modality2data[modality] = file_bytes
+        if tar is not None:
+            tar.close()
         # read data from columns
         for col in column2modality.keys():
             modality = column2modality[col]
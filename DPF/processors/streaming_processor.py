@@ -0,0 +1,165 @@
+from collections.abc import Iterator
+from typing import Any, Callable, Optional
+
+import pandas as pd
+from tqdm.auto import tqdm
+
+from DPF.configs import ShardedDatasetConfig
+from DPF.filters import ColumnFilter, DataFilter
+
+from .sharded_processor import ShardedDatasetProcessor
+
+
+class StreamingShardedDatasetProcessor:
+    """Processor for sharded datasets that don't fit in memory.
+    Dataset is processed by groups of shards: metadata of a group is read, filters are applied
+    and results are written back to datafiles of the group before the next group is read.
+    Dataframe of the whole dataset is never created
+
+    Attributes
+    ----------
+    config: ShardedDatasetConfig
+        Dataset config
+    datafiles: list[str]
+        Paths to datafiles of the dataset
+    shards_per_group: int
+        Number of shards processed at once
+    """
+
+    def __init__(
+        self,
+        config: ShardedDatasetConfig,
+        datafiles: list[str],
+        read_group: Callable[[list[str]], ShardedDatasetProcessor],
+        shards_per_group: int = 1,
+        pbar: bool = True
+    ):
+        """
+        Parameters
+        ----------
+        config: ShardedDatasetConfig
+            Dataset config
+        datafiles: list[str]
+            Paths to datafiles of the dataset
+        read_group: Callable[[list[str]], ShardedDatasetProcessor]
+            Function that reads datafiles of a group of shards to processor
+        shards_per_group: int = 1
+            Number of shards processed at once
+        pbar: bool = True
+            Whether to show progress bar over groups of shards
+        """
+        assert shards_per_group > 0, "shards_per_group should be positive"
+        self.config = config
+        self.datafiles = sorted(datafiles)
+        self.shards_per_group = shards_per_group
+        self.pbar = pbar
+        self._read_group = read_group
+        self._conditions: list[Callable[[pd.DataFrame], pd.Series]] = []
+
+    @property
+    def groups(self) -> list[list[str]]:
+        """Datafiles of groups of shards"""
+        return [
+            self.datafiles[i:i+self.shards_per_group]
+            for i in range(0, len(self.datafiles), self.shards_per_group)
+        ]
+
+    def filter_df(self, condition: Callable[[pd.DataFrame], pd.Series]) -> None:
+        """Adds a condition filter for dataframes of groups of shards.
+        Only rows matching all conditions are processed by filters, other rows of datafiles are not changed
+
+        Parameters
+        ----------
+        condition: Callable[[pd.DataFrame], pd.Series]
+            Function that returns condition for dataframe of a group, df = df[condition(df)] will be used
+        """
+        self._conditions.append(condition)
+
+    def iter_processors(self) -> Iterator[ShardedDatasetProcessor]:
+        """Iterates over processors of groups of shards (with filter_df conditions applied)
+
+        Returns
+        -------
+        Iterator[ShardedDatasetProcessor]
+            Processors of groups of shards
+        """
+        for group in tqdm(self.groups, disable=not self.pbar):
+            processor = self._read_group(group)
+            for condition in self._conditions:
+                processor.filter_df(condition(processor.df))
+            yield processor
+
+    def apply_data_filter(
+        self,
+        datafilter: DataFilter,
+        validate_filter_result: bool = True,
+        return_none_on_error: bool = False,
+        dataset_kwargs: Optional[dict[str, Any]] = None,
+        workers: int = 16
+    ) -> list[str]:
+        """Applies a data filter to every group of shards and writes results to datafiles of the group
+
+        Parameters
+        ----------
+        datafilter: DataFilter
+            Instance of a DataFilter
+        validate_filter_result: bool = True
+            Whether to check the correctness of datafilter result (data integrity)
+        return_none_on_error: bool = False
+            Whether to return None on sample if there is error in dataloader
+        dataset_kwargs: Optional[dict[str, Any]] = None
+            Additional parameters for torch dataset of this format (for example, streaming=True for shards)
+        workers: int = 16
+            Number of parallel threads to write datafiles
+
+        Returns
+        -------
+        List[str]
+            List of errors
+        """
+        errors = []
+        for processor in self.iter_processors():
+            if len(processor) == 0:
+                continue
+            processor.apply_data_filter(
+                datafilter,
+                validate_filter_result=validate_filter_result,
+                return_none_on_error=return_none_on_error,
+                dataset_kwargs=dataset_kwargs
+            )
+            errors.extend(processor.update_columns(
+                datafilter.result_columns, workers=workers, allow_partial=True, pbar=False
+            ))
+        return errors
+
+    def apply_column_filter(
+        self,
+        column_filter: ColumnFilter,
+        validate_filter_result: bool = True,
+        workers: int = 16
+    ) -> list[str]:
+        """Applies a column filter to every group of shards and writes results to datafiles of the group
+
+        Parameters
+        ----------
+        column_filter: ColumnFilter
+            Instance of a ColumnFilter
+        validate_filter_result: bool = True
+            Whether to check the correctness of filter result (data integrity)
+        workers: int = 16
+            Number of parallel threads to write datafiles
+
+        Returns
+        -------
+        List[str]
+            List of errors
+        """
+        errors = []
+        for processor in self.iter_processors():
+            if len(processor) == 0:
+                continue
+            processor.apply_column_filter(column_filter, validate_filter_result=validate_filter_result)
+            errors.extend(processor.update_columns(
+                column_filter.result_columns, workers=workers, allow_partial=True, pbar=False
+            ))
+        return errors
@@ -22,20 +22,34 @@ class ShardedFilesWriter(ABSWriter):
         connector: Connector,
         destination_dir: str,
         keys_mapping: Optional[dict[str, str]] = None,
-        max_files_in_shard: int = 1000,
+        max_files_in_shard: Optional[int] = 1000,
         datafiles_ext: str = "csv",
-        filenaming: str = "counter"
+        filenaming: str = "counter",
+        start_shard_index: Optional[int] = None,
+        max_bytes_in_shard: Optional[int] = None
     ) -> None:
         self.connector = connector
         self.destination_dir = destination_dir
         self.keys_mapping = keys_mapping
         self.max_files_in_shard = max_files_in_shard
+        self.max_bytes_in_shard = max_bytes_in_shard
+        assert max_files_in_shard is not None or max_bytes_in_shard is not None, \
+            "max_files_in_shard or max_bytes_in_shard should be set"
         self.datafiles_ext = "." + datafiles_ext.lstrip(".")
         self.filenaming = filenaming
         assert self.filenaming in ["counter", "uuid"], "Invalid files naming"
 
         self.df_raw: list[dict[str, Any]] = []
-        self.shard_index, self.last_file_index = self._init_writer_from_last_uploaded_file()
+        # number of samples and bytes of files written to the current shard
+        self.files_in_shard = 0
+        self.bytes_in_shard = 0
+        if start_shard_index is None:
+            self.shard_index, self.last_file_index = self._init_writer_from_last_uploaded_file()
+        else:
+            # writer owns shards starting from start_shard_index, existing shards are not appended
+            assert self.max_files_in_shard is not None, "max_files_in_shard should be set to start from shard index"
+            self.connector.mkdir(self.destination_dir)
+            self.shard_index, self.last_file_index = start_shard_index, start_shard_index*self.max_files_in_shard
         self.last_path_to_dir: str = None  # type: ignore
 
     def save_sample(
@@ -59,6 +73,7 @@ class ShardedFilesWriter(ABSWriter):
             table_data[MODALITIES[modality].sharded_file_name_column] = filename
             path_to_file = self.connector.join(path_to_dir, filename)
             self.connector.save_file(file_bytes, path_to_file, binary=True)
+            self.bytes_in_shard += len(file_bytes)
 
         if self.keys_mapping:
             table_data = rename_dict_keys(table_data, self.keys_mapping)
@@ -96,8 +111,10 @@ class ShardedFilesWriter(ABSWriter):
         filenames = [os.path.basename(f) for f in filepaths]
         names = [os.path.splitext(f)[0] for f in filenames if not f.startswith('.')]
         if len(names) == 0:
-            return int(last_dir), int(last_dir)*self.max_files_in_shard
+            return int(last_dir), int(last_dir)*(self.max_files_in_shard or 0)
 
+        # sizes of existing files are not known, only new files are counted in bytes_in_shard
+        self.files_in_shard = len(names)
         if self.filenaming == "counter":
             if all(name.isdigit() for name in names):
                 index = int(sorted(names)[-1]) + 1
@@ -120,12 +137,20 @@ class ShardedFilesWriter(ABSWriter):
     def _calculate_current_dirname(self) -> str:
         return str(self.shard_index)
 
+    def _is_shard_full(self) -> bool:
+        if self.max_files_in_shard is not None and self.files_in_shard >= self.max_files_in_shard:
+            return True
+        return self.max_bytes_in_shard is not None and self.bytes_in_shard >= self.max_bytes_in_shard
+
     def _try_close_batch(self) -> None:
         old_dirname = self._calculate_current_dirname()
 
         self.last_file_index += 1
-        if self.last_file_index % self.max_files_in_shard == 0:
+        self.files_in_shard += 1
+        if self._is_shard_full():
             self.shard_index += 1
+            self.files_in_shard = 0
+            self.bytes_in_shard = 0
 
         new_dirname = self._calculate_current_dirname()
         if old_dirname != new_dirname:
@@ -1,14 +1,18 @@
 import io
 import os
+import queue
 import tarfile
+import threading
 import uuid
+from functools import partial
 from types import TracebackType
-from typing import Any, Optional, Union
+from typing import Any, BinaryIO, Callable, Optional, Union
 
 import pandas as pd
 
 from DPF.connectors import Connector
 from DPF.modalities import MODALITIES
+from DPF.utils.tar_index import TarIndex, build_tar_index, save_tar_index
 
 from .filewriter import ABSWriter
 from .utils import rename_dict_keys
@@ -17,6 +21,11 @@ from .utils import rename_dict_keys
 class ShardsWriter(ABSWriter):
     """
     ShardsFileWriter
+
+    With upload_queue_size > 0 completed shards are uploaded by a background thread, while next shards are written.
+    At most upload_queue_size shards wait for upload, save_sample blocks when the queue is full.
+    With streaming=True archives are written to connector.open_write (multipart upload for S3)
+    while samples are added, so the whole archive is not kept in memory
     """
 
     def __init__(
@@ -24,24 +33,52 @@ class ShardsWriter(ABSWriter):
         connector: Connector,
         destination_dir: str,
         keys_to_rename: Optional[dict[str, str]] = None,
-        max_files_in_shard: int = 1000,
+        max_files_in_shard: Optional[int] = 1000,
         datafiles_ext: str = "csv",
         archives_ext: str = "tar",
-        filenaming: str = "counter"
+        filenaming: str = "counter",
+        write_tar_index: bool = True,
+        start_shard_index: Optional[int] = None,
+        max_bytes_in_shard: Optional[int] = None,
+        upload_queue_size: int = 0,
+        streaming: bool = False
     ) -> None:
         self.connector = connector
         self.destination_dir = destination_dir
         self.keys_to_rename = keys_to_rename
         self.max_files_in_shard = max_files_in_shard
+        self.max_bytes_in_shard = max_bytes_in_shard
+        assert max_files_in_shard is not None or max_bytes_in_shard is not None, \
+            "max_files_in_shard or max_bytes_in_shard should be set"
         self.datafiles_ext = "." + datafiles_ext.lstrip(".")
         self.archives_ext = "." + archives_ext.lstrip(".")
         self.filenaming = filenaming
         assert self.filenaming in ["counter", "uuid"], "Invalid files naming"
+        self.write_tar_index = write_tar_index
+        assert upload_queue_size >= 0, "upload_queue_size should be non-negative"
+        self.upload_queue_size = upload_queue_size
+        self.streaming = streaming
+
+        # upload thread is started on the first flush, so writer can be pickled before writing
+        self._upload_queue: Optional[queue.Queue[Optional[Callable[[], None]]]] = None
+        self._upload_thread: Optional[threading.Thread] = None
+        self._upload_errors: list[Exception] = []
+        self._tar_stream: Optional[BinaryIO] = None
+        self._tar_index: TarIndex = {}
 
         self.df_raw: list[dict[str, Any]] = []
         self.tar_bytes = io.BytesIO()
         self.tar: tarfile.TarFile = None  # type: ignore
-        self.shard_index, self.last_file_index = self._init_writer_from_last_uploaded_file()
+        # number of samples and bytes of files written to the current shard
+        self.files_in_shard = 0
+        self.bytes_in_shard = 0
+        if start_shard_index is None:
+            self.shard_index, self.last_file_index = self._init_writer_from_last_uploaded_file()
+        else:
+            # writer owns shards starting from start_shard_index, existing shards are not appended
+            assert self.max_files_in_shard is not None, "max_files_in_shard should be set to start from shard index"
+            self.connector.mkdir(self.destination_dir)
+            self.shard_index, self.last_file_index = start_shard_index, start_shard_index*self.max_files_in_shard
 
     def save_sample(
         self,
@@ -52,7 +89,13 @@ class ShardsWriter(ABSWriter):
             table_data = {}
         # check tar
         if self.tar is None:
-            self.tar = tarfile.open(mode="w", fileobj=self.tar_bytes)
+            if self.streaming:
+                self._tar_stream = self.connector.open_write(
+                    self.connector.join(self.destination_dir, self._calculate_current_tarname())
+                )
+                self.tar = tarfile.open(mode="w", fileobj=self._tar_stream)
+            else:
+                self.tar = tarfile.open(mode="w", fileobj=self.tar_bytes)
 
         # writing to file
         for modality, (extension, file_bytes) in modality2sample_data.items():
@@ -60,6 +103,11 @@ class ShardsWriter(ABSWriter):
             table_data[MODALITIES[modality].sharded_file_name_column] = filename
             img_tar_info, fp = self._prepare_image_for_tar_format(file_bytes, filename)
             self.tar.addfile(img_tar_info, fp)
+            if self._tar_stream is not None and self.write_tar_index:
+                # member data ends at the current offset and is padded to the tar block size
+                blocks = (img_tar_info.size + tarfile.BLOCKSIZE - 1) // tarfile.BLOCKSIZE
+                self._tar_index[filename] = (self.tar.offset - blocks*tarfile.BLOCKSIZE, img_tar_info.size)
+        self.bytes_in_shard = self.tar.offset
 
         if self.keys_to_rename:
             table_data = rename_dict_keys(table_data, self.keys_to_rename)
@@ -85,10 +133,52 @@ class ShardsWriter(ABSWriter):
         exception_value: Union[BaseException, None],
         exception_traceback: Union[TracebackType, None],
     ) -> None:
-        if len(self.df_raw) != 0:
-            self._flush(self._calculate_current_tarname())
+        try:
+            if len(self.df_raw) != 0:
+                self._flush(self._calculate_current_tarname())
+        finally:
+            self._wait_for_uploads()
         self.last_file_index = 0
 
+    def _upload_worker(self) -> None:
+        assert self._upload_queue is not None
+        while True:
+            job = self._upload_queue.get()
+            if job is None:
+                break
+            try:
+                job()
+            except Exception as err:
+                self._upload_errors.append(err)
+
+    def _raise_upload_errors(self) -> None:
+        if len(self._upload_errors) > 0:
+            err = self._upload_errors[0]
+            self._upload_errors = []
+            raise err
+
+    def _run_upload(self, job: Callable[[], None]) -> None:
+        if self.upload_queue_size == 0:
+            job()
+            return
+
+        self._raise_upload_errors()
+        if self._upload_thread is None:
+            self._upload_queue = queue.Queue(maxsize=self.upload_queue_size)
+            self._upload_thread = threading.Thread(target=self._upload_worker, daemon=True)
+            self._upload_thread.start()
+        assert self._upload_queue is not None
+        self._upload_queue.put(job)
+
+    def _wait_for_uploads(self) -> None:
+        if self._upload_thread is not None:
+            assert self._upload_queue is not None
+            self._upload_queue.put(None)
+            self._upload_thread.join()
+            self._upload_thread = None
+            self._upload_queue = None
+        self._raise_upload_errors()
+
     def _init_writer_from_last_uploaded_file(self) -> tuple[int, int]:
         self.connector.mkdir(self.destination_dir)
         list_csv = [
@@ -109,6 +199,7 @@ class ShardsWriter(ABSWriter):
             self.connector.join(self.destination_dir, last_csv + self.archives_ext), binary=True
         )
         self.tar = tarfile.open(mode="a", fileobj=self.tar_bytes)
+        self.files_in_shard = len(self.df_raw)
         #
         list_files = [os.path.splitext(data["image_name"])[0] for data in self.df_raw]
         if self.filenaming == "counter":
@@ -131,12 +222,20 @@ class ShardsWriter(ABSWriter):
             raise ValueError(f"Invalid filenaming type: {self.filenaming}")
         return filename
 
+    def _is_shard_full(self) -> bool:
+        if self.max_files_in_shard is not None and self.files_in_shard >= self.max_files_in_shard:
+            return True
+        return self.max_bytes_in_shard is not None and self.bytes_in_shard >= self.max_bytes_in_shard
+
     def _try_close_batch(self) -> None:
         old_tarname = self._calculate_current_tarname()
 
         self.last_file_index += 1
-        if self.last_file_index % self.max_files_in_shard == 0:
+        self.files_in_shard += 1
+        if self._is_shard_full():
             self.shard_index += 1
+            self.files_in_shard = 0
+            self.bytes_in_shard = 0
 
         new_tarname = self._calculate_current_tarname()
         if old_tarname != new_tarname:
@@ -148,17 +247,36 @@ class ShardsWriter(ABSWriter):
             columns=self._rearrange_cols(list(self.df_raw[0].keys()))
         )
         path_to_csv_file = self.connector.join(self.destination_dir, filename)
-        self.connector.save_dataframe(df_to_save, path_to_csv_file, index=False)
+        self._run_upload(partial(self.connector.save_dataframe, df_to_save, path_to_csv_file, index=False))
         self.df_raw = []
 
+    def _upload_tar(self, tar_bytes: io.BytesIO, tar_path: str) -> None:
+        tar_index = None
+        if self.write_tar_index:
+            # offsets of members are known only when archive is opened for reading
+            tar_bytes.seek(0)
+            tar_index = build_tar_index(tarfile.open(fileobj=tar_bytes, mode="r"))
+        tar_bytes.seek(0)
+        self.connector.save_file(tar_bytes, tar_path, binary=True)
+        if tar_index is not None:
+            save_tar_index(self.connector, tar_index, tar_path)
+
+    def _close_tar_stream(self, tar_stream: BinaryIO, tar_index: TarIndex, tar_path: str) -> None:
+        tar_stream.close()
+        if self.write_tar_index:
+            save_tar_index(self.connector, tar_index, tar_path)
+
     def _flush_and_upload_tar(self, filename: str) -> None:
         self.tar.close()
-        self.tar_bytes.seek(0)
-        self.connector.save_file(
-            self.tar_bytes, self.connector.join(self.destination_dir, filename), binary=True
-        )
+        tar_path = self.connector.join(self.destination_dir, filename)
+        if self._tar_stream is not None:
+            self._run_upload(partial(self._close_tar_stream, self._tar_stream, self._tar_index, tar_path))
+        else:
+            self._run_upload(partial(self._upload_tar, self.tar_bytes, tar_path))
         self.tar = None  # type: ignore
         self.tar_bytes = io.BytesIO()
+        self._tar_stream = None
+        self._tar_index = {}
 
     def _flush(self, tarname: str) -> None:
         self._flush_and_upload_datafile(tarname[:-4] + self.datafiles_ext)
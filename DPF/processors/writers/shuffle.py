@@ -0,0 +1,114 @@
+import os
+import pickle
+import random
+import tempfile
+from collections.abc import Iterable, Iterator
+from typing import Any, Optional
+
+# modality to (extension, bytes) mapping and metadata of a sample, as they are passed to ABSWriter.save_sample
+WriterSample = tuple[dict[str, tuple[str, bytes]], dict[str, Any]]
+
+
+def shuffle_with_buffer(
+    samples: Iterable[WriterSample],
+    buffer_size: int,
+    seed: Optional[int] = None
+) -> Iterator[WriterSample]:
+    """Shuffles samples with a buffer of fixed size.
+    Every incoming sample replaces a random sample of the full buffer, which is yielded.
+    Samples can move at most by about buffer_size positions, so buffer should contain samples of several shards
+
+    Parameters
+    ----------
+    samples: Iterable[WriterSample]
+        Samples to shuffle
+    buffer_size: int
+        Maximum number of samples kept in memory
+    seed: Optional[int] = None
+        Seed of the random generator. Samples in the same order are shuffled in the same way with the same seed
+
+    Returns
+    -------
+    Iterator[WriterSample]
+        Shuffled samples
+    """
+    assert buffer_size > 0, "buffer_size should be positive"
+    rng = random.Random(seed)
+    buffer: list[WriterSample] = []
+    for sample in samples:
+        if len(buffer) < buffer_size:
+            buffer.append(sample)
+            continue
+        i = rng.randrange(buffer_size)
+        yield buffer[i]
+        buffer[i] = sample
+    rng.shuffle(buffer)
+    yield from buffer
+
+
+def _flush_buckets(bucket_paths: list[str], bucket_buffers: list[list[bytes]]) -> None:
+    # buckets are appended one by one, so only one file is open at a time
+    for path, bucket_buffer in zip(bucket_paths, bucket_buffers):
+        if len(bucket_buffer) > 0:
+            with open(path, "ab") as f:
+                f.writelines(bucket_buffer)
+            bucket_buffer.clear()
+
+
+def shuffle_with_buckets(
+    samples: Iterable[WriterSample],
+    num_buckets: int,
+    tmp_dir: Optional[str] = None,
+    seed: Optional[int] = None,
+    write_buffer_bytes: int = 64 * 1024**2
+) -> Iterator[WriterSample]:
+    """Shuffles samples in two passes: samples are written to random temporary buckets on local disk,
+    then buckets are read one by one and samples of every bucket are shuffled in memory.
+    Memory usage is about 1/num_buckets of the dataset size
+
+    Parameters
+    ----------
+    samples: Iterable[WriterSample]
+        Samples to shuffle
+    num_buckets: int
+        Number of temporary buckets
+    tmp_dir: Optional[str] = None
+        Directory for temporary buckets. Default temporary directory is used if None
+    seed: Optional[int] = None
+        Seed of the random generator. Samples in the same order are shuffled in the same way with the same seed
+    write_buffer_bytes: int = 64 * 1024**2
+        Samples are buffered in memory and appended to bucket files when buffers reach this size,
+        so bucket files are not kept open
+
+    Returns
+    -------
+    Iterator[WriterSample]
+        Shuffled samples
+    """
+    assert num_buckets > 0, "num_buckets should be positive"
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory(dir=tmp_dir) as buckets_dir:
+        bucket_paths = [os.path.join(buckets_dir, f"{i}.pkl") for i in range(num_buckets)]
+        bucket_buffers: list[list[bytes]] = [[] for _ in range(num_buckets)]
+        buffered_bytes = 0
+        for sample in samples:
+            data = pickle.dumps(sample, protocol=pickle.HIGHEST_PROTOCOL)
+            bucket_buffers[rng.randrange(num_buckets)].append(data)
+            buffered_bytes += len(data)
+            if buffered_bytes >= write_buffer_bytes:
+                _flush_buckets(bucket_paths, bucket_buffers)
+                buffered_bytes = 0
+        _flush_buckets(bucket_paths, bucket_buffers)
+
+        for path in bucket_paths:
+            bucket: list[WriterSample] = []
+            if os.path.exists(path):
+                with open(path, "rb") as bucket_file:
+                    while True:
+                        try:
+                            bucket.append(pickle.load(bucket_file))
+                        except EOFError:
+                            break
+                os.remove(path)
+            rng.shuffle(bucket)
+            yield from bucket
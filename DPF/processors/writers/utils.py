@@ -1,7 +1,22 @@
+import os
 from typing import Any
 
+from DPF.connectors import Connector
+
 
 def rename_dict_keys(d: dict[Any, Any], keys_mapping: dict[Any, Any]) -> dict[Any, Any]:
     for k, v in keys_mapping.items():
         d[v] = d.pop(k)
     return d
+
+
+def get_next_shard_index(connector: Connector, destination_dir: str, datafiles_ext: str) -> int:
+    """Returns index of the first shard after the shards existing in destination directory"""
+    datafiles_ext = "." + datafiles_ext.lstrip(".")
+    connector.mkdir(destination_dir)
+    shard_indexes = [
+        int(os.path.basename(filename[: -len(datafiles_ext)]))
+        for filename in connector.listdir(destination_dir)
+        if filename.endswith(datafiles_ext) and os.path.basename(filename[: -len(datafiles_ext)]).isdigit()
+    ]
+    return max(shard_indexes) + 1 if len(shard_indexes) > 0 else 0
@@ -0,0 +1,119 @@
+import json
+import os
+import tarfile
+from functools import partial
+from typing import Optional
+
+from tqdm.contrib.concurrent import thread_map
+
+from DPF.connectors import Connector
+
+TAR_INDEX_EXT = "idx"
+
+# mapping from tar member name to offset of its data and its size in bytes
+TarIndex = dict[str, tuple[int, int]]
+
+
+def get_tar_index_path(tar_path: str) -> str:
+    """Returns path to the index sidecar of the archive (0.tar -> 0.idx)"""
+    return os.path.splitext(tar_path)[0] + '.' + TAR_INDEX_EXT
+
+
+def build_tar_index(tar: tarfile.TarFile) -> TarIndex:
+    """Builds the index of the archive members
+
+    Parameters
+    ----------
+    tar: tarfile.TarFile
+        Opened tar archive
+
+    Returns
+    -------
+    TarIndex
+        Mapping from member name to its data offset and size
+    """
+    return {
+        member.name: (member.offset_data, member.size)
+        for member in tar.getmembers() if member.isfile()
+    }
+
+
+def save_tar_index(connector: Connector, tar_index: TarIndex, tar_path: str) -> None:
+    """Saves the index next to the archive. Should be called after the archive is written:
+    the fingerprint of the archive is saved in the index to detect archives that were changed after indexing
+    """
+    index_data = {
+        "tar_fingerprint": connector.get_file_fingerprint(tar_path),
+        "members": tar_index
+    }
+    connector.save_file(json.dumps(index_data), get_tar_index_path(tar_path), binary=False)
+
+
+def read_tar_index(connector: Connector, tar_path: str) -> Optional[TarIndex]:
+    """Reads the index of the archive. Returns None if the archive is not indexed
+    or if the archive was changed after indexing (offsets in the index are not valid)
+    """
+    try:
+        data = connector.read_file(get_tar_index_path(tar_path), binary=True).getvalue()
+    except FileNotFoundError:
+        return None
+    index_data = json.loads(data)
+    if "members" not in index_data or index_data.get("tar_fingerprint") != connector.get_file_fingerprint(tar_path):
+        return None
+    return {name: (offset, size) for name, (offset, size) in index_data["members"].items()}
+
+
+def read_tar_member(
+    connector: Connector,
+    tar_path: str,
+    tar_index: TarIndex,
+    filename: str
+) -> bytes:
+    """Reads one member of the archive using its index. Raises KeyError if there is no such member"""
+    offset, size = tar_index[filename]
+    return connector.read_range(tar_path, offset, size)
+
+
+def index_tar(connector: Connector, tar_path: str) -> Optional[str]:
+    errname = None
+    try:
+        tar = connector.read_tar(tar_path)
+        tar_index = build_tar_index(tar)
+        tar.close()
+        save_tar_index(connector, tar_index, tar_path)
+    except Exception as err:
+        errname = f"Error during indexing archive {tar_path}: {err}"
+    return errname
+
+
+def build_tar_indexes(
+    connector: Connector,
+    tar_paths: list[str],
+    workers: int = 16,
+    pbar: bool = True
+) -> list[str]:
+    """Builds and saves index sidecars for archives
+
+    Parameters
+    ----------
+    connector: Connector
+        Connector where archives are located
+    tar_paths: list[str]
+        Paths to archives to index
+    workers: int = 16
+        Number of parallel threads
+    pbar: bool = True
+        Whether to show a progress bar
+
+    Returns
+    -------
+    list[str]
+        List of errors
+    """
+    errors = thread_map(
+        partial(index_tar, connector),
+        tar_paths,
+        max_workers=workers,
+        disable=not pbar
+    )
+    return [err for err in errors if err is not None]
@@ -5,6 +5,7 @@ from tqdm.contrib.concurrent import thread_map
 
 from DPF.configs import ShardedDatasetConfig
 from DPF.connectors import Connector
+from DPF.dataset_reader_utils import get_datafiles_and_sidecars
 from DPF.datatypes import ShardedDataType
 from DPF.validators import ValidationResult, Validator
 from DPF.validators.errors import (
@@ -39,7 +40,12 @@ class ShardedValidator(Validator, ABC):
 
         for datatype in self.config.datatypes:
             if isinstance(datatype, ShardedDataType):
-                has_duplicates = self.merged_df[datatype.modality.path_column].str.split('/').str[-1].duplicated().any()
+                if datatype.modality.path_column in self.merged_df.columns:
+                    filenames = self.merged_df[datatype.modality.path_column].str.split('/').str[-1]
+                else:
+                    # dataframe stores file names instead of paths
+                    filenames = self.merged_df[datatype.modality.sharded_file_name_column]
+                has_duplicates = filenames.duplicated().any()
                 if has_duplicates:
                     errors.append(IsNotKeyError(datatype.user_basename_column_name))
 
@@ -104,7 +110,14 @@ class ShardedValidator(Validator, ABC):
         workers: int = 4,
         pbar: bool = True
     ) -> ValidationResult:
+        # sidecar files with additional columns and dataset files (manifest, schema overlay) are not validated
         filepaths = self.connector.listdir(self.config.path)
+        _, datafile2sidecars = get_datafiles_and_sidecars(filepaths, self.config.datafiles_ext)
+        sidecars = {path for paths in datafile2sidecars.values() for path in paths}
+        filepaths = [
+            f for f in filepaths
+            if f not in sidecars and not f.rstrip('/').split('/')[-1].startswith('_')
+        ]
         filestructure_errors: list[FileStructureErrorType] = []
         dataframe2errors: dict[str, list[DataFrameErrorType]] = {}
 
@@ -0,0 +1,40 @@
+import sys
+
+sys.path.append('../')
+sys.path.append('./')
+
+import argparse
+
+from DPF.connectors import Connector, LocalConnector, S3Connector
+from DPF.utils.tar_index import build_tar_indexes
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Builds index sidecars for archives of a dataset in shards format')
+    parser.add_argument('path', help='Path to directory with shards')
+    parser.add_argument('--archives-ext', default='tar', help='Extension of archives')
+    parser.add_argument('--workers', type=int, default=16, help='Number of parallel threads')
+    parser.add_argument('--s3-key', default=None, help='Access key to s3 storage (for s3:// paths)')
+    parser.add_argument('--s3-secret', default=None, help='Secret key to s3 storage')
+    parser.add_argument('--s3-endpoint', default=None, help='Endpoint for s3 storage')
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    connector: Connector
+    if args.path.startswith('s3://'):
+        connector = S3Connector(args.s3_key, args.s3_secret, args.s3_endpoint)
+    else:
+        connector = LocalConnector()
+
+    archives_ext_dot = '.' + args.archives_ext.lstrip('.')
+    tar_paths = [p for p in connector.listdir(args.path.rstrip('/')) if p.endswith(archives_ext_dot)]
+    errors = build_tar_indexes(connector, tar_paths, workers=args.workers)
+    print(f'Indexed {len(tar_paths) - len(errors)} archives')
+    for err in errors:
+        print(err)
+
+
+if __name__ == '__main__':
+    main()
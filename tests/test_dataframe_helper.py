@@ -0,0 +1,46 @@
+import shutil
+from collections import Counter
+from typing import Any, Optional
+
+import pandas as pd
+
+from DPF import DatasetReader
+from DPF.configs import ShardsDatasetConfig
+from DPF.connectors import LocalConnector
+
+
+class CountingConnector(LocalConnector):
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.read_counts: Counter[str] = Counter()
+
+    def read_dataframe(self, filepath: str, columns: Optional[list[str]] = None, **kwargs: Any) -> pd.DataFrame:
+        self.read_counts[filepath] += 1
+        return super().read_dataframe(filepath, columns=columns, **kwargs)
+
+
+def test_dataframes_changer_reads_datafiles_once():
+    path = 'tests/datasets/dataframe_helper_test'
+    shutil.rmtree(path, ignore_errors=True)
+    shutil.copytree('tests/datasets/shards_correct', path)
+    config = ShardsDatasetConfig.from_path_and_columns(
+        path,
+        image_name_col="image_name",
+        text_col="caption"
+    )
+    connector = CountingConnector()
+    processor = DatasetReader(connector).read_from_config(config)
+    datafile = processor.get_datafile_path('0')
+
+    for kwargs, expected_reads in [({}, 1), ({'max_cached_bytes': None}, 1), ({'max_cached_bytes': 0}, 2)]:
+        connector.read_counts.clear()
+        processor['score'] = 0.5
+        assert len(processor.update_columns(['score'], **kwargs)) == 0
+        assert len(processor.rename_columns({'score': 'new_score'}, **kwargs)) == 0
+        assert len(processor.delete_columns(['new_score'], **kwargs)) == 0
+        assert connector.read_counts[datafile] == 3 * expected_reads
+
+    df = pd.read_csv(datafile)
+    assert df.columns.tolist() == ['image_name', 'caption']
+    shutil.rmtree(path)
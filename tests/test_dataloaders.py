@@ -0,0 +1,16 @@
+import time
+
+from DPF.dataloaders.dataloader_utils import prefetch_iterator
+
+
+def test_prefetch_iterator_max_bytes():
+    loaded = []
+    consumed = []
+    for item, _ in prefetch_iterator(
+        lambda x: loaded.append(x) or bytes(10), range(10), depth=5, max_bytes=10, get_size=len
+    ):
+        time.sleep(0.05)
+        # items are not loaded while queued items reach the limit
+        assert len(loaded) - len(consumed) <= 2
+        consumed.append(item)
+    assert consumed == list(range(10))
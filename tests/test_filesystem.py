@@ -1,4 +1,10 @@
-from DPF.connectors import S3Connector
+import os
+import shutil
+import tarfile
+
+import pytest
+
+from DPF.connectors import CachingConnector, LocalConnector, S3Connector
 
 
 def test_s3_join():
@@ -13,3 +19,103 @@ def test_s3_join():
            's3://example-bucket/path/to/dataset/shards/1.tar'
     assert fs.join('s3://example-bucket/path/to/dataset/', 'shards', '1.tar') == \
            's3://example-bucket/path/to/dataset/shards/1.tar'
+
+
+def test_caching_connector(monkeypatch):
+    path = 'tests/datasets/caching_test'
+    cache_dir = os.path.join(path, 'cache')
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+
+    local_connector = LocalConnector()
+    connector = CachingConnector(local_connector, cache_dir, max_cache_size=25)
+    local_connector.save_file(b'0123456789', os.path.join(path, 'a.bin'), binary=True)
+    local_connector.save_file(b'abcdefghij', os.path.join(path, 'b.bin'), binary=True)
+
+    assert connector.read_file(os.path.join(path, 'a.bin'), binary=True).getvalue() == b'0123456789'
+    assert len([f for f in os.listdir(cache_dir) if not f.startswith('.')]) == 1
+    assert connector.read_range(os.path.join(path, 'a.bin'), 2, 3) == b'234'
+
+    # changed file must not be read from cache
+    local_connector.save_file(b'9876543210', os.path.join(path, 'a.bin'), binary=True)
+    os.utime(os.path.join(path, 'a.bin'), ns=(0, 0))
+    assert connector.read_file(os.path.join(path, 'a.bin'), binary=True).getvalue() == b'9876543210'
+
+    # least recently used entries are evicted
+    assert bytes(connector.read_buffer(os.path.join(path, 'b.bin'))) == b'abcdefghij'
+    cache_files = [f for f in os.listdir(cache_dir) if not f.startswith('.')]
+    assert len(cache_files) == 2
+    assert sum(os.path.getsize(os.path.join(cache_dir, f)) for f in cache_files) <= 25
+
+    # cache directory is scanned only when files are evicted
+    scandir = os.scandir
+    scandir_calls = []
+    monkeypatch.setattr(os, 'scandir', lambda p: scandir_calls.append(p) or scandir(p))
+    local_connector.save_file(b'klmnopqrst', os.path.join(path, 'c.bin'), binary=True)
+    assert connector.read_file(os.path.join(path, 'c.bin'), binary=True).getvalue() == b'klmnopqrst'
+    assert connector.read_file(os.path.join(path, 'c.bin'), binary=True).getvalue() == b'klmnopqrst'
+    assert len(scandir_calls) == 1
+    cache_files = [f for f in os.listdir(cache_dir) if not f.startswith('.')]
+    assert len(cache_files) == 2
+    assert sum(os.path.getsize(os.path.join(cache_dir, f)) for f in cache_files) <= 25
+
+    # size of the cache is shared between connectors that use one cache directory (e.g. dataloader workers)
+    shutil.rmtree(cache_dir)
+    connectors = [CachingConnector(local_connector, cache_dir, max_cache_size=25) for _ in range(2)]
+    for filename, connector in zip(['a.bin', 'b.bin', 'c.bin'], connectors * 2):
+        assert connector.read_file(os.path.join(path, filename), binary=True).getvalue() != b''
+    cache_files = [f for f in os.listdir(cache_dir) if not f.startswith('.')]
+    assert len(cache_files) == 2
+    assert sum(os.path.getsize(os.path.join(cache_dir, f)) for f in cache_files) <= 25
+
+    shutil.rmtree(path)
+
+
+def test_local_connector_mmap():
+    path = 'tests/datasets/mmap_test'
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+
+    connector = LocalConnector()
+    tar_path = 'tests/datasets/shards_correct/0.tar'
+    tar = connector.read_tar(tar_path)
+    names = tar.getnames()
+    mapped_file = tar.fileobj
+    tar.close()
+    assert len(names) > 0
+    assert mapped_file.closed
+
+    # empty files are read without mapping
+    connector.save_file(b'', os.path.join(path, 'empty.bin'), binary=True)
+    assert bytes(connector.read_buffer(os.path.join(path, 'empty.bin'))) == b''
+    with pytest.raises(tarfile.ReadError):
+        connector.read_tar(os.path.join(path, 'empty.bin'))
+
+    shutil.rmtree(path)
+
+
+def test_local_connector_open_write():
+    path = 'tests/datasets/open_write_test'
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+    filepath = os.path.join(path, 'a.bin')
+
+    # file appears only when it is closed
+    connector = LocalConnector()
+    with connector.open_write(filepath) as f:
+        f.write(b'0123456789')
+        assert not os.path.exists(filepath)
+    assert open(filepath, 'rb').read() == b'0123456789'
+
+    # partially written file does not replace the old one
+    with pytest.raises(ValueError):
+        with connector.open_write(filepath) as f:
+            f.write(b'abc')
+            raise ValueError()
+    f = connector.open_write(filepath)
+    f.write(b'abc')
+    del f
+    assert open(filepath, 'rb').read() == b'0123456789'
+    assert os.listdir(path) == ['a.bin']
+
+    shutil.rmtree(path)
@@ -28,6 +28,24 @@ def test_shards_info_filter():
     assert not dataset.df['channels'].isna().any()
 
 
+def test_shards_info_filter_workers_queue():
+    path = 'tests/datasets/shards_correct'
+    config = ShardsDatasetConfig.from_path_and_columns(
+        path,
+        image_name_col="image_name",
+        text_col="caption"
+    )
+
+    reader = DatasetReader()
+    # every shard part is read by one worker of one dataloader iteration, so samples are not duplicated
+    for _ in range(5):
+        dataset = reader.read_from_config(config)
+        dataset.filter_df(dataset.df['text'] == 'test1')
+        dataset.apply_data_filter(ImageInfoFilter(workers=2))
+        assert len(dataset.df) == 1
+        assert dataset.df['is_correct'].all()
+
+
 def test_shards_phash_filter():
     path = 'tests/datasets/shards_correct'
     config = ShardsDatasetConfig.from_path_and_columns(
@@ -69,6 +87,110 @@ def test_shards_bad_image_info_filter():
     assert len(dataset.df[dataset.df['is_correct']]) == 2 and len(dataset.df) == 4
 
 
+def test_shards_info_filter_streaming():
+    path = 'tests/datasets/shards_correct'
+    config = ShardsDatasetConfig.from_path_and_columns(
+        path,
+        image_name_col="image_name",
+        text_col="caption"
+    )
+
+    reader = DatasetReader()
+    dataset = reader.read_from_config(config)
+    filter_ = ImageInfoFilter(workers=1)
+    dataset.apply_data_filter(filter_, dataset_kwargs={'streaming': True})
+
+    assert dataset.df['is_correct'].all()
+    assert not dataset.df['width'].isna().any()
+
+
+def test_shards_bad_image_info_filter_streaming():
+    path = 'tests/datasets/shards_bad_image'
+    config = ShardsDatasetConfig.from_path_and_columns(
+        path,
+        image_name_col="image_name",
+        text_col="caption"
+    )
+    reader = DatasetReader()
+    dataset = reader.read_from_config(config)
+    filter_ = ImageInfoFilter(workers=1)
+
+    error = None
+    try:
+        dataset.apply_data_filter(filter_, dataset_kwargs={'streaming': True})
+    except KeyError as err:
+        error = err
+    assert error is not None
+
+    dataset.apply_data_filter(
+        filter_, validate_filter_result=False, return_none_on_error=True,
+        dataset_kwargs={'streaming': True}
+    )
+    dataset.df['is_correct'] = dataset.df['is_correct'].fillna(False)
+    assert len(dataset.df[dataset.df['is_correct']]) == 2 and len(dataset.df) == 4
+
+
+def test_shards_info_filter_prefetch():
+    path = 'tests/datasets/shards_correct'
+    config = ShardsDatasetConfig.from_path_and_columns(
+        path,
+        image_name_col="image_name",
+        text_col="caption"
+    )
+
+    reader = DatasetReader()
+    dataset = reader.read_from_config(config)
+    filter_ = ImageInfoFilter(workers=2)
+    dataset.apply_data_filter(filter_, dataset_kwargs={'prefetch_shards': 2, 'prefetch_max_bytes': 1})
+
+    assert dataset.df['is_correct'].all()
+    assert not dataset.df['width'].isna().any()
+
+
+def test_shards_bad_image_info_filter_prefetch():
+    path = 'tests/datasets/shards_bad_image'
+    config = ShardsDatasetConfig.from_path_and_columns(
+        path,
+        image_name_col="image_name",
+        text_col="caption"
+    )
+    reader = DatasetReader()
+    dataset = reader.read_from_config(config)
+    filter_ = ImageInfoFilter(workers=1)
+
+    error = None
+    try:
+        dataset.apply_data_filter(filter_, dataset_kwargs={'prefetch_shards': 1})
+    except (KeyError, FileNotFoundError) as err:
+        error = err
+    assert error is not None
+
+    dataset.apply_data_filter(
+        filter_, validate_filter_result=False, return_none_on_error=True,
+        dataset_kwargs={'prefetch_shards': 1}
+    )
+    dataset.df['is_correct'] = dataset.df['is_correct'].fillna(False)
+    assert len(dataset.df[dataset.df['is_correct']]) == 2 and len(dataset.df) == 4
+
+
+def test_shards_phash_filter_zero_copy():
+    path = 'tests/datasets/shards_correct'
+    config = ShardsDatasetConfig.from_path_and_columns(
+        path,
+        image_name_col="image_name",
+        text_col="caption"
+    )
+
+    reader = DatasetReader()
+    dataset = reader.read_from_config(config)
+    dataset.apply_data_filter(PHashFilter(workers=1))
+    phashes = dataset.df['image_phash_8'].tolist()
+
+    dataset = reader.read_from_config(config)
+    dataset.apply_data_filter(PHashFilter(workers=1), dataset_kwargs={'zero_copy': True})
+    assert dataset.df['image_phash_8'].tolist() == phashes
+
+
 def test_sharded_files_info_filter():
     path = 'tests/datasets/sharded_files_correct'
     config = ShardedFilesDatasetConfig.from_path_and_columns(
@@ -89,6 +211,32 @@ def test_sharded_files_info_filter():
     assert not dataset.df['channels'].isna().any()
 
 
+def test_lazy_paths_info_filter():
+    configs = [
+        ShardsDatasetConfig.from_path_and_columns(
+            'tests/datasets/shards_correct',
+            image_name_col="image_name",
+            text_col="caption"
+        ),
+        ShardedFilesDatasetConfig.from_path_and_columns(
+            'tests/datasets/sharded_files_correct',
+            image_name_col="image_name",
+            text_col="caption"
+        )
+    ]
+    reader = DatasetReader()
+    for config in configs:
+        dataset = reader.read_from_config(config)
+        dataset.apply_data_filter(ImageInfoFilter(workers=1))
+        dataset_lazy = reader.read_from_config(config, lazy_paths=True)
+        dataset_lazy.apply_data_filter(ImageInfoFilter(workers=1))
+
+        assert 'image_path' not in dataset_lazy.columns
+        df = dataset.df.drop(columns=['image_path'])
+        df_lazy = dataset_lazy.df.drop(columns=['image_name'])
+        assert df.sort_values('text').reset_index(drop=True).equals(df_lazy.sort_values('text').reset_index(drop=True))
+
+
 def test_sharded_files_phash_filter():
     path = 'tests/datasets/sharded_files_correct'
     config = ShardedFilesDatasetConfig.from_path_and_columns(
@@ -165,3 +313,20 @@ def test_files_bad_image():
     dataset.apply_data_filter(filter_, validate_filter_result=False, return_none_on_error=True)
     dataset.df['is_correct'] = dataset.df['is_correct'].fillna(False)
     assert len(dataset.df[dataset.df['is_correct']]) == 2 and len(dataset.df) == 4
+
+
+def test_files_info_filter_zero_copy():
+    path = 'tests/datasets/files_correct/data.csv'
+    config = FilesDatasetConfig.from_path_and_columns(
+        path,
+        image_path_col="image_path",
+        text_col="caption"
+    )
+
+    reader = DatasetReader()
+    dataset = reader.read_from_config(config)
+    filter_ = ImageInfoFilter(workers=1)
+    dataset.apply_data_filter(filter_, dataset_kwargs={'zero_copy': True})
+
+    assert dataset.df['is_correct'].all()
+    assert not dataset.df['width'].isna().any()
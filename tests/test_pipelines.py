@@ -1,4 +1,4 @@
-from DPF import DatasetReader
+from DPF import DatasetReader, FilterExpression
 from DPF.configs import ShardsDatasetConfig
 from DPF.filters.images.dummy_gpu_filter import DummyGPUFilter
 from DPF.filters.images.hash_filters import PHashFilter
@@ -116,3 +116,25 @@ def test_pipeline_multigpu():
     pipeline.run(processor)
 
     assert len(processor.df) == 2 and 'dummy_label' in processor.columns
+
+
+def test_pipeline_filter_expressions():
+    path = 'tests/datasets/shards_correct'
+    config = ShardsDatasetConfig.from_path_and_columns(
+        path,
+        image_name_col="image_name",
+        text_col="caption"
+    )
+
+    pipeline = FilterPipeline("test_pipeline_filter_expressions")
+    pipeline.add_filter_expressions([FilterExpression('text', '!=', 'test1')])
+    pipeline.add_shuffle()
+    pipeline.add_filter_expressions([FilterExpression('text', '==', 'test1')])
+    assert pipeline.get_reader_filters() == [FilterExpression('text', '!=', 'test1')]
+
+    reader = DatasetReader()
+    processor = reader.read_from_config(config, filters=pipeline.get_reader_filters())
+    assert processor.df['text'].tolist() == ['test2']
+    pipeline.run(processor)
+
+    assert len(processor.df) == 0
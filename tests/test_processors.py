@@ -0,0 +1,212 @@
+import multiprocessing
+import os
+import shutil
+
+from DPF import DatasetReader
+from DPF.configs import (
+    FilesDatasetConfig,
+    ShardedFilesDatasetConfig,
+    ShardsDatasetConfig,
+)
+from DPF.filters.images.info_filter import ImageInfoFilter
+
+
+def test_streaming_info_filter():
+    datasets = [
+        (ShardsDatasetConfig, 'tests/datasets/shards_correct', 'test_streaming_shards'),
+        (ShardedFilesDatasetConfig, 'tests/datasets/sharded_files_correct', 'test_streaming_sharded_files')
+    ]
+    reader = DatasetReader()
+    for config_class, path, new_dir in datasets:
+        if os.path.exists(new_dir):
+            shutil.rmtree(new_dir)
+        shutil.copytree(path, new_dir)
+        config = config_class.from_path_and_columns(
+            new_dir,
+            image_name_col="image_name",
+            text_col="caption"
+        )
+
+        processor = reader.read_streaming(config, shards_per_group=1)
+        processor.filter_df(lambda df: df['text'] == 'test1')
+        errors = processor.apply_data_filter(ImageInfoFilter(workers=1))
+        assert len(errors) == 0
+
+        dataset = reader.read_from_config(config)
+        df = dataset.df.set_index('text')
+        assert df.loc['test1', 'is_correct']
+        assert not df[['width', 'height']].loc['test1'].isna().any()
+        assert df[['width', 'height']].loc['test2'].isna().all()
+
+        shutil.rmtree(new_dir)
+
+
+class CountingImageInfoFilter(ImageInfoFilter):
+
+    def __init__(self, *args, **kwargs):  # type: ignore
+        super().__init__(*args, **kwargs)
+        self.processed_batches = 0
+        self.processed_samples = 0
+        self.dataloader_passes = 0
+
+    def run_by_batches(self, dataset):  # type: ignore
+        self.dataloader_passes += 1
+        return super().run_by_batches(dataset)
+
+    def process_batch(self, batch):  # type: ignore
+        self.processed_batches += 1
+        self.processed_samples += len(batch)
+        return super().process_batch(batch)
+
+
+class FailingImageInfoFilter(ImageInfoFilter):
+
+    def process_batch(self, batch):  # type: ignore
+        raise RuntimeError('failed batch')
+
+
+def test_data_filter_shuts_down_workers_on_error():
+    config = ShardsDatasetConfig.from_path_and_columns(
+        'tests/datasets/shards_correct',
+        image_name_col="image_name",
+        text_col="caption"
+    )
+    processor = DatasetReader().read_from_config(config)
+    error = None
+    try:
+        processor.apply_data_filter(FailingImageInfoFilter(workers=2))
+    except RuntimeError as e:
+        error = e
+    # traceback of the kept error doesn't keep dataloader workers alive
+    assert error is not None
+    assert len(multiprocessing.active_children()) == 0
+
+
+def test_data_filter_checkpoints():
+    checkpoint_dir = 'test_checkpoints'
+    if os.path.exists(checkpoint_dir):
+        shutil.rmtree(checkpoint_dir)
+    configs = [
+        ShardsDatasetConfig.from_path_and_columns(
+            'tests/datasets/shards_correct',
+            image_name_col="image_name",
+            text_col="caption"
+        ),
+        FilesDatasetConfig.from_path_and_columns(
+            'tests/datasets/files_correct/data.csv',
+            image_path_col="image_path",
+            text_col="caption"
+        )
+    ]
+    reader = DatasetReader()
+    for config in configs:
+        dataset = reader.read_from_config(config)
+        filter_ = CountingImageInfoFilter(workers=1)
+        fingerprint = filter_.get_fingerprint()
+        dataset.apply_data_filter(filter_, checkpoint_dir=checkpoint_dir, checkpoint_size=1)
+        assert filter_.processed_batches > 0
+        assert len(os.listdir(os.path.join(checkpoint_dir, fingerprint))) > 0
+
+        dataset_resumed = reader.read_from_config(config)
+        filter_resumed = CountingImageInfoFilter(workers=1)
+        dataset_resumed.apply_data_filter(filter_resumed, checkpoint_dir=checkpoint_dir, checkpoint_size=1)
+        assert filter_resumed.processed_batches == 0
+        assert dataset.df.equals(dataset_resumed.df)
+        shutil.rmtree(checkpoint_dir)
+
+
+def test_data_filter_checkpoints_changed_dataset():
+    checkpoint_dir = 'test_checkpoints'
+    if os.path.exists(checkpoint_dir):
+        shutil.rmtree(checkpoint_dir)
+    configs = [
+        ShardsDatasetConfig.from_path_and_columns(
+            'tests/datasets/shards_correct',
+            image_name_col="image_name",
+            text_col="caption"
+        ),
+        FilesDatasetConfig.from_path_and_columns(
+            'tests/datasets/files_correct/data.csv',
+            image_path_col="image_path",
+            text_col="caption"
+        )
+    ]
+    reader = DatasetReader()
+    for config in configs:
+        # checkpoint is saved for a part of the dataset
+        dataset = reader.read_from_config(config)
+        dataset.filter_df(dataset.df['text'] == 'test1')
+        dataset.apply_data_filter(CountingImageInfoFilter(workers=1), checkpoint_dir=checkpoint_dir, checkpoint_size=1)
+
+        # samples that are not in checkpoint are processed in one dataloader pass
+        dataset_full = reader.read_from_config(config)
+        filter_ = CountingImageInfoFilter(workers=1)
+        dataset_full.apply_data_filter(filter_, checkpoint_dir=checkpoint_dir, checkpoint_size=1)
+        assert filter_.dataloader_passes == 1
+        assert filter_.processed_samples == len(dataset_full.df) - 1
+        assert dataset_full.df['is_correct'].all()
+        assert not dataset_full.df['width'].isna().any()
+
+        # checkpoint is updated with new samples
+        filter_resumed = CountingImageInfoFilter(workers=1)
+        reader.read_from_config(config).apply_data_filter(
+            filter_resumed, checkpoint_dir=checkpoint_dir, checkpoint_size=1
+        )
+        assert filter_resumed.dataloader_passes == 0
+        shutil.rmtree(checkpoint_dir)
+
+
+def test_data_filter_write_back():
+    datasets = [
+        (ShardsDatasetConfig, 'tests/datasets/shards_correct', 'test_write_back_shards'),
+        (ShardedFilesDatasetConfig, 'tests/datasets/sharded_files_correct', 'test_write_back_sharded_files')
+    ]
+    reader = DatasetReader()
+    for config_class, path, new_dir in datasets:
+        if os.path.exists(new_dir):
+            shutil.rmtree(new_dir)
+        shutil.copytree(path, new_dir)
+        config = config_class.from_path_and_columns(
+            new_dir,
+            image_name_col="image_name",
+            text_col="caption"
+        )
+
+        dataset = reader.read_from_config(config)
+        dataset.apply_data_filter(ImageInfoFilter(workers=1), write_back=True)
+        assert not dataset.df['width'].isna().any()
+
+        dataset_new = reader.read_from_config(config)
+        assert dataset_new.df['width'].tolist() == dataset.df['width'].tolist()
+        assert dataset_new.df['is_correct'].all()
+
+        shutil.rmtree(new_dir)
+
+
+def test_data_filter_write_back_many_shards():
+    new_dir = 'test_write_back_many_shards'
+    if os.path.exists(new_dir):
+        shutil.rmtree(new_dir)
+    reader = DatasetReader()
+    config = ShardsDatasetConfig.from_path_and_columns(
+        'tests/datasets/shards_correct',
+        image_name_col="image_name",
+        text_col="caption"
+    )
+    reader.read_from_config(config).save_to_shards(
+        new_dir, rename_columns={'text': 'caption'}, max_files_in_shard=1, workers=1
+    )
+    config = ShardsDatasetConfig.from_path_and_columns(new_dir, image_name_col="image_name", text_col="caption")
+
+    # shards are written back from one dataloader pass
+    dataset = reader.read_from_config(config)
+    assert dataset.df['split_name'].nunique() == 2
+    filter_ = CountingImageInfoFilter(workers=1)
+    dataset.apply_data_filter(filter_, write_back=True)
+    assert filter_.dataloader_passes == 1
+
+    dataset_new = reader.read_from_config(config)
+    assert dataset_new.df['width'].tolist() == dataset.df['width'].tolist()
+    assert dataset_new.df['is_correct'].all()
+
+    shutil.rmtree(new_dir)
@@ -1,11 +1,29 @@
 import os
+import shutil
+import tarfile
 
-from DPF import DatasetReader
+import pandas as pd
+import pytest
+import torch
+from torch.utils.data import DataLoader
+from tqdm.auto import tqdm
+
+from DPF import DatasetReader, FilterExpression
 from DPF.configs import (
     FilesDatasetConfig,
     ShardedFilesDatasetConfig,
     ShardsDatasetConfig,
 )
+from DPF.connectors import LocalConnector
+from DPF.dataloaders.dataloader_utils import identical_collate_fn
+from DPF.dataloaders.sample_table import SampleTable
+from DPF.dataset_reader_utils import (
+    MANIFEST_FILENAME,
+    SCHEMA_OVERLAY_FILENAME,
+    get_datafiles_and_sidecars,
+    read_manifest,
+    save_manifest,
+)
 from DPF.processors import (
     FilesDatasetProcessor,
     ShardedFilesDatasetProcessor,
@@ -121,3 +139,429 @@ def test_files_reader():
     assert len(dataset.df) == 2
 
     assert all(dataset.df['image_path'].apply(lambda x: os.path.exists(x)).tolist())
+
+
+def test_shards_column_modalities_without_archives():
+    path = 'tests/datasets/shards_correct'
+    config = ShardsDatasetConfig.from_path_and_columns(
+        path,
+        image_name_col="image_name",
+        text_col="caption"
+    )
+
+    reader = DatasetReader()
+    dataset = reader.read_from_config(config)
+    # archives should not be read if only column modalities are requested
+    dataset.df['split_name'] = 'missing_split'
+
+    modality2data, sample = dataset.get_random_sample(modalities=['text'])
+    assert modality2data == {'text': sample['text']}
+
+    torch_dataset = dataset._get_torch_dataset(['text'])
+    samples = list(torch_dataset)
+    assert len(samples) == 2
+    assert all(is_ok for is_ok, _ in samples)
+
+
+def test_shards_dataset_workers_queue():
+    path = 'tests/datasets/shards_correct'
+    config = ShardsDatasetConfig.from_path_and_columns(
+        path,
+        image_name_col="image_name",
+        text_col="caption"
+    )
+
+    reader = DatasetReader()
+    dataset = reader.read_from_config(config)
+    # uneven shards, archives are not read because only column modalities are requested
+    df = pd.concat([dataset.df] * 10, ignore_index=True)
+    df['text'] = [str(i) for i in range(len(df))]
+    df['split_name'] = [str(i % 3) if i < 12 else '3' for i in range(len(df))]
+    dataset._df = df
+
+    torch_dataset = dataset._get_torch_dataset(['text'])
+    assert torch_dataset.shard_parts_queue[0] == (dataset.get_shard_path('3'), 0, 8)
+    for persistent_workers in [False, True]:
+        dataloader = DataLoader(
+            torch_dataset, num_workers=2, batch_size=1,
+            collate_fn=identical_collate_fn, persistent_workers=persistent_workers
+        )
+        for _ in range(2):
+            texts = [batch[0][1][0]['text'] for batch in dataloader]
+            assert sorted(texts) == sorted(df['text'].tolist())
+
+    # dataloader iterations with the same base seed read all samples
+    for _ in range(3):
+        torch.manual_seed(0)
+        dataloader = DataLoader(torch_dataset, num_workers=2, batch_size=1, collate_fn=identical_collate_fn)
+        texts = [batch[0][1][0]['text'] for batch in dataloader]
+        assert sorted(texts) == sorted(df['text'].tolist())
+
+    # workers of an abandoned iterator don't take parts of the next iteration
+    dataloader = DataLoader(torch_dataset, num_workers=2, batch_size=1, collate_fn=identical_collate_fn)
+    next(iter(dataloader))
+    texts = [batch[0][1][0]['text'] for batch in tqdm(dataloader)]
+    assert sorted(texts) == sorted(df['text'].tolist())
+
+
+def test_sample_table():
+    df = pd.DataFrame({
+        'int': [1, 2, 3],
+        'float': [0.5, float('nan'), 1.5],
+        'bool': [True, False, True],
+        'text': ['caption', None, 'подпись ✓'],
+        'list': [[1], [2], []],
+    })
+    table = SampleTable(df, list(df.columns))
+    assert len(table) == 3
+    assert table.get_row(0) == (1, 0.5, True, 'caption', [1])
+    assert isinstance(table.get_row(0)[0], int)
+    assert table.get_rows(1, 3)[1] == (3, 1.5, True, 'подпись ✓', [])
+    assert table.get_row(1)[3] is None and pd.isna(table.get_row(1)[1])
+
+
+def test_arrow_backend_reader():
+    reader = DatasetReader()
+    configs = [
+        ShardsDatasetConfig.from_path_and_columns(
+            'tests/datasets/shards_correct',
+            image_name_col="image_name",
+            text_col="caption"
+        ),
+        ShardedFilesDatasetConfig.from_path_and_columns(
+            'tests/datasets/sharded_files_correct',
+            image_name_col="image_name",
+            text_col="caption"
+        )
+    ]
+    for config in configs:
+        dataset = reader.read_from_config(config)
+        dataset_arrow = reader.read_from_config(config, backend='arrow', workers=2)
+        assert isinstance(dataset_arrow, type(dataset))
+        pd.testing.assert_frame_equal(dataset.df, dataset_arrow.df)
+
+
+def test_reader_manifest():
+    path = 'tests/datasets/manifest_test'
+    shutil.rmtree(path, ignore_errors=True)
+    shutil.copytree('tests/datasets/shards_correct', path)
+    config = ShardsDatasetConfig.from_path_and_columns(
+        path,
+        image_name_col="image_name",
+        text_col="caption"
+    )
+    reader = DatasetReader()
+    connector = LocalConnector()
+    manifest_path = os.path.join(path, MANIFEST_FILENAME)
+
+    dataset = reader.read_from_config(config, use_manifest=True)
+    assert os.path.exists(manifest_path)
+    pd.testing.assert_frame_equal(dataset.df, reader.read_from_config(config).df)
+
+    # unchanged datafiles are read from manifest
+    manifest_table, fingerprints = read_manifest(connector, manifest_path)
+    manifest_df = manifest_table.to_pandas()
+    manifest_df['caption'] = 'from manifest'
+    save_manifest(connector, manifest_path, manifest_df, fingerprints)
+    dataset = reader.read_from_config(config, use_manifest=True)
+    assert (dataset.df['text'] == 'from manifest').all()
+
+    # new and changed datafiles are read again
+    shutil.copy(os.path.join(path, '0.tar'), os.path.join(path, '1.tar'))
+    shutil.copy(os.path.join(path, '0.csv'), os.path.join(path, '1.csv'))
+    dataset = reader.read_from_config(config, use_manifest=True, backend='arrow')
+    assert len(dataset.df) == 4
+    assert (dataset.df[dataset.df['split_name'] == '1']['text'] != 'from manifest').all()
+
+    df = pd.read_csv(os.path.join(path, '0.csv'))
+    df['caption'] = 'changed'
+    df.to_csv(os.path.join(path, '0.csv'), index=False)
+    dataset = reader.read_from_config(config, use_manifest=True)
+    pd.testing.assert_frame_equal(dataset.df, reader.read_from_config(config).df)
+    assert set(read_manifest(connector, manifest_path)[1].keys()) == {'0', '1'}
+
+    shutil.rmtree(path)
+
+
+def test_reader_columns_projection():
+    path = 'tests/datasets/columns_projection_test'
+    shutil.rmtree(path, ignore_errors=True)
+    shutil.copytree('tests/datasets/shards_correct', path)
+    datafiles = [os.path.join(path, f) for f in os.listdir(path) if f.endswith('.csv')]
+    for datafile in datafiles:
+        df = pd.read_csv(datafile)
+        df['score'] = 0.5
+        df['unused'] = 'unused'
+        df.to_csv(datafile, index=False)
+
+    config = ShardsDatasetConfig.from_path_and_columns(
+        path,
+        image_name_col="image_name",
+        text_col="caption"
+    )
+    reader = DatasetReader()
+    for kwargs in [{}, {'backend': 'arrow'}, {'use_manifest': True}, {'use_manifest': True}]:
+        dataset = reader.read_from_config(config, columns=['score', 'not_in_datafiles'], **kwargs)
+        assert set(dataset.df.columns) == {'image_path', 'split_name', 'text', 'score'}
+        assert (dataset.df['score'] == 0.5).all()
+    assert 'unused' in reader.read_from_config(config, use_manifest=True).df.columns
+
+    connector = LocalConnector()
+    parquet_path = os.path.join(path, 'data.parquet')
+    pd.read_csv(datafiles[0]).to_parquet(parquet_path)
+    df = connector.read_dataframe(parquet_path, columns=['score', 'not_in_datafile'])
+    assert df.columns.tolist() == ['score']
+
+    shutil.rmtree(path)
+
+    config_files = FilesDatasetConfig.from_path_and_columns(
+        'tests/datasets/files_correct/data.csv',
+        image_path_col="image_path",
+    )
+    dataset = reader.read_from_config(config_files, columns=[])
+    assert dataset.df.columns.tolist() == ['image_path']
+
+
+def test_reader_filters():
+    reader = DatasetReader()
+    filters = [FilterExpression('width', '>=', 512), FilterExpression('text', 'not in', ['other'])]
+    for datafiles_ext in ['csv', 'parquet']:
+        path = 'tests/datasets/filters_test'
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+        df = pd.read_csv('tests/datasets/shards_correct/0.csv')
+        for shard_index, widths in enumerate([[256, 1024], [128, 256]]):
+            shutil.copy('tests/datasets/shards_correct/0.tar', os.path.join(path, f'{shard_index}.tar'))
+            df['width'] = widths
+            if datafiles_ext == 'csv':
+                df.to_csv(os.path.join(path, f'{shard_index}.csv'), index=False)
+            else:
+                df.to_parquet(os.path.join(path, f'{shard_index}.parquet'), index=False)
+
+        config = ShardsDatasetConfig.from_path_and_columns(
+            path,
+            image_name_col="image_name",
+            text_col="caption",
+            datafiles_ext=datafiles_ext
+        )
+        for kwargs in [{}, {'backend': 'arrow'}, {'use_manifest': True}, {'use_manifest': True, 'columns': []}]:
+            dataset = reader.read_from_config(config, filters=filters, **kwargs)
+            assert dataset.df['width'].tolist() == [1024]
+            assert dataset.df.index.tolist() == [0]
+            assert dataset.df['split_name'].tolist() == ['0']
+
+        dataset = reader.read_from_config(config, filters=[FilterExpression('width', '>', 2048)])
+        assert len(dataset.df) == 0 and 'width' in dataset.df.columns
+        shutil.rmtree(path)
+
+    config_files = FilesDatasetConfig.from_path_and_columns(
+        'tests/datasets/files_correct/data.csv',
+        image_path_col="image_path",
+        text_col="caption"
+    )
+    dataset = reader.read_from_config(config_files, filters=[FilterExpression('text', '==', 'test2')])
+    assert dataset.df['text'].tolist() == ['test2']
+
+
+def test_lazy_paths_reader():
+    path = 'tests/datasets/shards_correct'
+    config = ShardsDatasetConfig.from_path_and_columns(
+        path,
+        image_name_col="image_name",
+        text_col="caption"
+    )
+    reader = DatasetReader()
+    dataset = reader.read_from_config(config)
+    dataset_lazy = reader.read_from_config(config, lazy_paths=True)
+    assert isinstance(dataset.df['split_name'].dtype, pd.CategoricalDtype)
+    assert 'image_path' not in dataset_lazy.columns and 'image_name' in dataset_lazy.columns
+    assert dataset_lazy.get_path_column('image_path').tolist() == dataset.df['image_path'].tolist()
+    assert dataset_lazy.validate().total_errors == 0
+
+    modality2data, sample = dataset_lazy.get_random_sample()
+    assert len(modality2data['image']) > 0 and 'image_name' in sample
+
+    new_dir = 'tests/datasets/lazy_paths_test'
+    shutil.rmtree(new_dir, ignore_errors=True)
+    dataset_lazy.save_to_shards(new_dir, rename_columns={'text': 'caption'}, workers=1)
+    new_config = ShardsDatasetConfig.from_path_and_columns(
+        new_dir,
+        image_name_col="image_name",
+        text_col="caption"
+    )
+    dataset_new = reader.read_from_config(new_config, lazy_paths=True)
+    assert sorted(dataset_new.df['text']) == sorted(dataset.df['text'])
+
+    dataset_new['text_length'] = dataset_new['text'].str.len()
+    assert dataset_new.update_columns(['text_length']) == []
+    assert 'text_length' in reader.read_from_config(new_config).columns
+    shutil.rmtree(new_dir)
+
+
+def test_reader_sidecars(monkeypatch):
+    path = 'tests/datasets/sidecars_test'
+    shutil.rmtree(path, ignore_errors=True)
+    shutil.copytree('tests/datasets/shards_correct', path)
+    datafile = os.path.join(path, '0.csv')
+    datafile_content = open(datafile).read()
+
+    config = ShardsDatasetConfig.from_path_and_columns(
+        path,
+        image_name_col="image_name",
+        text_col="caption"
+    )
+    reader = DatasetReader()
+    dataset = reader.read_from_config(config)
+    dataset['score'] = [0.1, 0.2]
+    errors = dataset.update_columns(['score'], sidecar='scores')
+    assert len(errors) == 0
+    assert os.path.exists(os.path.join(path, '0.scores.parquet'))
+    assert open(datafile).read() == datafile_content
+
+    # only rows of the dataframe are updated in the sidecar
+    dataset.filter_df(dataset.df['text'] == 'test2')
+    dataset['score'] = [0.5]
+    dataset['label'] = ['b']
+    assert len(dataset.update_columns(['score', 'label'], sidecar='scores')) == 0
+
+    for kwargs in [{}, {'backend': 'arrow'}, {'use_manifest': True}, {'use_manifest': True}]:
+        dataset = reader.read_from_config(config, **kwargs)
+        df = dataset.df.set_index('text')
+        assert df.loc['test1', 'score'] == 0.1
+        assert df.loc['test2', 'score'] == 0.5
+        assert pd.isna(df.loc['test1', 'label'])
+        assert df.loc['test2', 'label'] == 'b'
+
+    dataset = reader.read_from_config(config, columns=['score'], filters=[FilterExpression('score', '>', 0.3)])
+    assert dataset.df['text'].tolist() == ['test2']
+    assert 'label' not in dataset.columns
+    assert dataset.validate().total_errors == 0
+
+    # columns stored in sidecar are changed in sidecar files
+    dataset = reader.read_from_config(config)
+    dataset['score'] = [0.3, 0.4]
+    assert dataset.update_columns(['score']) == []
+    assert dataset.delete_columns(['label']) == []
+    assert open(datafile).read() == datafile_content
+    dataset = reader.read_from_config(config)
+    assert dataset.df['score'].tolist() == [0.3, 0.4]
+    assert 'label' not in dataset.columns
+    for change_columns in [
+        lambda: dataset.update_columns(['score'], sidecar='other'),
+        lambda: dataset.rename_columns({'score': 'new_score'})
+    ]:
+        with pytest.raises(AssertionError):
+            change_columns()
+
+    # processor uses sidecar files listed by reader and adds created ones, dataset directory is not listed
+    dataset = reader.read_from_config(config)
+    listdir = dataset.connector.listdir
+    listdir_calls = []
+    monkeypatch.setattr(dataset.connector, 'listdir', lambda p: listdir_calls.append(p) or listdir(p))
+    dataset['rank'] = [1, 2]
+    assert dataset.update_columns(['rank'], sidecar='ranks') == []
+    dataset['rank'] = [3, 4]
+    assert dataset.update_columns(['rank']) == []
+    assert dataset.delete_columns(['rank']) == []
+    assert listdir_calls == []
+    assert open(datafile).read() == datafile_content
+
+    shutil.rmtree(path)
+
+
+def test_datafiles_and_sidecars():
+    filepaths = ['d/0.parquet', 'd/0.scores.parquet', 'd/part.0001.parquet', 'd/part.0002.parquet', 'd/1.csv']
+    datafiles, datafile2sidecars = get_datafiles_and_sidecars(filepaths, 'parquet')
+    assert sorted(datafiles) == ['d/0.parquet', 'd/part.0001.parquet', 'd/part.0002.parquet']
+    assert datafile2sidecars == {'d/0.parquet': ['d/0.scores.parquet']}
+
+    datafiles, datafile2sidecars = get_datafiles_and_sidecars(filepaths + ['d/1.scores.parquet'], 'csv')
+    assert datafiles == ['d/1.csv']
+    assert datafile2sidecars == {'d/1.csv': ['d/1.scores.parquet']}
+
+
+def test_reader_schema_overlay():
+    path = 'tests/datasets/schema_overlay_test'
+    shutil.rmtree(path, ignore_errors=True)
+    shutil.copytree('tests/datasets/shards_correct', path)
+    datafile = os.path.join(path, '0.csv')
+    df = pd.read_csv(datafile)
+    df['score'] = [0.1, 0.5]
+    df['unused'] = 'unused'
+    df.to_csv(datafile, index=False)
+    datafile_content = open(datafile).read()
+
+    config = ShardsDatasetConfig.from_path_and_columns(
+        path,
+        image_name_col="image_name",
+        text_col="caption"
+    )
+    reader = DatasetReader()
+    processor = reader.read_from_config(config)
+    assert len(processor.rename_columns({'score': 'clip_score'}, overlay=True)) == 0
+    assert len(processor.delete_columns(['unused'], overlay=True)) == 0
+    assert open(datafile).read() == datafile_content
+    try:
+        processor.update_columns(['clip_score'])
+        raise AssertionError("Columns from schema overlay should not be updated before compact_schema_overlay")
+    except AssertionError as err:
+        assert 'schema overlay' in str(err)
+
+    for kwargs in [{}, {'backend': 'arrow'}, {'use_manifest': True}]:
+        dataset = reader.read_from_config(config, **kwargs)
+        assert set(dataset.columns) == {'image_path', 'split_name', 'text', 'clip_score'}
+    dataset = reader.read_from_config(
+        config, columns=['clip_score'], filters=[FilterExpression('clip_score', '>', 0.3)]
+    )
+    assert dataset.df['text'].tolist() == ['test2']
+    assert dataset.validate().total_errors == 0
+
+    assert len(processor.compact_schema_overlay()) == 0
+    assert pd.read_csv(datafile).columns.tolist() == ['image_name', 'caption', 'clip_score']
+    dataset_compacted = reader.read_from_config(config)
+    assert dataset_compacted.df.equals(reader.read_from_config(config).df)
+    assert set(dataset_compacted.columns) == {'image_path', 'split_name', 'text', 'clip_score'}
+    assert len(processor.update_columns(['clip_score'])) == 0
+
+    # overlay that can not be read is not ignored
+    overlay_path = os.path.join(path, SCHEMA_OVERLAY_FILENAME)
+    os.remove(overlay_path)
+    os.mkdir(overlay_path)
+    with pytest.raises(IsADirectoryError):
+        reader.read_from_config(config)
+
+    shutil.rmtree(path)
+
+
+def test_processor_compact_to_destination():
+    path = 'tests/datasets/compact_test'
+    reader = DatasetReader()
+    for config in [
+        ShardsDatasetConfig.from_path_and_columns(
+            'tests/datasets/shards_correct', image_name_col="image_name", text_col="caption"
+        ),
+        ShardedFilesDatasetConfig.from_path_and_columns(
+            'tests/datasets/sharded_files_correct', image_name_col="image_name", text_col="caption"
+        )
+    ]:
+        for lazy_paths in [False, True]:
+            shutil.rmtree(path, ignore_errors=True)
+            processor = reader.read_from_config(config, lazy_paths=lazy_paths)
+            processor.filter_df(processor.df['text'] == 'test2')
+            assert len(processor.compact_to(path)) == 0
+
+            config_compacted = type(config).from_path_and_columns(
+                path, image_name_col="image_name", text_col="caption"
+            )
+            processor_compacted = reader.read_from_config(config_compacted)
+            assert processor_compacted.df['text'].tolist() == ['test2']
+            assert processor_compacted.validate().total_errors == 0
+            assert pd.read_csv(os.path.join(path, '0.csv')).columns.tolist() == ['image_name', 'caption']
+            image_name = pd.read_csv(os.path.join(path, '0.csv'))['image_name'][0]
+            if isinstance(config, ShardsDatasetConfig):
+                with tarfile.open(os.path.join(path, '0.tar')) as tar:
+                    assert tar.getnames() == [image_name]
+                assert os.path.exists(os.path.join(path, '0.idx'))
+            else:
+                assert os.listdir(os.path.join(path, '0')) == [image_name]
+    shutil.rmtree(path)
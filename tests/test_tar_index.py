@@ -0,0 +1,172 @@
+import io
+import os
+import shutil
+import tarfile
+
+import pandas as pd
+import pytest
+
+from DPF import DatasetReader
+from DPF.configs import ShardsDatasetConfig
+from DPF.connectors import LocalConnector
+from DPF.dataloaders import ShardsDataset
+from DPF.utils.tar_index import (
+    get_tar_index_path,
+    read_tar_index,
+    read_tar_member,
+)
+
+
+def _read_shards(path: str):
+    config = ShardsDatasetConfig.from_path_and_columns(
+        path,
+        image_name_col="image_name",
+        text_col="caption"
+    )
+    return DatasetReader().read_from_config(config)
+
+
+def test_build_tar_indexes():
+    new_dir = 'test_shards_index'
+    if os.path.exists(new_dir):
+        shutil.rmtree(new_dir)
+    shutil.copytree('tests/datasets/shards_correct', new_dir)
+
+    processor = _read_shards(new_dir)
+    errors = processor.build_tar_indexes(workers=1)
+    assert errors == []
+
+    connector = LocalConnector()
+    tar_path = os.path.join(new_dir, '0.tar')
+    assert os.path.exists(get_tar_index_path(tar_path))
+    tar_index = read_tar_index(connector, tar_path)
+    with tarfile.open(tar_path) as tar:
+        assert set(tar_index.keys()) == set(tar.getnames())
+        for name in tar.getnames():
+            assert read_tar_member(connector, tar_path, tar_index, name) == tar.extractfile(name).read()
+
+    modality2data, sample = processor.get_random_sample()
+    with tarfile.open(tar_path) as tar:
+        assert modality2data['image'] == tar.extractfile(os.path.basename(sample['image_path'])).read()
+
+    # index of the archive that was rewritten after indexing is not used
+    with tarfile.open(tar_path) as tar:
+        files = [(member, tar.extractfile(member).read()) for member in tar.getmembers()]
+    with tarfile.open(tar_path, mode='w') as tar:
+        for member, data in files[::-1]:
+            tar.addfile(member, io.BytesIO(data))
+    assert read_tar_index(connector, tar_path) is None
+    modality2data, sample = processor.get_random_sample()
+    with tarfile.open(tar_path) as tar:
+        assert modality2data['image'] == tar.extractfile(os.path.basename(sample['image_path'])).read()
+
+    # errors other than a missing index are raised
+    os.remove(get_tar_index_path(tar_path))
+    assert read_tar_index(connector, tar_path) is None
+    os.mkdir(get_tar_index_path(tar_path))
+    with pytest.raises(IsADirectoryError):
+        read_tar_index(connector, tar_path)
+
+    shutil.rmtree(new_dir)
+
+
+def test_writer_tar_index():
+    path = 'tests/datasets/shards_correct'
+    processor = _read_shards(path)
+    new_dir = 'test_shards_index/'
+    if os.path.exists(new_dir):
+        shutil.rmtree(new_dir)
+    processor.save_to_shards(new_dir, rename_columns={'text': 'caption'}, workers=1)
+
+    # original files of samples by caption
+    df = pd.read_csv(os.path.join(path, '0.csv'))
+    with tarfile.open(os.path.join(path, '0.tar')) as tar:
+        caption2file = {row['caption']: tar.extractfile(row['image_name']).read() for _, row in df.iterrows()}
+
+    connector = LocalConnector()
+    tar_path = os.path.join(new_dir, '0.tar')
+    tar_index = read_tar_index(connector, tar_path)
+    df_new = pd.read_csv(os.path.join(new_dir, '0.csv'))
+    assert set(tar_index.keys()) == set(df_new['image_name'])
+    for _, row in df_new.iterrows():
+        assert read_tar_member(connector, tar_path, tar_index, row['image_name']) == caption2file[row['caption']]
+
+    processor = _read_shards(new_dir.rstrip('/'))
+    modality2data, sample = processor.get_random_sample()
+    assert modality2data['image'] == caption2file[sample['text']]
+
+    shutil.rmtree(new_dir)
+
+
+def test_writer_tar_index_sparse_read():
+    processor = _read_shards('tests/datasets/shards_correct')
+    new_dir = 'test_shards_index/'
+    if os.path.exists(new_dir):
+        shutil.rmtree(new_dir)
+    processor.save_to_shards(new_dir, rename_columns={'text': 'caption'}, workers=1)
+    assert os.path.exists(os.path.join(new_dir, '0.idx'))
+
+    processor = _read_shards(new_dir.rstrip('/'))
+    processor.filter_df(processor.df['image_path'].str.endswith('/0.jpg'))
+    dataset = ShardsDataset(
+        processor.connector,
+        processor.df,
+        {'0': processor.get_shard_path('0')},
+        [processor.config.modality2datatype['image']],
+        sparse_read_threshold=1.0
+    )
+    samples = list(dataset)
+    assert len(samples) == 1
+    with tarfile.open(os.path.join(new_dir, '0.tar')) as tar:
+        assert samples[0][1][0]['image'] == tar.extractfile('0.jpg').read()
+
+    shutil.rmtree(new_dir)
+
+
+def test_shards_dataset_split_parts():
+    processor = _read_shards('tests/datasets/shards_correct')
+    new_dir = 'test_shards_index/'
+    if os.path.exists(new_dir):
+        shutil.rmtree(new_dir)
+    processor.save_to_shards(new_dir, rename_columns={'text': 'caption'}, workers=1)
+
+    with tarfile.open(os.path.join(new_dir, '0.tar')) as tar:
+        files = {name: tar.extractfile(name).read() for name in tar.getnames()}
+
+    # rows of shards split into parts are sorted by offsets of their files in archive
+    processor = _read_shards(new_dir.rstrip('/'))
+    dataset = ShardsDataset(
+        processor.connector,
+        processor.df.iloc[::-1],
+        {'0': processor.get_shard_path('0')},
+        [processor.config.modality2datatype['image']],
+        metadata_columns=['image_path'],
+        samples_per_part=1
+    )
+    tar_index = read_tar_index(processor.connector, processor.get_shard_path('0'))
+    offsets = [tar_index[os.path.basename(metadata['image_path'])][0] for _, (_, metadata) in dataset]
+    assert offsets == sorted(offsets)
+
+    # parts of indexed archive are read with ranged reads, otherwise the whole archive is read
+    for remove_index in [False, True]:
+        if remove_index:
+            os.remove(os.path.join(new_dir, '0.idx'))
+        processor = _read_shards(new_dir.rstrip('/'))
+        for zero_copy in [False, True]:
+            dataset = ShardsDataset(
+                processor.connector,
+                processor.df,
+                {'0': processor.get_shard_path('0')},
+                [processor.config.modality2datatype['image']],
+                metadata_columns=['image_path'],
+                zero_copy=zero_copy,
+                samples_per_part=1
+            )
+            assert len(dataset.shard_parts_queue) == 2
+            samples = list(dataset)
+            assert len(samples) == 2
+            for is_ok, (modality2data, metadata) in samples:
+                assert is_ok
+                assert bytes(modality2data['image']) == files[os.path.basename(metadata['image_path'])]
+
+    shutil.rmtree(new_dir)
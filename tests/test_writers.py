@@ -1,12 +1,16 @@
+import json
 import os
 import shutil
 
+import pandas as pd
+
 from DPF import DatasetReader
 from DPF.configs import (
     FilesDatasetConfig,
     ShardedFilesDatasetConfig,
     ShardsDatasetConfig,
 )
+from DPF.processors.writers.shuffle import shuffle_with_buckets, shuffle_with_buffer
 
 
 def test_shards_to_shards():
@@ -143,3 +147,185 @@ def test_files_to_sharded_files():
 
     if os.path.exists(new_dir):
         shutil.rmtree(new_dir)
+
+
+def test_parallel_save_to_shards():
+    path = 'tests/datasets/shards_correct'
+    config = ShardsDatasetConfig.from_path_and_columns(
+        path,
+        image_name_col="image_name",
+        text_col="caption"
+    )
+
+    reader = DatasetReader()
+    processor = reader.read_from_config(config)
+    for save_method, new_config_class in [
+        (processor.save_to_shards, ShardsDatasetConfig),
+        (processor.save_to_sharded_files, ShardedFilesDatasetConfig)
+    ]:
+        new_dir_sequential = 'test_sequential/'
+        new_dir = 'test_parallel/'
+        for d in [new_dir_sequential, new_dir]:
+            if os.path.exists(d):
+                shutil.rmtree(d)
+        save_method(new_dir_sequential, max_files_in_shard=1, rename_columns={'text': 'caption'}, workers=1)
+        save_method(new_dir, max_files_in_shard=1, rename_columns={'text': 'caption'}, workers=2, parallel=True)
+        assert sorted(os.listdir(new_dir)) == sorted(os.listdir(new_dir_sequential))
+
+        new_config = new_config_class.from_path_and_columns(
+            new_dir.rstrip('/'),
+            image_name_col="image_name",
+            text_col="caption"
+        )
+        new_processor = reader.read_from_config(new_config)
+        assert new_processor.validate().total_errors == 0
+        assert len(new_processor) == len(processor)
+        assert sorted(new_processor.df['image_path'].map(os.path.basename)) == ['0.jpg', '1.jpg']
+
+        for d in [new_dir_sequential, new_dir]:
+            shutil.rmtree(d)
+
+
+def test_parallel_save_to_shards_groups_samples_by_source_shards():
+    source_dir = 'test_source/'
+    new_dir = 'test_parallel/'
+    for d in [source_dir, new_dir]:
+        if os.path.exists(d):
+            shutil.rmtree(d)
+    reader = DatasetReader()
+    processor = reader.read_from_config(ShardsDatasetConfig.from_path_and_columns(
+        'tests/datasets/shards_correct',
+        image_name_col="image_name",
+        text_col="caption"
+    ))
+    processor.save_to_shards(source_dir, max_files_in_shard=1, rename_columns={'text': 'caption'}, workers=1)
+    source_processor = reader.read_from_config(ShardsDatasetConfig.from_path_and_columns(
+        source_dir.rstrip('/'),
+        image_name_col="image_name",
+        text_col="caption"
+    ))
+    # rows of source shards are interleaved: 0, 1, 0, 1
+    interleaved_df = pd.concat([source_processor.df, source_processor.df], ignore_index=True)
+    interleaved_processor = type(source_processor)(
+        source_processor.connector, interleaved_df, source_processor.config
+    )
+    interleaved_processor.save_to_shards(
+        new_dir, max_files_in_shard=2, rename_columns={'text': 'caption'}, workers=2, parallel=True
+    )
+
+    # every new shard is written from a single source shard
+    for shard_index in range(2):
+        captions = pd.read_csv(os.path.join(new_dir, f'{shard_index}.csv'))['caption'].tolist()
+        assert len(captions) == 2
+        assert len(set(captions)) == 1
+
+    for d in [source_dir, new_dir]:
+        shutil.rmtree(d)
+
+
+def test_shards_writer_background_upload_and_streaming():
+    path = 'tests/datasets/shards_correct'
+    config = ShardsDatasetConfig.from_path_and_columns(
+        path,
+        image_name_col="image_name",
+        text_col="caption"
+    )
+
+    reader = DatasetReader()
+    processor = reader.read_from_config(config)
+    new_dir_sequential = 'test_sequential/'
+    new_dir = 'test_streaming/'
+    if os.path.exists(new_dir_sequential):
+        shutil.rmtree(new_dir_sequential)
+    processor.save_to_shards(new_dir_sequential, max_files_in_shard=1, workers=1)
+
+    for kwargs in [{'upload_queue_size': 1}, {'streaming': True}, {'upload_queue_size': 2, 'streaming': True}]:
+        if os.path.exists(new_dir):
+            shutil.rmtree(new_dir)
+        processor.save_to_shards(new_dir, max_files_in_shard=1, workers=1, **kwargs)
+        assert sorted(os.listdir(new_dir)) == sorted(os.listdir(new_dir_sequential))
+        for filename in os.listdir(new_dir):
+            with open(os.path.join(new_dir, filename), 'rb') as f, \
+                    open(os.path.join(new_dir_sequential, filename), 'rb') as f_sequential:
+                if filename.endswith('.idx'):
+                    # indexes store fingerprints of archives (with modification time), only members are compared
+                    assert json.load(f)['members'] == json.load(f_sequential)['members']
+                else:
+                    assert f.read() == f_sequential.read()
+        shutil.rmtree(new_dir)
+    shutil.rmtree(new_dir_sequential)
+
+
+def test_writers_max_bytes_in_shard():
+    path = 'tests/datasets/shards_correct'
+    config = ShardsDatasetConfig.from_path_and_columns(
+        path,
+        image_name_col="image_name",
+        text_col="caption"
+    )
+
+    reader = DatasetReader()
+    processor = reader.read_from_config(config)
+    new_dir = 'test_max_bytes/'
+    for save_method in [processor.save_to_shards, processor.save_to_sharded_files]:
+        # every sample exceeds 1 byte, so it is written to a separate shard
+        for max_bytes_in_shard, expected_shards in [(1, 2), (10**9, 1)]:
+            if os.path.exists(new_dir):
+                shutil.rmtree(new_dir)
+            save_method(new_dir, max_files_in_shard=None, max_bytes_in_shard=max_bytes_in_shard, workers=1)
+            datafiles = [f for f in os.listdir(new_dir) if f.endswith('.csv')]
+            assert len(datafiles) == expected_shards
+    shutil.rmtree(new_dir)
+
+
+def test_shuffle_samples():
+    samples = [({'image': ('.jpg', bytes([i % 256]))}, {'index': i}) for i in range(1000)]
+    for shuffled in [
+        list(shuffle_with_buffer(samples, 100)),
+        list(shuffle_with_buckets(samples, 8))
+    ]:
+        indexes = [metadata['index'] for _, metadata in shuffled]
+        assert sorted(indexes) == list(range(1000))
+        assert indexes != list(range(1000))
+        assert shuffled[0][0]['image'] == ('.jpg', bytes([indexes[0] % 256]))
+
+
+def test_shuffle_samples_seed():
+    samples = [({'image': ('.jpg', bytes([i % 256]))}, {'index': i}) for i in range(1000)]
+    shuffles = [
+        lambda seed: shuffle_with_buffer(samples, 100, seed=seed),
+        # small write buffer to flush buckets several times
+        lambda seed: shuffle_with_buckets(samples, 8, seed=seed, write_buffer_bytes=1000)
+    ]
+    for shuffle in shuffles:
+        indexes = [metadata['index'] for _, metadata in shuffle(42)]
+        assert sorted(indexes) == list(range(1000))
+        assert indexes == [metadata['index'] for _, metadata in shuffle(42)]
+        assert indexes != [metadata['index'] for _, metadata in shuffle(43)]
+
+
+def test_shuffled_save_to_shards():
+    path = 'tests/datasets/shards_correct'
+    config = ShardsDatasetConfig.from_path_and_columns(
+        path,
+        image_name_col="image_name",
+        text_col="caption"
+    )
+
+    reader = DatasetReader()
+    processor = reader.read_from_config(config)
+    new_dir = 'test_shuffled/'
+    for kwargs in [{'shuffle_buffer_size': 10}, {'shuffle_buckets': 2}]:
+        if os.path.exists(new_dir):
+            shutil.rmtree(new_dir)
+        processor.save_to_shards(new_dir, rename_columns={'text': 'caption'}, workers=1, **kwargs)
+
+        new_config = ShardsDatasetConfig.from_path_and_columns(
+            new_dir.rstrip('/'),
+            image_name_col="image_name",
+            text_col="caption"
+        )
+        new_processor = reader.read_from_config(new_config)
+        assert new_processor.validate().total_errors == 0
+        assert sorted(new_processor.df['text']) == sorted(processor.df['text'])
+    shutil.rmtree(new_dir)